@@ -0,0 +1,105 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import json
+import zlib
+
+from django.http import StreamingHttpResponse
+
+# content type of newline delimited json
+ndjson_content_type = 'application/x-ndjson'
+
+# size of the chunks sent to the client when compressing a stream
+gzip_chunk_size = 65536
+
+
+def accepts_gzip(request) -> bool:
+    """
+    Determine if the client accepts gzip encoded responses
+
+    :param request: HttpRequest
+    :return: bool
+    """
+    return 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '').lower()
+
+
+def iter_ndjson(rows):
+    """
+    Encodes each row as a single line of json
+
+    :param rows: iterable of json serializable objects
+    :return: generator of bytes
+    """
+    for row in rows:
+        yield json.dumps(row, separators=(',', ':')).encode() + b'\n'
+
+
+def iter_gzip(chunks):
+    """
+    Compresses a stream of bytes, buffering small chunks so every chunk sent compresses well
+
+    :param chunks: iterable of bytes
+    :return: generator of gzip encoded bytes
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    buffered = list()
+    buffered_size = 0
+
+    for chunk in chunks:
+        buffered.append(chunk)
+        buffered_size += len(chunk)
+
+        if buffered_size >= gzip_chunk_size:
+            compressed = compressor.compress(b''.join(buffered))
+            buffered = list()
+            buffered_size = 0
+
+            if compressed:
+                yield compressed
+
+    yield compressor.compress(b''.join(buffered)) + compressor.flush()
+
+
+def stream_ndjson(request, rows) -> StreamingHttpResponse:
+    """
+    Returns a streaming newline delimited json response, gzip encoded when the client supports it
+
+    :param request: HttpRequest
+    :param rows: iterable of json serializable objects, consumed lazily as the response is sent
+    :return: StreamingHttpResponse
+    """
+    content = iter_ndjson(rows)
+
+    if accepts_gzip(request):
+        response = StreamingHttpResponse(iter_gzip(content), content_type=ndjson_content_type)
+        response['Content-Encoding'] = 'gzip'
+
+    else:
+        response = StreamingHttpResponse(content, content_type=ndjson_content_type)
+
+    response['Vary'] = 'Accept-Encoding'
+    return response
@@ -0,0 +1,113 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import copy
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from skilletlib import SkilletLoader
+from skilletlib.exceptions import SkilletLoaderException
+
+# app skillets per app_dir, keyed by skillet name
+_registry = dict()
+_registry_guard = threading.Lock()
+
+
+def get_app_skillets_dir(app_dir: str) -> Path:
+    """
+    Returns the directory holding the skillets that implement the forms of an application
+
+    :param app_dir: name of the application, for example 'panhandler'
+    :return: Path
+    """
+    return Path(os.path.join(settings.SRC_PATH, app_dir, 'snippets'))
+
+
+def reload_app_skillets(app_dir: str) -> dict:
+    """
+    Loads all app skillets from disk, replacing the registry for this application. Use this during development
+    after editing an app skillet. Only the registry of the calling process is replaced. If any skillet cannot be
+    loaded, the registry is left as it was
+
+    :param app_dir: name of the application
+    :return: dict of skillet name to skillet dict
+    :raises SkilletLoaderException: if the app skillets could not be loaded
+    """
+    app_skillets = dict()
+
+    for skillet in SkilletLoader().load_all_skillets_from_dir(get_app_skillets_dir(app_dir)):
+        app_skillets[skillet.name] = skillet.skillet_dict
+
+    print(f'Loaded {len(app_skillets)} app skillets for {app_dir}')
+
+    with _registry_guard:
+        _registry[app_dir] = app_skillets
+
+    return app_skillets
+
+
+def get_app_skillets(app_dir: str) -> dict:
+    """
+    Returns the registry of app skillets, these are loaded from disk once per process
+
+    :param app_dir: name of the application
+    :return: dict of skillet name to skillet dict
+    """
+    app_skillets = _registry.get(app_dir, None)
+
+    if app_skillets is not None:
+        return app_skillets
+
+    with _registry_guard:
+        if app_dir in _registry:
+            return _registry[app_dir]
+
+    try:
+        return reload_app_skillets(app_dir)
+
+    except SkilletLoaderException as sle:
+        # nothing is stored, so the next call tries again
+        print(f'Could not load app skillets for {app_dir}: {sle}')
+        return dict()
+
+
+def get_app_skillet(app_dir: str, skillet_name: str) -> (dict, None):
+    """
+    Returns a copy of a single app skillet, callers are free to modify it
+
+    :param app_dir: name of the application
+    :param skillet_name: name of the skillet
+    :return: skillet dict or None if not found
+    """
+    skillet_dict = get_app_skillets(app_dir).get(skillet_name, None)
+
+    if skillet_dict is None:
+        return None
+
+    return copy.deepcopy(skillet_dict)
@@ -135,6 +135,67 @@ def _validate_recommended_data(data: OrderedDict) -> bool:
     return True
 
 
+def load_repository_manifest(manifest: str) -> list:
+    """
+    Loads a list of repositories to import from a YAML or JSON manifest. The manifest may use the same structure as
+    the recommended links, or be a plain list of repositories:
+
+    links:
+      - name: Global Protect Skillets
+        link: https://github.com/PaloAltoNetworks/GPSkillets
+        branch: 90dev
+
+    :param manifest: YAML or JSON string
+    :return: list of dicts each containing a name, url, and branch
+    :raises ValueError: if the manifest cannot be loaded
+    """
+    try:
+        data = oyaml.safe_load(manifest)
+
+    except oyaml.YAMLError as ye:
+        raise ValueError(f'Could not parse manifest: {ye}')
+
+    if type(data) is list:
+        data = {'links': data}
+
+    if type(data) not in (dict, OrderedDict) or type(data.get('links', None)) is not list:
+        raise ValueError('Manifest does not contain a list of repositories')
+
+    repositories = list()
+
+    for link in data['links']:
+        if type(link) not in (dict, OrderedDict):
+            raise ValueError('Repository entry is not a dict')
+
+        url = link.get('link', link.get('url', None))
+
+        if not url:
+            raise ValueError('Repository entry does not have a link')
+
+        repositories.append(get_repository_from_link(link))
+
+    return repositories
+
+
+def get_repository_from_link(link: dict) -> dict:
+    """
+    Converts a recommended link or manifest entry into the repository dict used for importing
+
+    :param link: dict containing a link or url, and an optional name and branch
+    :return: dict containing a name, url, and branch
+    """
+    url = str(link.get('link', link.get('url', ''))).strip()
+    name = link.get('name', None)
+
+    if not name:
+        # default to the last part of the url as the repository name
+        name = url.rstrip('/').split('/')[-1].split(':')[-1]
+        if name.endswith('.git'):
+            name = name[:-4]
+
+    return {'name': str(name).strip(), 'url': url, 'branch': link.get('branch', None)}
+
+
 def is_up_to_date() -> (bool, None):
     """
     Attempts to gather current image tag and build date and compare with latest updated information in docker hub
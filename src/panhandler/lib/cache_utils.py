@@ -0,0 +1,212 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from pan_cnc.lib import cnc_utils
+
+app_name = 'panhandler'
+
+# default maximum size of each content cache namespace on disk
+default_cache_size_mb = 128
+
+
+def get_content_digest(content: bytes) -> str:
+    """
+    Returns the git blob sha of the given content. This allows the digest to be compared directly with the blob
+    shas found in the git object store
+
+    :param content: file contents
+    :return: hex digest
+    """
+    blob = hashlib.sha1()
+    blob.update(f'blob {len(content)}\0'.encode())
+    blob.update(content)
+    return blob.hexdigest()
+
+
+def get_package_version(package_name: str) -> str:
+    """
+    Returns the installed version of a package. Cached results that were produced by a library should be keyed by
+    its version, so an upgrade never serves results from the previous version
+
+    :param package_name: name of the installed distribution, for example 'skilletlib'
+    :return: version string or 'unknown' if the package is not installed
+    """
+    try:
+        return importlib.metadata.version(package_name)
+
+    except importlib.metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def get_versioned_digest(digest: str, version: str) -> str:
+    """
+    Combines a content digest with the version of whatever produced the cached value for it
+
+    :param digest: content digest as returned from get_content_digest
+    :param version: version of the library or format of the cached value
+    :return: hex digest to use as the cache key
+    """
+    return hashlib.sha1(f'{version}:{digest}'.encode()).hexdigest()
+
+
+def get_cache_dir(namespace: str) -> Path:
+    """
+    Returns the directory where cached content for the given namespace is stored
+
+    :param namespace: name of the cache, for example 'skillets'
+    :return: Path
+    """
+    return Path(os.path.join(os.path.expanduser('~/.pan_cnc'), app_name, 'content_cache', namespace))
+
+
+def get_cache_size_limit() -> int:
+    """
+    Returns the maximum size in bytes of each content cache namespace. This can be configured using the
+    'content_cache_size_mb' key in the application_data section of the .pan-cnc.yaml file
+
+    :return: size in bytes
+    """
+    app_config = cnc_utils.get_app_config(app_name)
+    application_data = app_config.get('application_data', dict())
+
+    size_mb = default_cache_size_mb
+
+    if type(application_data) is dict:
+        try:
+            size_mb = int(application_data.get('content_cache_size_mb', default_cache_size_mb))
+        except (TypeError, ValueError):
+            print('malformed content_cache_size_mb in .pan-cnc.yaml')
+
+    return size_mb * 1024 * 1024
+
+
+def _get_cache_file(namespace: str, digest: str) -> Path:
+    return get_cache_dir(namespace).joinpath(digest[:2], f'{digest}.json')
+
+
+def get_cached_content(namespace: str, digest: str) -> Any:
+    """
+    Returns the value previously stored for this content digest. The modification time of the cache entry is updated
+    on every hit, which is used to evict the least recently used entries
+
+    :param namespace: name of the cache
+    :param digest: content digest as returned from get_content_digest
+    :return: cached value or None if not found
+    """
+    cache_file = _get_cache_file(namespace, digest)
+
+    try:
+        with cache_file.open('r') as cf:
+            value = json.load(cf)
+
+        os.utime(cache_file)
+        return value
+
+    except FileNotFoundError:
+        return None
+
+    except (OSError, ValueError) as e:
+        print(f'Could not read cache entry {cache_file}: {e}')
+        return None
+
+
+def set_cached_content(namespace: str, digest: str, value: Any) -> None:
+    """
+    Stores a value for this content digest. Entries are written atomically, so concurrent readers never see a
+    partially written entry
+
+    :param namespace: name of the cache
+    :param digest: content digest as returned from get_content_digest
+    :param value: any json serializable value
+    :return: None
+    """
+    cache_file = _get_cache_file(namespace, digest)
+
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+        (fd, tmp_path) = tempfile.mkstemp(dir=str(cache_file.parent), prefix='.tmp_')
+        with os.fdopen(fd, 'w') as tf:
+            json.dump(value, tf)
+
+        os.replace(tmp_path, str(cache_file))
+
+    except (OSError, TypeError, ValueError) as e:
+        print(f'Could not write cache entry {cache_file}: {e}')
+
+
+def prune_content_cache(namespace: str, max_size: int = None) -> None:
+    """
+    Removes the least recently used entries until the namespace is below the maximum size
+
+    :param namespace: name of the cache
+    :param max_size: maximum size in bytes, defaults to the configured limit
+    :return: None
+    """
+    if max_size is None:
+        max_size = get_cache_size_limit()
+
+    cache_dir = get_cache_dir(namespace)
+
+    if not cache_dir.exists():
+        return
+
+    entries = list()
+    total_size = 0
+
+    for cache_file in cache_dir.glob('*/*.json'):
+        try:
+            stat = cache_file.stat()
+        except OSError:
+            continue
+
+        entries.append((stat.st_mtime, stat.st_size, cache_file))
+        total_size += stat.st_size
+
+    if total_size <= max_size:
+        return
+
+    print(f'Pruning {namespace} content cache of {total_size} bytes')
+
+    for (mtime, size, cache_file) in sorted(entries, key=lambda e: e[0]):
+        try:
+            cache_file.unlink()
+        except OSError:
+            continue
+
+        total_size -= size
+
+        if total_size <= max_size:
+            break
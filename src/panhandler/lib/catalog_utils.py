@@ -0,0 +1,595 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import F
+from django.db.models import Q
+from django.utils import timezone
+
+from cnc.models import RepositoryDetails
+from cnc.models import Skillet
+from pan_cnc.lib import cnc_utils
+from panhandler.lib import search_utils
+from panhandler.models import CatalogVersion
+from panhandler.models import SkilletLabel
+from panhandler.models import SkilletSummary
+
+app_name = 'panhandler'
+
+# long term cache key of the precomputed collections lookup
+collections_index_key = 'collections_index'
+
+# cache keys include the catalog version, this only limits how long unused entries are kept
+collections_index_life = 604800
+
+# rendered template fragments are keyed by the catalog version, this only limits how long unused fragments are kept
+fragment_cache_life = 86400
+
+# name of the pseudo collection that contains every skillet
+all_skillets_collection = 'All Skillets'
+
+# values longer than this are not indexed
+max_label_value_length = 255
+
+# maximum number of names passed in a single IN query
+max_query_names = 500
+
+# fields of SkilletSummary returned to list pages
+summary_fields = ('name', 'label', 'description', 'type', 'order', 'labels_json')
+
+# skillet list paging
+default_page_size = 60
+max_page_size = 500
+
+# sort keys accepted by query_skillet_summaries mapped to the fields to order by
+sort_fields = {
+    'name': ('label', 'name'),
+    'type': ('type', 'label', 'name'),
+    'order': (F('order').asc(nulls_last=True), 'label', 'name'),
+}
+
+
+def get_catalog_version() -> tuple:
+    """
+    Returns the current catalog version. The version is incremented by every change to the skillet index
+
+    :return: tuple of (version, last_modified datetime or None if the catalog has never changed)
+    """
+    catalog_version = CatalogVersion.objects.filter(pk=1).values_list('version', 'last_modified').first()
+
+    # the record is also created when only the favorites have changed
+    if catalog_version is None or catalog_version[0] == 0:
+        return 0, None
+
+    return catalog_version
+
+
+def bump_catalog_version() -> int:
+    """
+    Increments the catalog version. Call this after every change to the skillet index, every cache key and ETag
+    derived from the version is invalidated at once
+
+    :return: the new version
+    """
+    with transaction.atomic():
+        CatalogVersion.objects.get_or_create(pk=1)
+        CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1, last_modified=timezone.now())
+
+    return get_catalog_version()[0]
+
+
+def get_favorites_version() -> tuple:
+    """
+    Returns the current favorites version. The version is incremented by every change to the favorites
+
+    :return: tuple of (version, last_modified datetime or None if the favorites have never changed)
+    """
+    favorites_version = CatalogVersion.objects.filter(pk=1).values_list('favorites_version',
+                                                                        'favorites_modified').first()
+
+    # the record is also created when only the catalog has changed
+    if favorites_version is None or favorites_version[0] == 0:
+        return 0, None
+
+    return favorites_version
+
+
+def bump_favorites_version() -> int:
+    """
+    Increments the favorites version. Call this after every change to the favorites, only the pages that show the
+    favorites are invalidated
+
+    :return: the new version
+    """
+    with transaction.atomic():
+        CatalogVersion.objects.get_or_create(pk=1)
+        CatalogVersion.objects.filter(pk=1).update(favorites_version=F('favorites_version') + 1,
+                                                   favorites_modified=timezone.now())
+
+    return get_favorites_version()[0]
+
+
+def get_last_modified(include_favorites: bool = False) -> (datetime, None):
+    """
+    Returns the time of the last change to the catalog, and optionally to the favorites
+
+    :param include_favorites: also consider changes to the favorites
+    :return: datetime or None if nothing has changed yet
+    """
+    last_modified = [get_catalog_version()[1]]
+
+    if include_favorites:
+        last_modified.append(get_favorites_version()[1])
+
+    last_modified = [m for m in last_modified if m is not None]
+    return max(last_modified) if last_modified else None
+
+
+def get_versioned_key(key: str) -> str:
+    """
+    Returns the cache key to use for a value derived from the catalog. Entries stored under keys of older versions
+    are never read again and simply expire
+
+    :param key: base cache key, for example 'imported_repositories'
+    :return: cache key including the current catalog version
+    """
+    return f'{key}_v{get_catalog_version()[0]}'
+
+
+def get_catalog_etag(*parts: str, include_favorites: bool = False) -> str:
+    """
+    Returns an ETag for a page that only changes when the catalog changes
+
+    :param parts: any additional values the page depends on, for example the session key
+    :param include_favorites: the page shows the favorites, so it changes when they change as well
+    :return: quoted ETag
+    """
+    digest = hashlib.sha1(':'.join([str(p) for p in parts]).encode()).hexdigest()[:12]
+
+    if include_favorites:
+        return f'"{get_catalog_version()[0]}.{get_favorites_version()[0]}-{digest}"'
+
+    return f'"{get_catalog_version()[0]}-{digest}"'
+
+
+def get_fragment_cache_context() -> dict:
+    """
+    Returns the template context used by the cache tags of catalog pages. Fragments are keyed by the catalog version,
+    so they are re-rendered after any change to the catalog
+
+    :return: dict of catalog_version and fragment_cache_life
+    """
+    return {'catalog_version': get_catalog_version()[0], 'fragment_cache_life': fragment_cache_life}
+
+
+def get_label_values(skillet_dict: dict) -> list:
+    """
+    Returns the indexable (key, value) pairs of the labels of a skillet. List values are returned as one pair per
+    item, nested dicts are not indexed
+
+    :param skillet_dict: loaded skillet dict
+    :return: list of (key, value) tuples
+    """
+    labels = skillet_dict.get('labels', dict())
+
+    if type(labels) is not dict:
+        return list()
+
+    label_values = list()
+
+    for (key, value) in labels.items():
+        values = value if type(value) is list else [value]
+
+        for v in values:
+            if v is None or type(v) in (dict, list):
+                continue
+
+            v = str(v)
+
+            if len(v) > max_label_value_length:
+                continue
+
+            if (str(key), v) not in label_values:
+                label_values.append((str(key), v))
+
+    return label_values
+
+
+def get_skillet_order(skillet_dict: dict) -> (int, None):
+    """
+    Returns the order label of a skillet as an int
+
+    :param skillet_dict: loaded skillet dict
+    :return: order or None if the skillet does not specify a valid order
+    """
+    labels = skillet_dict.get('labels', dict())
+
+    if type(labels) is not dict:
+        return None
+
+    try:
+        return int(labels.get('order', None))
+
+    except (TypeError, ValueError):
+        return None
+
+
+def get_skillet_summary(skillet_name: str, repo_name: str, skillet_dict: dict) -> SkilletSummary:
+    """
+    Builds the summary record of a skillet
+
+    :param skillet_name: name of the skillet as indexed
+    :param repo_name: name of the repository this skillet was found in
+    :param skillet_dict: loaded skillet dict
+    :return: unsaved SkilletSummary
+    """
+    labels = skillet_dict.get('labels', dict())
+
+    if type(labels) is not dict:
+        labels = dict()
+
+    return SkilletSummary(
+        name=skillet_name,
+        repo_name=repo_name or '',
+        label=str(skillet_dict.get('label', skillet_name))[:200],
+        description=str(skillet_dict.get('description', '')),
+        type=str(skillet_dict.get('type', ''))[:64],
+        order=get_skillet_order(skillet_dict),
+        labels_json=json.dumps(labels),
+    )
+
+
+def rebuild_catalog_index(repo_names: list = None) -> dict:
+    """
+    Rebuilds the label index, the skillet summaries, and the search index from the skillet index and precomputes
+    the collections lookup. This is called at index time, so pages never need to load and deserialize all skillets
+    to list them. When repository names are supplied, only the entries of the skillets in those repositories are
+    replaced
+
+    :param repo_names: optional list of names of the repositories that have been indexed or removed
+    :return: collections lookup as returned from get_collections_index
+    """
+    label_records = list()
+    summary_records = list()
+    search_documents = list()
+
+    skillets = Skillet.objects.all()
+
+    if repo_names is not None:
+        skillets = skillets.filter(repository__name__in=repo_names)
+
+    for (skillet_name, skillet_json, repo_name) in skillets.values_list('name', 'skillet_json', 'repository__name'):
+        try:
+            skillet_dict = json.loads(skillet_json)
+
+        except ValueError:
+            print(f'Could not index skillet {skillet_name}')
+            continue
+
+        summary_records.append(get_skillet_summary(skillet_name, repo_name, skillet_dict))
+        search_documents.append(search_utils.get_search_document(skillet_name, skillet_dict))
+
+        for (key, value) in get_label_values(skillet_dict):
+            label_records.append(SkilletLabel(skillet_name=skillet_name, key=key, value=value))
+
+    if repo_names is None:
+        stale_names = None
+
+    else:
+        # the skillets previously found in these repositories, as well as any that have moved between repositories
+        stale_names = set(SkilletSummary.objects.filter(repo_name__in=repo_names).values_list('name', flat=True))
+        stale_names.update([summary.name for summary in summary_records])
+
+    with transaction.atomic():
+        if stale_names is None:
+            SkilletLabel.objects.all().delete()
+            SkilletSummary.objects.all().delete()
+
+        else:
+            stale_list = sorted(stale_names)
+
+            for i in range(0, len(stale_list), max_query_names):
+                SkilletLabel.objects.filter(skillet_name__in=stale_list[i:i + max_query_names]).delete()
+                SkilletSummary.objects.filter(name__in=stale_list[i:i + max_query_names]).delete()
+
+        SkilletLabel.objects.bulk_create(label_records, batch_size=500)
+        SkilletSummary.objects.bulk_create(summary_records, batch_size=500)
+
+    search_utils.rebuild_search_index(search_documents, stale_names)
+
+    bump_catalog_version()
+
+    collections_index = build_collections_index()
+    cnc_utils.set_long_term_cached_value(app_name, get_versioned_key(collections_index_key), collections_index,
+                                         collections_index_life, 'label_index')
+
+    return collections_index
+
+
+def build_collections_index() -> dict:
+    """
+    Builds the collections lookup from the label index. Counts and the collection co-occurrence matrix are computed
+    from a single query over the collection labels
+
+    :return: dict with 'collections' containing the list of collection names and 'collections_info' mapping each
+        collection to a dict of count, co_occurrence, and related keys
+    """
+    skillet_collections = dict()
+    collections = list()
+
+    for (skillet_name, value) in SkilletLabel.objects.filter(key='collection').order_by('id') \
+            .values_list('skillet_name', 'value'):
+        skillet_collections.setdefault(skillet_name, list()).append(value)
+
+        if value not in collections:
+            collections.append(value)
+
+    co_occurrence = dict([(c, dict()) for c in collections])
+    counts = dict([(c, 0) for c in collections])
+
+    for skillet_names in skillet_collections.values():
+        for c in skillet_names:
+            counts[c] += 1
+
+            for related_collection in skillet_names:
+                if related_collection != c:
+                    co_occurrence[c][related_collection] = co_occurrence[c].get(related_collection, 0) + 1
+
+    collections_info = dict()
+    collections_info[all_skillets_collection] = {
+        'count': Skillet.objects.count(),
+        'co_occurrence': dict(),
+        'related': list(),
+    }
+
+    for c in collections:
+        collections_info[c] = {
+            'count': counts[c],
+            'co_occurrence': co_occurrence[c],
+            'related': json.dumps(list(co_occurrence[c].keys())),
+        }
+
+    return {'collections': collections, 'collections_info': collections_info}
+
+
+def get_collections_index() -> dict:
+    """
+    Returns the precomputed collections lookup. The catalog index is built if it has never been built
+
+    :return: dict with 'collections' and 'collections_info' keys, see build_collections_index
+    """
+    collections_index = cnc_utils.get_long_term_cached_value(app_name, get_versioned_key(collections_index_key))
+
+    if collections_index is not None:
+        return collections_index
+
+    ensure_catalog_index()
+
+    collections_index = build_collections_index()
+    cnc_utils.set_long_term_cached_value(app_name, get_versioned_key(collections_index_key), collections_index,
+                                         collections_index_life, 'label_index')
+
+    return collections_index
+
+
+def ensure_catalog_index() -> bool:
+    """
+    Builds the catalog index if it has never been built, for example directly after upgrading
+
+    :return: True if the index was rebuilt
+    """
+    if SkilletSummary.objects.exists() or not Skillet.objects.exists():
+        return False
+
+    print('Building the catalog index')
+    rebuild_catalog_index()
+    return True
+
+
+def get_summary_dict(summary_values: dict) -> dict:
+    """
+    Converts SkilletSummary values into the dict used by list pages. This has the same name, label, description,
+    type, and labels keys as a full skillet dict, so templates can render either
+
+    :param summary_values: dict of summary_fields as returned from QuerySet.values
+    :return: dict of name, label, description, type, order, labels, and collections
+    """
+    summary = dict(summary_values)
+    labels = json.loads(summary.pop('labels_json', '{}') or '{}')
+
+    collections = labels.get('collection', list())
+    if type(collections) is not list:
+        collections = [collections]
+
+    summary['labels'] = labels
+    summary['collections'] = collections
+
+    return summary
+
+
+def load_skillet_summaries_by_names(skillet_names: list) -> list:
+    """
+    Loads the summaries of many skillets at once. Use this for list pages, the full skillet is only needed once a
+    skillet is opened
+
+    :param skillet_names: list of skillet names
+    :return: list of summary dicts as returned from get_summary_dict in the same order as the names, skillets that
+        are not found are skipped
+    """
+    ensure_catalog_index()
+
+    summaries = dict()
+    unique_names = list(dict.fromkeys(skillet_names))
+
+    for i in range(0, len(unique_names), max_query_names):
+        for summary_values in SkilletSummary.objects.filter(name__in=unique_names[i:i + max_query_names]) \
+                .values(*summary_fields):
+            summaries[summary_values['name']] = get_summary_dict(summary_values)
+
+    return [summaries[n] for n in skillet_names if n in summaries]
+
+
+def get_collection_queryset(collection: str):
+    """
+    Returns the summaries of all skillets in a collection. The 'All Skillets' collection contains every skillet
+    except app skillets, see #196
+
+    :param collection: name of the collection
+    :return: QuerySet of SkilletSummary
+    """
+    if collection == all_skillets_collection:
+        return SkilletSummary.objects.exclude(type='app')
+
+    skillet_names = SkilletLabel.objects.filter(key='collection', value=collection).values('skillet_name')
+    return SkilletSummary.objects.filter(name__in=skillet_names)
+
+
+def get_default_sort(collection: str) -> str:
+    """
+    Skillets are sorted by the order the skillet builder specified if any skillet in the collection has an order
+    label, otherwise by name
+
+    :param collection: name of the collection
+    :return: 'order' or 'name'
+    """
+    if get_collection_queryset(collection).filter(order__isnull=False).exists():
+        return 'order'
+
+    return 'name'
+
+
+def query_skillet_summaries(collection: str, skillet_type: str = None, search: str = None, sort: str = None,
+                            page: int = 1, page_size: int = default_page_size) -> dict:
+    """
+    Returns a single page of the skillets in a collection
+
+    :param collection: name of the collection
+    :param skillet_type: only return skillets of this type
+    :param search: only return skillets with this text in the name, label, or description
+    :param sort: one of 'name', 'type', or 'order', defaults to get_default_sort
+    :param page: page number starting at 1, out of range pages return the last page
+    :param page_size: number of skillets per page
+    :return: dict with collection, sort, page, pages, page_size, total, and skillets keys. skillets is a list of
+        dicts of name, label, description, type, order, and collections
+    """
+    ensure_catalog_index()
+
+    if sort not in sort_fields:
+        sort = get_default_sort(collection)
+
+    try:
+        page_size = min(max(int(page_size), 1), max_page_size)
+
+    except (TypeError, ValueError):
+        page_size = default_page_size
+
+    queryset = get_collection_queryset(collection)
+
+    if skillet_type:
+        queryset = queryset.filter(type=skillet_type)
+
+    if search:
+        queryset = queryset.filter(Q(label__icontains=search) | Q(name__icontains=search) |
+                                   Q(description__icontains=search))
+
+    paginator = Paginator(queryset.order_by(*sort_fields[sort]), page_size)
+    skillet_page = paginator.get_page(page)
+
+    skillets = [get_summary_dict(s) for s in skillet_page.object_list.values(*summary_fields)]
+
+    return {
+        'collection': collection,
+        'sort': sort,
+        'page': skillet_page.number,
+        'pages': paginator.num_pages,
+        'page_size': page_size,
+        'total': paginator.count,
+        'skillets': skillets,
+    }
+
+
+def iter_repositories():
+    """
+    Yields the details of every imported repository without loading them all at once
+
+    :return: generator of dicts of name, url, branch, description, and last_updated
+    """
+    for (name, url, details_json) in RepositoryDetails.objects.order_by('name') \
+            .values_list('name', 'url', 'details_json').iterator():
+        try:
+            details = json.loads(details_json)
+
+        except ValueError:
+            details = dict()
+
+        yield {
+            'name': name,
+            'url': details.get('url', url),
+            'branch': details.get('branch', ''),
+            'description': details.get('description', ''),
+            'last_updated': details.get('last_updated', ''),
+        }
+
+
+def iter_collections():
+    """
+    Yields every collection from the precomputed collections lookup
+
+    :return: generator of dicts of name, count, and related
+    """
+    collections_info = get_collections_index()['collections_info']
+
+    for (name, info) in collections_info.items():
+        yield {'name': name, 'count': info['count'], 'related': list(info['co_occurrence'].keys())}
+
+
+def iter_skillet_summaries(label_key: str = None, label_value: str = None):
+    """
+    Yields the summaries of all skillets, optionally only those with a given label, without loading them all at once
+
+    :param label_key: only return skillets with this label, for example 'collection'
+    :param label_value: only return skillets where the label has this value
+    :return: generator of summary dicts as returned from get_summary_dict, including repo_name
+    """
+    ensure_catalog_index()
+
+    queryset = SkilletSummary.objects.all()
+
+    if label_key and label_value is not None:
+        queryset = queryset.filter(name__in=SkilletLabel.objects.filter(key=label_key, value=label_value)
+                                   .values('skillet_name'))
+
+    elif label_key:
+        queryset = queryset.filter(name__in=SkilletLabel.objects.filter(key=label_key).values('skillet_name'))
+
+    for summary_values in queryset.order_by('name').values('repo_name', *summary_fields).iterator(chunk_size=500):
+        yield get_summary_dict(summary_values)
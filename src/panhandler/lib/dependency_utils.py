@@ -0,0 +1,178 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import json
+import re
+from collections import deque
+
+from cnc.models import RepositoryDetails
+from cnc.models import Skillet
+
+# branch assumed when a dependency does not specify one
+default_branch = 'master'
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a git url so that urls that differ only by a trailing slash or .git suffix are treated as the same
+
+    :param url: git url
+    :return: normalized url
+    """
+    if not url:
+        return ''
+
+    normalized = url.strip().rstrip('/')
+
+    if normalized.endswith('.git'):
+        normalized = normalized[:-4]
+
+    return normalized
+
+
+def get_dependency_key(url: str, branch: str = None) -> tuple:
+    """
+    Returns the key used to index repositories and dependencies
+
+    :param url: git url
+    :param branch: branch name
+    :return: tuple of (normalized url, branch)
+    """
+    return normalize_url(url), branch or default_branch
+
+
+def get_repository_name_from_url(url: str, branch: str = None) -> str:
+    """
+    Derives a directory name for a dependency to be imported
+
+    :param url: git url
+    :param branch: branch name, appended to the name for branches other than the default
+    :return: repository name
+    """
+    name = normalize_url(url).split('/')[-1].split(':')[-1]
+
+    if branch and branch != default_branch:
+        name = f'{name}_{branch}'
+
+    return re.sub(r'[^\w\d\-.]', '_', name)
+
+
+def build_repository_index() -> dict:
+    """
+    Builds an index of all imported repositories keyed by (url, branch)
+
+    :return: dict of dependency key to repository name
+    """
+    repository_index = dict()
+
+    for repository_object in RepositoryDetails.objects.all():
+        try:
+            details = json.loads(repository_object.details_json)
+
+        except ValueError:
+            details = dict()
+
+        url = details.get('url', repository_object.url)
+        key = get_dependency_key(url, details.get('branch', None))
+        repository_index[key] = repository_object.name
+
+    return repository_index
+
+
+def get_repository_dependencies(repo_name: str) -> dict:
+    """
+    Returns the dependencies declared by all skillets in a repository
+
+    :param repo_name: name of the repository
+    :return: dict of dependency key to dict of the url and branch as declared
+    """
+    dependencies = dict()
+
+    for skillet_json in Skillet.objects.filter(repository__name=repo_name).values_list('skillet_json', flat=True):
+        skillet = json.loads(skillet_json)
+
+        for depends in skillet.get('depends', list()):
+            url = depends.get('url', None)
+
+            if not url:
+                continue
+
+            branch = depends.get('branch', default_branch)
+            dependencies[get_dependency_key(url, branch)] = {'url': url, 'branch': branch}
+
+    return dependencies
+
+
+def resolve_dependencies(repo_names: list) -> dict:
+    """
+    Resolves the full transitive dependency graph of one or more repositories. Dependencies of repositories that are
+    not imported yet cannot be known until they are imported.
+
+    :param repo_names: list of repository names to resolve
+    :return: dict with 'resolved' mapping each dependency key to the imported repository name and 'missing' mapping
+        each dependency key to a dict of the url, branch, and the list of repositories that require it
+    """
+    repository_index = build_repository_index()
+
+    resolved = dict()
+    missing = dict()
+
+    visited = set()
+    queue = deque(repo_names)
+
+    while queue:
+        repo_name = queue.popleft()
+
+        if repo_name in visited:
+            continue
+
+        visited.add(repo_name)
+
+        for (key, depends) in get_repository_dependencies(repo_name).items():
+            if key in repository_index:
+                resolved[key] = repository_index[key]
+                queue.append(repository_index[key])
+                continue
+
+            if key not in missing:
+                missing[key] = {'url': depends['url'], 'branch': depends['branch'], 'required_by': list()}
+
+            if repo_name not in missing[key]['required_by']:
+                missing[key]['required_by'].append(repo_name)
+
+    return {'resolved': resolved, 'missing': missing}
+
+
+def get_missing_dependencies(repo_names: list) -> list:
+    """
+    Returns the dependencies of these repositories that are not yet imported in a form suitable for templates
+
+    :param repo_names: list of repository names to resolve
+    :return: list of dicts of url, branch, and required_by sorted by url
+    """
+    missing = resolve_dependencies(repo_names)['missing']
+    return sorted(missing.values(), key=lambda m: (m['url'], m['branch']))
@@ -0,0 +1,918 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import oyaml
+from django.db import transaction
+from git import GitCommandError
+from git import Repo
+from gitdb.exc import BadName
+from skilletlib import SkilletLoader
+from skilletlib.exceptions import SkilletLoaderException
+
+from cnc.models import RepositoryDetails
+from cnc.models import Skillet
+from pan_cnc.lib import db_utils
+from pan_cnc.lib.exceptions import DuplicateSkilletException
+from panhandler.lib import cache_utils
+from panhandler.lib import catalog_utils
+from panhandler.lib import skillet_cache_utils
+from panhandler.models import BranchIndex
+from panhandler.models import RepositoryIndex
+
+app_name = 'panhandler'
+
+# file names that skilletlib will load as skillets
+meta_cnc_file_names = ('.meta-cnc.yaml', '.meta-cnc.yml')
+skillet_file_suffixes = ('.skillet.yaml', '.skillet.yml')
+
+# number of branch index snapshots kept per repository
+max_branch_snapshots = 5
+
+# directories that are never searched for skillets
+ignored_dir_names = ('__pycache__', 'venv')
+
+# content cache namespace for parsed skillet files
+parse_cache_namespace = 'skillets'
+
+# increment when the format of the cached skillet dicts changes
+parse_cache_schema_version = 1
+
+# parsed skillet dicts depend on the skilletlib version that normalized them and on their cached format
+parse_cache_version = f'{cache_utils.get_package_version("skilletlib")}-{parse_cache_schema_version}'
+
+
+def get_repo_dir(repo_name: str) -> str:
+    """
+    Returns the directory where the given repository is cloned
+
+    :param repo_name: name of the repository
+    :return: str path
+    """
+    return os.path.join(os.path.expanduser('~/.pan_cnc'), app_name, 'repositories', repo_name)
+
+
+def is_skillet_file(relative_path: str, excluded_dirs: set = None) -> bool:
+    """
+    Determine if the path is a skillet metadata file that would be found by the skillet loader. Directories
+    that start with a '.', ignored directories, and any excluded directories such as submodules are never searched
+    for skillets
+
+    :param relative_path: path of the file relative to the repository root
+    :param excluded_dirs: set of directories relative to the repository root that are not searched
+    :return: bool
+    """
+    parts = Path(relative_path).parts
+
+    if not parts:
+        return False
+
+    file_name = parts[-1]
+
+    for d in parts[:-1]:
+        if d.startswith('.') or d in ignored_dir_names:
+            return False
+
+    if excluded_dirs:
+        for parent in Path(relative_path).parents:
+            if parent.as_posix() in excluded_dirs:
+                return False
+
+    return file_name in meta_cnc_file_names or file_name.endswith(skillet_file_suffixes)
+
+
+def get_submodule_dirs(repo_dir: str) -> set:
+    """
+    Returns the directories of all submodules registered in the .gitmodules file of this repository
+
+    :param repo_dir: directory of the repository
+    :return: set of directories relative to the repository root
+    """
+    if not os.path.exists(os.path.join(repo_dir, '.gitmodules')):
+        return set()
+
+    try:
+        submodule_paths = Repo(repo_dir).git.config('--file', '.gitmodules', '--get-regexp', r'^submodule\..*\.path$')
+
+    except GitCommandError:
+        # git config exits with an error when no submodule path is found
+        return set()
+
+    submodule_dirs = set()
+    for line in submodule_paths.splitlines():
+        (_, _, submodule_dir) = line.partition(' ')
+        if submodule_dir:
+            submodule_dirs.add(Path(submodule_dir).as_posix())
+
+    return submodule_dirs
+
+
+def get_excluded_dirs(repo_dir: str, relative_paths: set) -> set:
+    """
+    Returns the directories that are not searched for the given skillet files. These are the submodules of this
+    repository and any parent directory of these files that is a nested git checkout
+
+    :param repo_dir: directory of the repository
+    :param relative_paths: set of file paths relative to the repository root
+    :return: set of directories relative to the repository root
+    """
+    excluded_dirs = get_submodule_dirs(repo_dir)
+
+    for relative_path in relative_paths:
+        for parent in Path(relative_path).parents:
+            if parent.as_posix() != '.' and os.path.exists(os.path.join(repo_dir, parent, '.git')):
+                excluded_dirs.add(parent.as_posix())
+
+    return excluded_dirs
+
+
+def get_head_sha(repo_dir: str) -> (str, None):
+    """
+    Returns the commit sha of the currently checked out HEAD
+
+    :param repo_dir: directory of the repository
+    :return: hexsha of the HEAD commit or None if this cannot be determined
+    """
+    try:
+        return Repo(repo_dir).head.commit.hexsha
+
+    except (ValueError, GitCommandError, BadName) as e:
+        print(f'Could not determine HEAD of {repo_dir}: {e}')
+        return None
+
+
+def get_active_branch(repo_dir: str) -> (str, None):
+    """
+    Returns the name of the currently checked out branch
+
+    :param repo_dir: directory of the repository
+    :return: branch name or None if HEAD is detached or this cannot be determined
+    """
+    try:
+        return Repo(repo_dir).active_branch.name
+
+    except (TypeError, ValueError, GitCommandError) as e:
+        print(f'Could not determine the active branch of {repo_dir}: {e}')
+        return None
+
+
+def get_repository_index(repo_name: str) -> RepositoryIndex:
+    """
+    Returns the index state record for a repository, creating it if necessary
+
+    :param repo_name: name of the repository
+    :return: RepositoryIndex
+    """
+    (repository_index, created) = RepositoryIndex.objects.get_or_create(name=repo_name)
+    return repository_index
+
+
+def has_local_changes(repo_dir: str) -> bool:
+    """
+    Determine if the working tree has any changes that are not committed. Temp files and python init files created
+    by panhandler itself are not considered changes
+
+    :param repo_dir: directory of the repository
+    :return: bool
+    """
+    try:
+        repo = Repo(repo_dir)
+
+        if repo.is_dirty():
+            return True
+
+        untracked_files = repo.untracked_files
+
+    except (ValueError, GitCommandError) as e:
+        print(f'Could not determine the status of {repo_dir}: {e}')
+        return True
+
+    for relative_path in untracked_files:
+        path = Path(relative_path)
+
+        if path.name.startswith('.cnc_tmp_') or path.name == '__init__.py':
+            continue
+
+        if any(part in ignored_dir_names for part in path.parts):
+            continue
+
+        return True
+
+    return False
+
+
+def record_indexed_head(repo_name: str, head: str, lint_results: list = None, local_changes: bool = None) -> None:
+    """
+    Records the HEAD commit that the skillet index for this repository was built from. If lint results are supplied,
+    they are saved as valid for this HEAD as well
+
+    :param repo_name: name of the repository
+    :param head: commit sha
+    :param lint_results: optional list of lint results from lint_utils.lint_repository
+    :param local_changes: True if the working tree had uncommitted changes when indexed, checked if not supplied
+    :return: None
+    """
+    if local_changes is None:
+        local_changes = bool(head) and has_local_changes(get_repo_dir(repo_name))
+
+    repository_index = get_repository_index(repo_name)
+    repository_index.head = head or ''
+    repository_index.local_changes = local_changes
+
+    if lint_results is not None:
+        repository_index.lint_head = head or ''
+        repository_index.lint_json = json.dumps(lint_results, default=str)
+
+    repository_index.save()
+
+
+def get_indexed_head(repo_name: str) -> str:
+    """
+    Returns the HEAD commit that the skillet index for this repository was last built from
+
+    :param repo_name: name of the repository
+    :return: commit sha or an empty string if the index is incomplete or has never been built
+    """
+    repository_index = RepositoryIndex.objects.filter(name=repo_name).first()
+
+    if repository_index is None:
+        return ''
+
+    return repository_index.head
+
+
+def get_cached_lint_results(repo_name: str, head: str) -> (list, None):
+    """
+    Returns the lint results previously gathered for this HEAD commit
+
+    :param repo_name: name of the repository
+    :param head: commit sha
+    :return: list of lint results or None if no results have been recorded for this commit
+    """
+    repository_index = get_repository_index(repo_name)
+
+    if not head or repository_index.lint_head != head:
+        return None
+
+    return json.loads(repository_index.lint_json)
+
+
+def get_stored_lint_results(repo_name: str) -> list:
+    """
+    Returns the most recent lint results recorded for this repository, regardless of the commit they were
+    gathered for
+
+    :param repo_name: name of the repository
+    :return: list of lint results
+    """
+    repository_index = RepositoryIndex.objects.filter(name=repo_name).first()
+
+    if repository_index is None:
+        return list()
+
+    return json.loads(repository_index.lint_json)
+
+
+def save_branch_index(repo_name: str, branch: str, head: str) -> None:
+    """
+    Takes a snapshot of the current skillet index and lint results of a repository for the given branch. Only
+    the most recently used branches of each repository are kept
+
+    :param repo_name: name of the repository
+    :param branch: name of the branch that is currently checked out
+    :param head: commit sha the current index was built from
+    :return: None
+    """
+    if not branch or not is_indexed(repo_name, head):
+        return
+
+    skillets = list(Skillet.objects.filter(repository__name=repo_name).values_list('skillet_json', flat=True))
+    lint_results = get_cached_lint_results(repo_name, head)
+
+    BranchIndex.objects.update_or_create(
+        repo_name=repo_name,
+        branch=branch,
+        defaults={
+            'head': head,
+            'skillets_json': json.dumps(skillets),
+            # null when no lint results are available for this commit
+            'lint_json': json.dumps(lint_results),
+        }
+    )
+
+    stale_snapshots = BranchIndex.objects.filter(repo_name=repo_name).order_by('-last_used')[max_branch_snapshots:]
+    BranchIndex.objects.filter(id__in=[b.id for b in stale_snapshots]).delete()
+
+
+def restore_branch_index(repo_name: str, branch: str, head: str) -> bool:
+    """
+    Replaces the skillet index of a repository with the snapshot previously taken for this branch. This only
+    succeeds if the branch has not moved since the snapshot was taken
+
+    :param repo_name: name of the repository
+    :param branch: name of the branch that is now checked out
+    :param head: commit sha of the branch HEAD
+    :return: True if the index was restored, False if the repository must be indexed
+    """
+    branch_index = BranchIndex.objects.filter(repo_name=repo_name, branch=branch, head=head).first()
+
+    if branch_index is None:
+        return False
+
+    skillets = dict()
+    for skillet_json in json.loads(branch_index.skillets_json):
+        skillets[json.loads(skillet_json)['name']] = skillet_json
+
+    repository_object = RepositoryDetails.objects.get(name=repo_name)
+
+    # never take over skillet names that another repository has indexed in the meantime
+    if Skillet.objects.filter(name__in=list(skillets.keys())).exclude(repository_id=repository_object.id).exists():
+        return False
+
+    print(f'Restoring index of {repo_name} for branch {branch}')
+
+    with transaction.atomic():
+        Skillet.objects.filter(repository_id=repository_object.id).delete()
+        Skillet.objects.bulk_create([
+            Skillet(name=name, skillet_json=skillet_json, repository_id=repository_object.id)
+            for (name, skillet_json) in skillets.items()
+        ])
+        record_indexed_head(repo_name, head, json.loads(branch_index.lint_json))
+
+    # mark this snapshot as most recently used
+    branch_index.save()
+
+    return True
+
+
+def invalidate_lint_results(repo_name: str) -> None:
+    """
+    Discards the lint results recorded for this repository, for example after the working tree has been
+    modified outside of panhandler
+
+    :param repo_name: name of the repository
+    :return: None
+    """
+    RepositoryIndex.objects.filter(name=repo_name).update(lint_head='')
+
+
+def is_indexed(repo_name: str, head: str) -> bool:
+    """
+    Determine if the skillet index for this repository was built from the given HEAD commit
+
+    :param repo_name: name of the repository
+    :param head: commit sha
+    :return: bool
+    """
+    if not head:
+        return False
+
+    return RepositoryIndex.objects.filter(name=repo_name, head=head).exists()
+
+
+def remove_repository_index(repo_name: str) -> None:
+    """
+    Removes all index state for a repository that has been removed
+
+    :param repo_name: name of the repository
+    :return: None
+    """
+    RepositoryIndex.objects.filter(name=repo_name).delete()
+    BranchIndex.objects.filter(repo_name=repo_name).delete()
+
+
+def update_skillet_cache(repo_names: list = None) -> None:
+    """
+    Refreshes the skillet caches and rebuilds the catalog index after the skillet index has changed
+
+    :param repo_names: optional list of the repositories that have changed, the entire catalog is rebuilt otherwise
+    :return: None
+    """
+    db_utils.update_skillet_cache()
+    catalog_utils.rebuild_catalog_index(repo_names)
+    skillet_cache_utils.clear_skillet_cache()
+
+
+def find_skillet_files(repo_dir: str) -> list:
+    """
+    Returns the full paths of all skillet metadata files found in this repository. Submodules and nested git
+    checkouts are not searched
+
+    :param repo_dir: directory of the repository
+    :return: sorted list of Path objects
+    """
+    skillet_files = list()
+    excluded_dirs = get_submodule_dirs(repo_dir)
+
+    for (root, dirs, files) in os.walk(repo_dir):
+        relative_root = Path(os.path.relpath(root, repo_dir))
+
+        if relative_root.as_posix() != '.' and '.git' in dirs + files:
+            excluded_dirs.add(relative_root.as_posix())
+
+        # prune directories that are never searched in place so os.walk does not descend into them
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ignored_dir_names
+                   and relative_root.joinpath(d).as_posix() not in excluded_dirs]
+
+        for file_name in files:
+            if is_skillet_file(relative_root.joinpath(file_name).as_posix(), excluded_dirs):
+                skillet_files.append(Path(root).joinpath(file_name))
+
+    return sorted(skillet_files)
+
+
+def parse_skillet_content(content: bytes) -> (dict, None):
+    """
+    Returns the normalized skillet dict for the contents of a skillet file. Parsed results are cached on disk keyed
+    by the content digest and the parse cache version, so identical files are only parsed once regardless of the
+    repository or branch they are found in
+
+    :param content: raw contents of the skillet file
+    :return: normalized skillet dict without any location specific attributes or None on error
+    """
+    digest = cache_utils.get_versioned_digest(cache_utils.get_content_digest(content), parse_cache_version)
+
+    skillet_dict = cache_utils.get_cached_content(parse_cache_namespace, digest)
+
+    if skillet_dict is not None:
+        return skillet_dict
+
+    try:
+        raw_skillet = oyaml.safe_load(content)
+
+    except oyaml.YAMLError as ye:
+        print(f'Could not parse skillet: {ye}')
+        return None
+
+    if type(raw_skillet) is not dict:
+        print('Skillet file does not contain a valid skillet')
+        return None
+
+    skillet_dict = SkilletLoader().normalize_skillet_dict(raw_skillet)
+
+    cache_utils.set_cached_content(parse_cache_namespace, digest, skillet_dict)
+
+    return skillet_dict
+
+
+def load_skillet_file(file_path: Path) -> (dict, None):
+    """
+    Parses a single skillet metadata file. Files with content that has been parsed before are loaded from the
+    parse cache. Snippets included from other skillets are not resolved here, see compile_skillets
+
+    :param file_path: full path to the skillet file
+    :return: normalized skillet dict or None on error
+    """
+    try:
+        content = Path(file_path).read_bytes()
+
+    except OSError as oe:
+        print(f'Could not read skillet from {file_path}: {oe}')
+        return None
+
+    skillet_dict = parse_skillet_content(content)
+
+    if skillet_dict is None:
+        print(f'Could not load skillet from {file_path}')
+        return None
+
+    # location attributes are never cached as the same content may be found in many places
+    skillet_dict['snippet_path'] = str(Path(file_path).parent.absolute())
+    skillet_dict['skillet_path'] = str(Path(file_path).parent.absolute())
+    skillet_dict['skillet_filename'] = Path(file_path).name
+
+    return skillet_dict
+
+
+def has_includes(skillet_dict: dict) -> bool:
+    """
+    Determine if this skillet includes snippets from other skillets
+
+    :param skillet_dict: normalized skillet dict
+    :return: bool
+    """
+    return any('include' in snippet for snippet in skillet_dict.get('snippets', list()))
+
+
+def get_submodule_skillets(repo_dir: str) -> list:
+    """
+    Returns the skillet dicts found in the submodules of this repository. These are never indexed, but may be
+    included by the skillets of this repository
+
+    :param repo_dir: directory of the repository
+    :return: list of normalized skillet dicts
+    """
+    skillet_dicts = list()
+
+    for submodule_dir in sorted(get_submodule_dirs(repo_dir)):
+        for file_path in find_skillet_files(os.path.join(repo_dir, submodule_dir)):
+            skillet_dict = load_skillet_file(file_path)
+
+            if skillet_dict is not None:
+                skillet_dicts.append(skillet_dict)
+
+    return skillet_dicts
+
+
+def compile_skillets(repo_dir: str, skillet_dicts: list, resolved_dicts: list = None) -> list:
+    """
+    Creates the skillets loaded from a repository in the same way as the skillet loader. Skillets that include
+    snippets from other skillets are compiled after all others, and may include any other skillet of this
+    repository or of its submodules
+
+    :param repo_dir: directory of the repository
+    :param skillet_dicts: list of normalized skillet dicts from load_skillet_file
+    :param resolved_dicts: list of other skillet dicts of this repository that may be included, such as
+    skillets that are already indexed
+    :return: list of skillet dicts in the same order as skillet_dicts, with None for any skillet that could not be
+    loaded
+    """
+    skillet_loader = SkilletLoader()
+    skillets = [None] * len(skillet_dicts)
+    included_skillets = list()
+    include_indexes = list()
+
+    for (index, skillet_dict) in enumerate(skillet_dicts):
+        if has_includes(skillet_dict):
+            include_indexes.append(index)
+            continue
+
+        try:
+            skillet = skillet_loader.create_skillet(skillet_dict)
+            skillets[index] = skillet.skillet_dict
+            included_skillets.append(skillet)
+
+        except SkilletLoaderException as sle:
+            print(f'Could not load skillet {skillet_dict.get("name", "")} from {skillet_dict["skillet_path"]}')
+            print(sle)
+
+    if not include_indexes:
+        return skillets
+
+    # included skillets are resolved in this order, so updated skillets take precedence over indexed ones
+    loaded_names = set([skillet.name for skillet in included_skillets])
+    for skillet_dict in (resolved_dicts or list()) + get_submodule_skillets(repo_dir):
+        if skillet_dict.get('name', '') in loaded_names or has_includes(skillet_dict):
+            continue
+
+        try:
+            included_skillets.append(skillet_loader.create_skillet(skillet_dict))
+            loaded_names.add(skillet_dict.get('name', ''))
+
+        except SkilletLoaderException as sle:
+            print(f'Could not load included skillet {skillet_dict.get("name", "")}: {sle}')
+
+    skillet_loader.resolved_skillets = included_skillets
+
+    for index in include_indexes:
+        skillet_dict = skillet_dicts[index]
+
+        try:
+            compiled_dict = skillet_loader.compile_skillet_dict(skillet_dict)
+            skillets[index] = skillet_loader.create_skillet(compiled_dict).skillet_dict
+
+        except SkilletLoaderException as sle:
+            print(f'Could not compile skillet {skillet_dict.get("name", "")} from {skillet_dict["skillet_path"]}')
+            print(sle)
+
+    return skillets
+
+
+def save_skillet(repository_object: RepositoryDetails, skillet_dict: dict) -> None:
+    """
+    Creates or updates the index record for a skillet found in a repository
+
+    :param repository_object: RepositoryDetails where this skillet was found
+    :param skillet_dict: loaded skillet dict
+    :return: None
+    """
+    skillet_name = skillet_dict['name']
+
+    (skillet_record, created) = Skillet.objects.get_or_create(
+        name=skillet_name,
+        defaults={
+            'skillet_json': json.dumps(skillet_dict),
+            'repository_id': repository_object.id,
+        }
+    )
+
+    if created:
+        return
+
+    if skillet_record.repository_id != repository_object.id:
+        raise DuplicateSkilletException(f'Not indexing duplicate skillet: {skillet_name} found in repository: '
+                                        f'{repository_object.name}')
+
+    skillet_record.skillet_json = json.dumps(skillet_dict)
+    skillet_record.save()
+
+
+def get_indexed_skillet_files(repository_object: RepositoryDetails) -> dict:
+    """
+    Returns a dict of all skillet file paths currently indexed for this repository mapped to the skillet names
+    loaded from that file
+
+    :param repository_object: RepositoryDetails
+    :return: dict of full file path to list of skillet names
+    """
+    indexed_files = dict()
+    for skillet_record in Skillet.objects.filter(repository_id=repository_object.id):
+        skillet_dict = json.loads(skillet_record.skillet_json)
+        snippet_path = skillet_dict.get('snippet_path', '')
+        skillet_filename = skillet_dict.get('skillet_filename', '.meta-cnc.yaml')
+        file_path = os.path.join(snippet_path, skillet_filename)
+        indexed_files.setdefault(file_path, list()).append(skillet_record.name)
+
+    return indexed_files
+
+
+def refresh_skillets_from_repo(repo_name: str) -> list:
+    """
+    Re-indexes all skillets found in this repository. Index records for skillets that are no longer found are
+    removed. Only skillet files with content that is not already in the parse cache are parsed
+
+    :param repo_name: name of the repository
+    :return: list of all skillet dicts found in this repository
+    """
+    repo_dir = get_repo_dir(repo_name)
+    repository_object = RepositoryDetails.objects.get(name=repo_name)
+
+    stale_names = set(Skillet.objects.filter(repository_id=repository_object.id).values_list('name', flat=True))
+    skillets = list()
+
+    try:
+        skillet_dicts = [load_skillet_file(file_path) for file_path in find_skillet_files(repo_dir)]
+        skillet_dicts = [skillet_dict for skillet_dict in skillet_dicts if skillet_dict is not None]
+
+        for skillet_dict in compile_skillets(repo_dir, skillet_dicts):
+            if skillet_dict is None:
+                continue
+
+            save_skillet(repository_object, skillet_dict)
+            stale_names.discard(skillet_dict['name'])
+            skillets.append(skillet_dict)
+
+    finally:
+        cache_utils.prune_content_cache(parse_cache_namespace)
+
+    if stale_names:
+        print(f'Removing {len(stale_names)} skillets no longer found in {repo_name}')
+        Skillet.objects.filter(name__in=stale_names, repository_id=repository_object.id).delete()
+
+    return skillets
+
+
+def initialize_repo(repo_detail: dict) -> list:
+    """
+    Creates the index for a repository the first time it is seen. Repositories that are already indexed are
+    loaded from the database
+
+    :param repo_detail: repository details from git_utils.get_repo_details
+    :return: list of all skillet dicts found in this repository
+    """
+    repo_name = repo_detail.get('name', '')
+
+    (repository_object, created) = RepositoryDetails.objects.get_or_create(
+        name=repo_name,
+        defaults={
+            'url': repo_detail.get('url', ''),
+            'details_json': json.dumps(repo_detail),
+        }
+    )
+
+    if created:
+        return refresh_skillets_from_repo(repo_name)
+
+    return db_utils.load_skillets_from_repo(repo_name)
+
+
+def get_changed_files(repo_dir: str, old_sha: str, new_sha: str) -> (tuple, None):
+    """
+    Compares the trees of two commits and returns the relative paths of all changed files
+
+    :param repo_dir: directory of the repository
+    :param old_sha: sha of the previously indexed commit
+    :param new_sha: sha of the current commit
+    :return: tuple of (changed, removed) sets of relative paths or None if the commits cannot be compared
+    """
+    changed = set()
+    removed = set()
+
+    try:
+        repo = Repo(repo_dir)
+        diffs = repo.commit(old_sha).diff(repo.commit(new_sha))
+
+    except (ValueError, GitCommandError, BadName) as e:
+        print(f'Could not compare {old_sha} to {new_sha}: {e}')
+        return None
+
+    for d in diffs:
+        if d.deleted_file:
+            removed.add(d.a_path)
+
+        elif d.renamed_file:
+            removed.add(d.a_path)
+            changed.add(d.b_path)
+
+        else:
+            changed.add(d.b_path)
+
+    return changed, removed
+
+
+def refresh_skillets_from_diff(repo_name: str, old_sha: str, new_sha: str = None) -> list:
+    """
+    Re-indexes only the skillets that have changed between two commits. If there is no previously indexed commit
+    or the commits cannot be compared, this falls back to a full refresh of the repository.
+
+    :param repo_name: name of the repository
+    :param old_sha: sha of the commit that was last indexed, as returned from get_indexed_head
+    :param new_sha: sha of the current commit, defaults to HEAD
+    :return: list of all skillet dicts found in this repository
+    """
+    repo_dir = get_repo_dir(repo_name)
+
+    if new_sha is None:
+        new_sha = get_head_sha(repo_dir)
+
+    if not old_sha or not new_sha:
+        return refresh_skillets_from_repo(repo_name)
+
+    changed_files = get_changed_files(repo_dir, old_sha, new_sha)
+
+    if changed_files is None:
+        return refresh_skillets_from_repo(repo_name)
+
+    (changed, removed) = changed_files
+
+    return refresh_skillet_paths(repo_name, changed, removed)
+
+
+def get_including_files(repository_object: RepositoryDetails, skillet_names: set) -> set:
+    """
+    Returns the files of all indexed skillets that include snippets from any of the given skillets. Compiled
+    skillets name included snippets after the skillet they were included from
+
+    :param repository_object: RepositoryDetails
+    :param skillet_names: set of included skillet names
+    :return: set of full file paths
+    """
+    if not skillet_names:
+        return set()
+
+    prefixes = tuple([f'{skillet_name}.' for skillet_name in skillet_names])
+
+    including_files = set()
+    for skillet_record in Skillet.objects.filter(repository_id=repository_object.id):
+        skillet_dict = json.loads(skillet_record.skillet_json)
+
+        for snippet in skillet_dict.get('snippets', list()):
+            if str(snippet.get('name', '')).startswith(prefixes):
+                snippet_path = skillet_dict.get('snippet_path', '')
+                skillet_filename = skillet_dict.get('skillet_filename', '.meta-cnc.yaml')
+                including_files.add(os.path.join(snippet_path, skillet_filename))
+                break
+
+    return including_files
+
+
+def _remove_file_skillets(repository_object: RepositoryDetails, skillet_names: list) -> None:
+    """
+    Removes the index records of the skillets previously loaded from a file that can no longer be loaded, the same
+    way a full refresh drops skillets that are no longer found
+
+    :param repository_object: RepositoryDetails
+    :param skillet_names: names of the skillets indexed from this file
+    :return: None
+    """
+    for skillet_name in skillet_names:
+        print(f'Removing skillet {skillet_name} that can no longer be loaded from the index')
+        Skillet.objects.filter(name=skillet_name, repository_id=repository_object.id).delete()
+
+
+def refresh_skillet_paths(repo_name: str, changed: set, removed: set) -> list:
+    """
+    Re-indexes the skillets affected by a set of changed and removed files. Changed skillet files are re-parsed, the
+    index records for removed skillet files are deleted. Skillets whose directory contains any other changed file
+    are re-parsed as well, as they may reference that file, and so are skillets that include any of the affected
+    skillets.
+
+    :param repo_name: name of the repository
+    :param changed: set of added or modified file paths relative to the repository root
+    :param removed: set of removed file paths relative to the repository root
+    :return: list of all skillet dicts found in this repository
+    """
+    repo_dir = get_repo_dir(repo_name)
+
+    repository_object = RepositoryDetails.objects.get(name=repo_name)
+    indexed_files = get_indexed_skillet_files(repository_object)
+    excluded_dirs = get_excluded_dirs(repo_dir, changed | removed)
+
+    to_parse = set()
+    to_remove = set()
+
+    for relative_path in removed:
+        to_remove.add(os.path.join(repo_dir, relative_path))
+
+    # removed supporting files affect the skillets that reference them as well
+    removed_supporting_files = set([p for p in removed if not is_skillet_file(p, excluded_dirs)])
+
+    for relative_path in changed | removed_supporting_files:
+        full_path = os.path.join(repo_dir, relative_path)
+
+        if is_skillet_file(relative_path, excluded_dirs):
+            to_parse.add(full_path)
+            continue
+
+        # supporting files such as templates are loaded relative to the skillet, re-parse any skillet in
+        # a parent directory of this file
+        changed_parents = Path(full_path).parents
+        for indexed_file in indexed_files:
+            if Path(indexed_file).parent in changed_parents:
+                to_parse.add(indexed_file)
+
+    # skillets that include snippets from an affected skillet must be compiled again
+    affected_names = set()
+    for file_path in to_parse | to_remove:
+        affected_names.update(indexed_files.get(file_path, list()))
+
+    to_parse.update(get_including_files(repository_object, affected_names) - to_remove)
+
+    print(f'Incremental index of {repo_name}: {len(to_parse)} to parse, {len(to_remove)} to remove')
+
+    for file_path in to_remove:
+        for skillet_name in indexed_files.get(file_path, list()):
+            print(f'Removing skillet {skillet_name} from the index')
+            Skillet.objects.filter(name=skillet_name, repository_id=repository_object.id).delete()
+
+    parsed_files = list()
+    skillet_dicts = list()
+
+    for file_path in sorted(to_parse):
+        if not os.path.exists(file_path):
+            continue
+
+        skillet_dict = load_skillet_file(Path(file_path))
+
+        if skillet_dict is None:
+            _remove_file_skillets(repository_object, indexed_files.get(file_path, list()))
+            continue
+
+        parsed_files.append(file_path)
+        skillet_dicts.append(skillet_dict)
+
+    # every skillet that is still indexed and not parsed again may be included by the parsed skillets
+    resolved_dicts = list()
+    if any(has_includes(skillet_dict) for skillet_dict in skillet_dicts):
+        parsed_names = set()
+        for file_path in parsed_files:
+            parsed_names.update(indexed_files.get(file_path, list()))
+
+        for skillet_record in Skillet.objects.filter(repository_id=repository_object.id):
+            if skillet_record.name not in parsed_names:
+                resolved_dicts.append(json.loads(skillet_record.skillet_json))
+
+    for (file_path, skillet_dict) in zip(parsed_files, compile_skillets(repo_dir, skillet_dicts, resolved_dicts)):
+        if skillet_dict is None:
+            _remove_file_skillets(repository_object, indexed_files.get(file_path, list()))
+            continue
+
+        # the skillet in this file may have been renamed
+        for skillet_name in indexed_files.get(file_path, list()):
+            if skillet_name != skillet_dict['name']:
+                print(f'Removing renamed skillet {skillet_name} from the index')
+                Skillet.objects.filter(name=skillet_name, repository_id=repository_object.id).delete()
+
+        save_skillet(repository_object, skillet_dict)
+
+    if to_parse:
+        cache_utils.prune_content_cache(parse_cache_namespace)
+
+    return db_utils.load_skillets_from_repo(repo_name)
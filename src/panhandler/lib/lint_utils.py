@@ -0,0 +1,174 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import oyaml
+from skilletlib import SkilletLoader
+
+from panhandler.lib import cache_utils
+from panhandler.lib import index_utils
+
+try:
+    # celery prefork workers are daemon processes, which may start billiard pools but not multiprocessing ones
+    from billiard.pool import Pool as BilliardPool
+
+except ImportError:
+    BilliardPool = None
+
+# content cache namespace for lint results
+lint_cache_namespace = 'lint'
+
+# lint results depend on the skilletlib version that checked them
+lint_cache_version = cache_utils.get_package_version('skilletlib')
+
+# do not start a process pool for only a handful of files
+min_files_for_pool = 4
+
+
+def lint_skillet_content(content: bytes) -> dict:
+    """
+    Checks the structure of a single skillet file. This is run in a worker process and must only depend on the
+    content passed in. Skillets that cannot be loaded are errors, structural issues reported by skilletlib are
+    warnings
+
+    :param content: raw contents of the skillet file
+    :return: dict containing severity and err_list keys, err_list is empty if no issues were found
+    """
+    try:
+        skillet_dict = oyaml.safe_load(content)
+
+    except oyaml.YAMLError as ye:
+        return {'severity': 'error', 'err_list': [f'Could not parse skillet YAML: {ye}']}
+
+    if type(skillet_dict) is not dict:
+        return {'severity': 'error', 'err_list': ['Skillet file does not contain a valid skillet']}
+
+    try:
+        return {'severity': 'warn', 'err_list': list(SkilletLoader().debug_skillet_structure(skillet_dict))}
+
+    except Exception as e:
+        # the skillet structure is unknown, report the failure as a lint error rather than aborting the run
+        return {'severity': 'error', 'err_list': [f'Could not check skillet structure: {e}']}
+
+
+def _lint_contents(contents: list) -> list:
+    """
+    Lints a list of file contents, using a process pool where possible
+
+    :param contents: list of raw file contents
+    :return: list of lint results in the same order
+    """
+    workers = min(os.cpu_count() or 1, len(contents))
+
+    if len(contents) < min_files_for_pool or workers < 2:
+        return [lint_skillet_content(c) for c in contents]
+
+    try:
+        if not multiprocessing.current_process().daemon:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(lint_skillet_content, contents, chunksize=8))
+
+        if BilliardPool is not None:
+            # running in a celery worker
+            pool = BilliardPool(processes=workers)
+
+            try:
+                return pool.map(lint_skillet_content, contents, chunksize=8)
+
+            finally:
+                pool.close()
+                pool.join()
+
+    except (BrokenProcessPool, OSError, AssertionError) as e:
+        print(f'Could not lint skillets in parallel: {e}')
+
+    return [lint_skillet_content(c) for c in contents]
+
+
+def _get_cache_key(digest: str) -> str:
+    return cache_utils.get_versioned_digest(digest, lint_cache_version)
+
+
+def lint_repository(repo_dir: str) -> list:
+    """
+    Checks every skillet file in a repository for errors. Results are cached per file keyed by the content digest,
+    so only files that have changed since they were last checked are linted again
+
+    :param repo_dir: directory of the repository
+    :return: list of dicts containing err_list, path, and severity keys for each file with errors
+    """
+    file_digests = list()
+    uncached = dict()
+    lint_results = dict()
+
+    for file_path in index_utils.find_skillet_files(repo_dir):
+        try:
+            content = Path(file_path).read_bytes()
+
+        except OSError as oe:
+            print(f'Could not read skillet from {file_path}: {oe}')
+            continue
+
+        digest = cache_utils.get_content_digest(content)
+        file_digests.append((file_path, digest))
+
+        if digest in lint_results or digest in uncached:
+            continue
+
+        lint_result = cache_utils.get_cached_content(lint_cache_namespace, _get_cache_key(digest))
+
+        if lint_result is None:
+            uncached[digest] = content
+
+        else:
+            lint_results[digest] = lint_result
+
+    if uncached:
+        print(f'Checking {len(uncached)} of {len(file_digests)} skillet files for errors')
+
+        digests = list(uncached.keys())
+        for (digest, lint_result) in zip(digests, _lint_contents([uncached[d] for d in digests])):
+            cache_utils.set_cached_content(lint_cache_namespace, _get_cache_key(digest), lint_result)
+            lint_results[digest] = lint_result
+
+        cache_utils.prune_content_cache(lint_cache_namespace)
+
+    debug_errors = list()
+
+    for (file_path, digest) in file_digests:
+        lint_result = lint_results.get(digest, None)
+
+        if lint_result and lint_result['err_list']:
+            debug_errors.append({'path': str(file_path), 'severity': lint_result['severity'],
+                                 'err_list': lint_result['err_list']})
+
+    return debug_errors
@@ -0,0 +1,246 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from git import GitCommandError
+from git import InvalidGitRepositoryError
+from git import Repo
+
+from panhandler.lib import dependency_utils
+from panhandler.lib import repo_utils
+
+app_name = 'panhandler'
+
+# serializes creation and updates of the shared object stores
+_object_store_guard = threading.Lock()
+
+
+def get_object_stores_dir() -> Path:
+    """
+    Returns the directory where the shared object stores are kept. This is outside of the repositories directory so
+    stores are never listed as repositories
+
+    :return: Path
+    """
+    return Path(os.path.join(os.path.expanduser('~/.pan_cnc'), app_name, 'object_stores'))
+
+
+def get_object_store_dir(url: str) -> Path:
+    """
+    Returns the directory of the shared object store for all clones of the given url
+
+    :param url: git url
+    :return: Path of a bare repository
+    """
+    digest = hashlib.sha1(dependency_utils.normalize_url(url).encode()).hexdigest()
+    return get_object_stores_dir().joinpath(f'{digest}.git')
+
+
+def get_origin_url(repo_path: Path) -> (str, None):
+    """
+    Returns the url of the origin remote of a repository
+
+    :param repo_path: Path of the repository
+    :return: url or None if this repository has no origin
+    """
+    try:
+        return Repo(str(repo_path)).remotes.origin.url
+
+    except (InvalidGitRepositoryError, AttributeError, ValueError, GitCommandError):
+        return None
+
+
+def find_existing_clones(url: str) -> list:
+    """
+    Returns all imported repositories that were cloned from the given url
+
+    :param url: git url
+    :return: list of Path objects
+    """
+    repositories_dir = Path(os.path.join(os.path.expanduser('~/.pan_cnc'), app_name, 'repositories'))
+    normalized_url = dependency_utils.normalize_url(url)
+
+    if not repositories_dir.exists():
+        return list()
+
+    clones = list()
+
+    for d in repositories_dir.iterdir():
+        if not d.joinpath('.git').is_dir():
+            continue
+
+        if dependency_utils.normalize_url(get_origin_url(d)) == normalized_url:
+            clones.append(d)
+
+    return clones
+
+
+def is_borrowing_from(clone: Path, store: Path) -> bool:
+    """
+    Determine if a repository already borrows objects from this store
+
+    :param clone: Path of the repository
+    :param store: Path of the shared object store
+    :return: bool
+    """
+    alternates = clone.joinpath('.git', 'objects', 'info', 'alternates')
+    store_objects = str(store.joinpath('objects').resolve())
+
+    try:
+        return store_objects in [str(Path(line.strip()).resolve()) for line in alternates.read_text().splitlines()]
+
+    except OSError:
+        return False
+
+
+def borrow_from_store(clone: Path, store: Path) -> None:
+    """
+    Points an existing clone at the shared object store and removes its own copies of the objects found there.
+    Shallow and partial clones are left alone, as their object databases are incomplete by design
+
+    :param clone: Path of the repository, the store must already contain all of its refs
+    :param store: Path of the shared object store
+    :return: None
+    """
+    if is_borrowing_from(clone, store) or clone.joinpath('.git', 'shallow').exists():
+        return
+
+    repo_lock = repo_utils.get_repo_lock(clone.name)
+
+    if not repo_lock.acquire(blocking=False):
+        # git is running in this clone, it will be linked the next time this url is imported
+        return
+
+    try:
+        repo = Repo(str(clone))
+
+        if repo.config_reader().has_option('remote "origin"', 'promisor'):
+            return
+
+        print(f'Moving objects of {clone.name} to the shared object store')
+
+        alternates = clone.joinpath('.git', 'objects', 'info', 'alternates')
+        alternates.parent.mkdir(parents=True, exist_ok=True)
+
+        with alternates.open('a') as af:
+            af.write(f'{store.joinpath("objects").resolve()}\n')
+
+        # only keep the objects that are not found in the store, packed or loose
+        repo.git.repack('-a', '-d', '-l', '-q')
+        repo.git.prune_packed()
+
+    except (GitCommandError, OSError, InvalidGitRepositoryError) as e:
+        print(f'Could not move objects of {clone.name} to the shared object store: {e}')
+
+    finally:
+        repo_lock.release()
+
+
+def get_reference_store(url: str) -> (Path, None):
+    """
+    Returns a shared object store to borrow objects from when cloning the given url. The store is created the
+    first time the same url is imported a second time, and is filled from the local clones so no objects need to
+    be downloaded again. The local clones then borrow from the store as well, so every object is only kept on disk
+    once. Stores are never garbage collected, so objects borrowed by clones are never removed.
+
+    :param url: git url about to be cloned
+    :return: Path of the store or None if there is nothing to borrow from
+    """
+    clones = find_existing_clones(url)
+    store = get_object_store_dir(url)
+
+    if not clones and not store.is_dir():
+        return None
+
+    with _object_store_guard:
+        try:
+            if store.is_dir():
+                store_repo = Repo(str(store))
+
+            else:
+                print(f'Creating shared object store for {url}')
+                store_repo = Repo.init(str(store), bare=True, mkdir=True)
+                store_repo.git.config('gc.auto', '0')
+
+            for clone in clones:
+                # keep all refs of each clone, including tags and stashes, in their own namespace so objects they
+                # need stay reachable
+                namespace = hashlib.sha1(clone.name.encode()).hexdigest()[:12]
+                store_repo.git.fetch(str(clone), f'+refs/*:refs/shared/{namespace}/*')
+
+            if clones:
+                # small fetches leave loose objects behind, clones can only drop their copies of packed objects.
+                # Objects that are no longer reachable are kept loose rather than removed, a clone may still need them
+                store_repo.git.repack('-A', '-d', '-q')
+
+        except (GitCommandError, OSError, InvalidGitRepositoryError) as e:
+            print(f'Could not update shared object store for {url}: {e}')
+            return None
+
+        for clone in clones:
+            borrow_from_store(clone, store)
+
+    return store
+
+
+def is_store_in_use(store: Path) -> bool:
+    """
+    Determine if any imported repository borrows objects from this store
+
+    :param store: Path of the shared object store
+    :return: bool
+    """
+    repositories_dir = Path(os.path.join(os.path.expanduser('~/.pan_cnc'), app_name, 'repositories'))
+
+    for alternates in repositories_dir.glob('*/.git/objects/info/alternates'):
+        if is_borrowing_from(alternates.parents[3], store):
+            return True
+
+    return False
+
+
+def remove_unused_object_stores() -> None:
+    """
+    Removes shared object stores that are no longer used by any imported repository
+
+    :return: None
+    """
+    stores_dir = get_object_stores_dir()
+
+    if not stores_dir.exists():
+        return
+
+    with _object_store_guard:
+        for store in stores_dir.glob('*.git'):
+            if not is_store_in_use(store):
+                print(f'Removing unused shared object store {store}')
+                shutil.rmtree(str(store), ignore_errors=True)
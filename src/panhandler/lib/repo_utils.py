@@ -0,0 +1,1612 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from concurrent.futures import wait
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.contrib import messages
+from django.db import connection
+from django.db import transaction
+from git import GitCommandError
+from git import Repo
+from gitdb.exc import BadName
+
+from cnc.models import RepositoryDetails
+from pan_cnc.lib import cnc_utils
+from pan_cnc.lib import db_utils
+from pan_cnc.lib import git_utils
+from pan_cnc.lib import task_utils
+from pan_cnc.lib.exceptions import DuplicateSkilletException
+from pan_cnc.lib.exceptions import ImportRepositoryException
+from pan_cnc.lib.exceptions import RepositoryPermissionsException
+from panhandler.lib import catalog_utils
+from panhandler.lib import dependency_utils
+from panhandler.lib import index_utils
+from panhandler.lib import lint_utils
+from panhandler.lib import object_store_utils
+
+app_name = 'panhandler'
+
+# default number of concurrent git fetches when updating all repositories
+default_update_workers = 4
+
+# seconds to wait for repository details when listing repositories, stragglers are loaded in the background
+default_listing_timeout = 5
+
+# repository details being collected in the background for the repository list, keyed by repository name
+_listing_executor = None
+_listing_futures = dict()
+_listing_guard = threading.Lock()
+
+# repositories indexed for the first time while listing, the catalog is updated once for all of them
+_initialized_repo_names = set()
+
+# maximum number of passes when importing the dependencies of newly imported dependencies
+max_dependency_rounds = 10
+
+# name of the manifest of temp files created in a repository, kept in the .git directory
+temp_file_manifest_name = 'cnc_tmp_manifest'
+_temp_file_manifest_guard = threading.Lock()
+
+# serializes updates to the known_hosts file when cloning concurrently
+_known_hosts_guard = threading.Lock()
+
+# directory of the lock files that serialize work on each repository across the web server and the worker
+repo_locks_dir_name = 'locks'
+
+
+def get_repositories_dir() -> Path:
+    """
+    Returns the directory where all imported repositories are cloned
+    :return: Path object of the repositories directory
+    """
+    return Path(os.path.join(os.path.expanduser('~/.pan_cnc'), app_name, 'repositories'))
+
+
+class RepositoryLock:
+    """
+    Ensures git and the indexer never run in the same repository at the same time, whether from different threads
+    or from different processes such as the web server and the worker. This is an flock on a lock file per
+    repository. Each instance holds the lock at most once, so use a new instance for every acquire
+    """
+
+    def __init__(self, repo_name: str):
+        self.lock_file = get_repositories_dir().parent.joinpath(repo_locks_dir_name, f'{repo_name}.lock')
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Acquires the lock for this repository
+
+        :param blocking: wait for the lock if it is held elsewhere, otherwise return False immediately
+        :return: True if the lock has been acquired
+        """
+        self.lock_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        is_new = not self.lock_file.exists()
+        fd = os.open(str(self.lock_file), os.O_RDWR | os.O_CREAT, 0o600)
+
+        if is_new:
+            # creating the lock file is not a release, see get_released_time
+            os.utime(fd, (0, 0))
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        """
+        Releases the lock for this repository
+
+        :return: None
+        """
+        if self._fd is None:
+            return
+
+        # the modification time records when the work in this repository was complete
+        os.utime(self._fd)
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def get_released_time(self) -> float:
+        """
+        Returns the time the lock for this repository was last released. File system events in this repository
+        from before this time were caused by panhandler itself, or have been seen by whoever held the lock
+
+        :return: timestamp or 0.0 if the lock has never been used
+        """
+        try:
+            return self.lock_file.stat().st_mtime
+
+        except OSError:
+            return 0.0
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+def get_repo_lock(repo_name: str) -> RepositoryLock:
+    """
+    Returns a new lock used to serialize git operations and indexing on a single repository
+
+    :param repo_name: name of the repository
+    :return: RepositoryLock
+    """
+    return RepositoryLock(repo_name)
+
+
+def get_update_worker_count() -> int:
+    """
+    Returns the size of the worker pool used to fetch repositories concurrently. This can be configured
+    using the 'update_workers' key in the application_data section of the .pan-cnc.yaml file
+
+    :return: number of workers
+    """
+    app_config = cnc_utils.get_app_config(app_name)
+    application_data = app_config.get('application_data', dict())
+
+    if type(application_data) is not dict:
+        return default_update_workers
+
+    try:
+        workers = int(application_data.get('update_workers', default_update_workers))
+    except (TypeError, ValueError):
+        print('malformed update_workers in .pan-cnc.yaml')
+        return default_update_workers
+
+    return max(workers, 1)
+
+
+def get_imported_repo_paths() -> list:
+    """
+    Returns a list of all directories in the repositories directory that contain a git repository
+
+    :return: list of Path objects
+    """
+    repo_paths = list()
+    for d in get_repositories_dir().iterdir():
+        git_dir = d.joinpath('.git')
+        if git_dir.exists() and git_dir.is_dir():
+            repo_paths.append(d)
+
+    return repo_paths
+
+
+def get_temp_file_manifest(repo_path: Path) -> Path:
+    """
+    Returns the path of the manifest of temp files created in this repository. This is kept in the .git directory
+    so it is never committed
+
+    :param repo_path: Path of the repository
+    :return: Path of the manifest file
+    """
+    return repo_path.joinpath('.git', temp_file_manifest_name)
+
+
+def enable_temp_file_registration() -> None:
+    """
+    Declares that every temp file created from now on will be registered, for example by the repository watcher.
+    Each repository is searched for the temp files that already exist every time registration is enabled, and any
+    that are missing are added to its manifest. A manifest left behind by an earlier process may not list the temp
+    files created while nothing was registering them. From then on the existence of the manifest tells any process
+    that it lists every temp file in the repository
+
+    :return: None
+    """
+    for repo_path in get_imported_repo_paths():
+        manifest = get_temp_file_manifest(repo_path)
+
+        temp_files = _find_untracked_temp_files(repo_path)
+
+        with _temp_file_manifest_guard:
+            try:
+                registered = set(manifest.read_text().splitlines()) if manifest.exists() else set()
+
+                with manifest.open('a') as mf:
+                    mf.writelines([f'{relative_path}\n' for relative_path in temp_files
+                                   if relative_path not in registered])
+
+            except OSError as oe:
+                print(f'Could not update temp file manifest {manifest}: {oe}')
+
+
+def disable_temp_file_registration() -> None:
+    """
+    Declares that temp files are no longer registered as they are created. The manifests are removed, so updates
+    search each repository for temp files instead
+
+    :return: None
+    """
+    with _temp_file_manifest_guard:
+        for repo_path in get_imported_repo_paths():
+            manifest = get_temp_file_manifest(repo_path)
+
+            try:
+                if manifest.exists():
+                    manifest.unlink()
+
+            except OSError as oe:
+                print(f'Could not remove temp file manifest {manifest}: {oe}')
+
+
+def register_temp_file(repo_name: str, relative_path: str) -> None:
+    """
+    Records a temp file created in a repository so it can be removed on the next update without searching for it
+
+    :param repo_name: name of the repository
+    :param relative_path: path of the temp file relative to the repository root
+    :return: None
+    """
+    manifest = get_temp_file_manifest(get_repositories_dir().joinpath(repo_name))
+
+    if not manifest.parent.is_dir():
+        return
+
+    with _temp_file_manifest_guard:
+        try:
+            with manifest.open('a') as mf:
+                mf.write(f'{relative_path}\n')
+
+        except OSError as oe:
+            print(f'Could not register temp file {relative_path}: {oe}')
+
+
+def _find_untracked_temp_files(repo_path: Path) -> list:
+    """
+    Asks git for any untracked temp files. Unlike a recursive glob this never descends into the .git directory
+
+    :param repo_path: Path of the repository
+    :return: list of paths relative to the repository root
+    """
+    try:
+        output = Repo(str(repo_path)).git.ls_files('--others', '-z', '--', ':(glob)**/.cnc_tmp_*')
+
+    except (GitCommandError, ValueError) as e:
+        print(f'Could not list temp files in {repo_path}: {e}')
+        return list()
+
+    return [p for p in output.split('\0') if p]
+
+
+def remove_temp_files(repo_path: Path) -> None:
+    """
+    Remove temp files as part of fix for #187. If the repository has a manifest, only the temp files recorded in it
+    are removed. Without a manifest, for example when the repository watcher is not running, git is asked for any
+    untracked temp files instead
+
+    :param repo_path: Path of the repository
+    :return: None
+    """
+    manifest = get_temp_file_manifest(repo_path)
+    consumed = manifest.with_name(f'{temp_file_manifest_name}.consumed')
+    temp_files = list()
+
+    with _temp_file_manifest_guard:
+        try:
+            # the watcher may be appending from another process, move the manifest aside and start a new one so no
+            # registration is lost
+            os.replace(str(manifest), str(consumed))
+            manifest.open('a').close()
+
+            temp_files.extend(consumed.read_text().splitlines())
+            consumed.unlink()
+
+        except FileNotFoundError:
+            temp_files.extend(_find_untracked_temp_files(repo_path))
+
+        except OSError as oe:
+            print(f'Could not read temp file manifest {manifest}: {oe}')
+
+    for relative_path in set(temp_files):
+        tf = repo_path.joinpath(relative_path)
+
+        # only ever remove temp files that are inside this repository
+        if not tf.name.startswith('.cnc_tmp_') or repo_path.resolve() not in tf.resolve().parents:
+            continue
+
+        if tf.is_file():
+            print(f'Removing temp file: {tf}')
+            tf.unlink()
+
+
+def get_clone_options(clone_mode: str = 'full', clone_depth: int = 1, sparse_checkout: str = 'no') -> dict:
+    """
+    Builds a normalized dict of clone options from the values submitted on the import form
+
+    :param clone_mode: one of 'full', 'shallow', or 'partial'
+    :param clone_depth: number of commits to fetch for shallow clones
+    :param sparse_checkout: 'yes' to only check out directories that contain skillets
+    :return: dict of clone options
+    """
+    clone_options = dict()
+    clone_options['mode'] = clone_mode if clone_mode in ('full', 'shallow', 'partial') else 'full'
+
+    try:
+        clone_options['depth'] = max(int(clone_depth), 1)
+    except (TypeError, ValueError):
+        clone_options['depth'] = 1
+
+    clone_options['sparse'] = str(sparse_checkout).lower() in ('yes', 'true')
+
+    return clone_options
+
+
+def is_full_clone(clone_options: dict) -> bool:
+    """
+    Determine if these clone options describe a regular clone of the full history and working tree
+
+    :param clone_options: dict of clone options or None
+    :return: bool
+    """
+    if not clone_options:
+        return True
+
+    return clone_options.get('mode', 'full') == 'full' and not clone_options.get('sparse', False)
+
+
+def load_clone_options(repo_name: str) -> dict:
+    """
+    Returns the clone options that were used when this repository was imported
+
+    :param repo_name: name of the repository
+    :return: dict of clone options, empty for regular clones
+    """
+    repository_index = index_utils.get_repository_index(repo_name)
+    return json.loads(repository_index.clone_options_json)
+
+
+def save_clone_options(repo_name: str, clone_options: dict) -> None:
+    """
+    Saves the clone options so subsequent updates of this repository can respect them
+
+    :param repo_name: name of the repository
+    :param clone_options: dict of clone options
+    :return: None
+    """
+    repository_index = index_utils.get_repository_index(repo_name)
+    repository_index.clone_options_json = json.dumps(clone_options if not is_full_clone(clone_options) else dict())
+    repository_index.save()
+
+
+def get_skillet_directories(repo: Repo) -> (list, None):
+    """
+    Returns the list of directories in the HEAD tree that contain a skillet. This only reads tree objects, so it
+    is safe to call on partial clones where file contents have not been fetched yet
+
+    :param repo: git Repo object
+    :return: sorted list of relative directory paths, or None if a skillet is found in the repository root
+    """
+    skillet_dirs = set()
+    for relative_path in repo.git.ls_tree('-r', '--name-only', 'HEAD').splitlines():
+        if index_utils.is_skillet_file(relative_path):
+            skillet_dir = os.path.dirname(relative_path)
+
+            if skillet_dir == '':
+                return None
+
+            skillet_dirs.add(skillet_dir)
+
+    return sorted(skillet_dirs)
+
+
+def update_sparse_checkout(repo_dir: str) -> None:
+    """
+    Limits the working tree to the directories that contain skillets. Directories are re-evaluated on every call so
+    skillets added upstream are checked out as well
+
+    :param repo_dir: directory of the repository
+    :return: None
+    """
+    repo = Repo(repo_dir)
+    skillet_dirs = get_skillet_directories(repo)
+
+    if skillet_dirs is None:
+        # a skillet in the root of the repository requires the full working tree
+        repo.git.sparse_checkout('disable')
+        return
+
+    repo.git.sparse_checkout('set', *skillet_dirs)
+
+
+def clone_repository(repo_dir: str, repo_name: str, url: str, clone_options: dict = None) -> str:
+    """
+    Clones a repository respecting the shallow, partial, and sparse checkout clone options. Clones of the full
+    history borrow objects from a shared object store when the same url has already been imported, otherwise regular
+    clones are handled by git_utils
+
+    :param repo_dir: directory to clone into
+    :param repo_name: name of the repository
+    :param url: git url to clone from
+    :param clone_options: dict of clone options as returned from get_clone_options
+    :return: status message
+    """
+    if not clone_options:
+        clone_options = get_clone_options()
+
+    clone_kwargs = dict()
+
+    if clone_options['mode'] == 'full':
+        reference_store = object_store_utils.get_reference_store(url)
+
+        if reference_store is not None:
+            # only objects missing from the store are downloaded, and they are never stored twice on disk
+            clone_kwargs['reference'] = str(reference_store)
+
+        elif not clone_options['sparse']:
+            return git_utils.clone_repository(repo_dir, repo_name, url)
+
+    elif clone_options['mode'] == 'shallow':
+        clone_kwargs['depth'] = clone_options['depth']
+        # keep the tips of all branches available to allow switching branches later
+        clone_kwargs['no_single_branch'] = True
+
+    elif clone_options['mode'] == 'partial':
+        clone_kwargs['filter'] = 'blob:none'
+
+    if clone_options['sparse']:
+        clone_kwargs['sparse'] = True
+
+    try:
+        Repo.clone_from(url, repo_dir, **clone_kwargs)
+
+    except GitCommandError as gce:
+        print(gce)
+        if 'Permission denied' in str(gce) or 'publickey' in str(gce):
+            raise RepositoryPermissionsException('Permission Denied')
+
+        raise ImportRepositoryException(gce.stderr.strip() if gce.stderr else str(gce))
+
+    if clone_options['sparse']:
+        update_sparse_checkout(repo_dir)
+
+    return f'Cloned {url} into {repo_dir} using {clone_options}'
+
+
+def _update_with_clone_options(repo_dir: str, branch: str, clone_options: dict) -> str:
+    """
+    Fetches and fast forwards a repository that was cloned using shallow, partial or sparse clone options. Shallow
+    repositories are fetched to the same depth they were cloned with
+
+    :param repo_dir: directory of the repository
+    :param branch: optional branch to checkout
+    :param clone_options: dict of clone options
+    :return: status message in the same format as git_utils.update_repo
+    """
+    fetch_kwargs = dict()
+    if clone_options.get('mode') == 'shallow':
+        fetch_kwargs['depth'] = clone_options.get('depth', 1)
+
+    try:
+        repo = Repo(repo_dir)
+
+        if repo.is_dirty():
+            return 'Error: Local changes found, refusing to update repository'
+
+        current_branch = repo.active_branch.name
+        if branch is None:
+            branch = current_branch
+
+        remote_ref = f'origin/{branch}'
+
+        try:
+            previous_remote_head = repo.commit(remote_ref).hexsha
+        except (BadName, ValueError):
+            previous_remote_head = None
+
+        repo.git.fetch('origin', f'+refs/heads/{branch}:refs/remotes/{remote_ref}', **fetch_kwargs)
+        remote_head = repo.commit(remote_ref).hexsha
+
+        if branch != current_branch:
+            if branch in repo.heads:
+                repo.git.checkout(branch)
+            else:
+                repo.git.checkout('-b', branch, '--track', remote_ref)
+
+            msg = f'Checked out new Branch: {branch}'
+
+        else:
+            msg = 'Already up to date'
+
+        local_head = repo.head.commit.hexsha
+
+        if local_head != remote_head:
+            try:
+                repo.git.merge('--ff-only', remote_ref)
+
+            except GitCommandError:
+                # shallow history may not include the merge base. This is only safe to resolve when there are no
+                # local commits, that is HEAD is still where the remote branch was before this fetch
+                if local_head != previous_remote_head:
+                    return 'Error: Could not fast forward, local commits found on this branch'
+
+                repo.git.reset('--hard', remote_ref)
+
+            if msg == 'Already up to date':
+                msg = 'Repository updated to the latest commit'
+
+        if clone_options.get('sparse', False):
+            update_sparse_checkout(repo_dir)
+
+        return msg
+
+    except (GitCommandError, BadName, ValueError, TypeError) as e:
+        print(e)
+        return f'Error updating repository: {e}'
+
+
+def pull_repository(repo_dir: str, branch: str = None) -> str:
+    """
+    Pulls the latest changes for a repository, respecting the clone options used when it was imported
+
+    :param repo_dir: directory of the repository
+    :param branch: optional branch to checkout
+    :return: status message
+    """
+    clone_options = load_clone_options(Path(repo_dir).name)
+
+    if is_full_clone(clone_options):
+        return git_utils.update_repo(repo_dir, branch)
+
+    return _update_with_clone_options(repo_dir, branch, clone_options)
+
+
+def is_updated_message(msg: str) -> bool:
+    """
+    Determine if the message returned from git_utils.update_repo indicates new commits or a branch switch
+
+    :param msg: message returned from git_utils.update_repo
+    :return: bool
+    """
+    # msg updated will catch both switching branches as well as new commits
+    return 'updated' in msg or 'Checked out new' in msg
+
+
+def fetch_repository(repo_path: Path) -> dict:
+    """
+    Pulls the latest changes for a single repository. The caller must hold the lock for this repository. This does
+    not perform any indexing, so it is safe to call concurrently for different repositories.
+
+    :param repo_path: Path of the repository to update
+    :return: summary dict containing the name, status, message and timing of the update
+    """
+    summary = dict()
+    summary['name'] = repo_path.name
+    summary['index_time'] = 0.0
+    summary['errors'] = list()
+
+    start = time.monotonic()
+
+    try:
+        msg = pull_repository(str(repo_path))
+    except Exception as e:
+        # never allow a single repository to break the entire pool
+        msg = f'Error updating repository: {e}'
+    finally:
+        # this runs on a worker thread, do not leave the db connection open
+        connection.close()
+
+    summary['fetch_time'] = round(time.monotonic() - start, 2)
+    summary['message'] = msg
+
+    if 'Error' in msg:
+        summary['status'] = 'error'
+    elif is_updated_message(msg):
+        summary['status'] = 'updated'
+    else:
+        summary['status'] = 'unchanged'
+
+    return summary
+
+
+def index_updated_repository(repo_path: Path, summary: dict) -> None:
+    """
+    Re-indexes the skillets found in a repository that has been updated. The summary dict will be updated
+    with the index time and any errors found. The caller must hold the lock for this repository
+
+    :param repo_path: Path of the updated repository
+    :param summary: summary dict as returned from fetch_repository
+    :return: None
+    """
+    repo_name = repo_path.name
+    start = time.monotonic()
+
+    cnc_utils.set_long_term_cached_value(app_name, f'{repo_name}_detail', None, 0, 'git_repo_details')
+
+    # remove all python3 init touch files if there is an update
+    task_utils.python3_reset_init(str(repo_path))
+
+    remove_temp_files(repo_path)
+
+    try:
+        # only refresh the skillets that have changed since the last indexed HEAD, or all of them if the previous
+        # index is incomplete
+        index_utils.refresh_skillets_from_diff(repo_name, index_utils.get_indexed_head(repo_name))
+        index_utils.record_indexed_head(repo_name, index_utils.get_head_sha(str(repo_path)))
+
+    except DuplicateSkilletException as dse:
+        summary['errors'].append(str(dse))
+        # the index is incomplete, ensure the next update does not take the fast path
+        index_utils.record_indexed_head(repo_name, '')
+
+    summary['index_time'] = round(time.monotonic() - start, 2)
+
+
+def update_all_repositories(workers: int = None, progress=None) -> list:
+    """
+    Updates all imported repositories. Fetches are performed concurrently on a bounded worker pool, while the
+    re-index of each updated repository is performed serially afterwards to avoid contention on the database
+
+    :param workers: size of the worker pool, defaults to the configured 'update_workers' value
+    :param progress: optional callable accepting a step description and a percentage complete
+    :return: list of summary dicts, one per repository, sorted by repository name
+    """
+    if workers is None:
+        workers = get_update_worker_count()
+
+    repo_paths = sorted(get_imported_repo_paths(), key=lambda p: p.name)
+
+    if not repo_paths:
+        return list()
+
+    print(f'Updating {len(repo_paths)} repositories with {workers} workers')
+
+    summaries = dict()
+
+    # hold the lock of every repository from the fetch until its new HEAD has been indexed
+    with ExitStack() as repo_locks:
+        for repo_path in repo_paths:
+            repo_locks.enter_context(get_repo_lock(repo_path.name))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(fetch_repository, repo_path): repo_path for repo_path in repo_paths}
+
+            for future in as_completed(futures):
+                repo_path = futures[future]
+                summaries[repo_path.name] = future.result()
+                report_progress(progress, f'Fetched {repo_path.name}', int(len(summaries) / len(repo_paths) * 80))
+
+        for repo_path in repo_paths:
+            summary = summaries[repo_path.name]
+            if summary['status'] == 'updated':
+                print(f'Updated Repository: {repo_path.name}')
+                report_progress(progress, f'Indexing {repo_path.name}', 90)
+                index_updated_repository(repo_path, summary)
+
+            elif summary['status'] == 'error':
+                print(f'Error updating Repository: {repo_path.name}')
+                print(summary['message'])
+
+    return [summaries[repo_path.name] for repo_path in repo_paths]
+
+
+def load_repository_listing(repo_path: Path) -> dict:
+    """
+    Gathers the details of a single repository for the repository list. Repositories are only indexed if the
+    current HEAD has not been indexed already
+
+    :param repo_path: Path of the repository
+    :return: repository details dict
+    """
+    repo_name = repo_path.name
+
+    try:
+        repo_detail = db_utils.get_repository_details(repo_name)
+
+        if not repo_detail:
+            repo_detail = git_utils.get_repo_details(repo_name, repo_path, app_name)
+
+        head = index_utils.get_head_sha(str(repo_path))
+
+        if index_utils.is_indexed(repo_name, head) and RepositoryDetails.objects.filter(name=repo_name).exists():
+            return repo_detail
+
+        try:
+            index_utils.initialize_repo(repo_detail)
+            index_utils.record_indexed_head(repo_name, head)
+
+        except DuplicateSkilletException:
+            print('Refusing to index duplicate skillet names...')
+
+        with _listing_guard:
+            _initialized_repo_names.add(repo_name)
+
+        return repo_detail
+
+    finally:
+        # this runs on a worker thread, do not leave the db connection open
+        connection.close()
+
+
+def _get_listing_executor() -> ThreadPoolExecutor:
+    # must be called with _listing_guard held
+    global _listing_executor
+
+    if _listing_executor is None:
+        _listing_executor = ThreadPoolExecutor(max_workers=get_update_worker_count())
+
+    return _listing_executor
+
+
+def list_repositories(timeout: float = default_listing_timeout) -> tuple:
+    """
+    Gathers the details of all imported repositories concurrently. Repositories that are not complete within the
+    timeout continue to load in the background and can be retrieved using get_repository_listing_status
+
+    :param timeout: seconds to wait for all repositories
+    :return: tuple of (list of repository details dicts, list of repository names still loading)
+    """
+    futures = dict()
+
+    with _listing_guard:
+        executor = _get_listing_executor()
+
+        for repo_path in get_imported_repo_paths():
+            future = _listing_futures.get(repo_path.name, None)
+
+            if future is None:
+                future = executor.submit(load_repository_listing, repo_path)
+                _listing_futures[repo_path.name] = future
+
+            futures[future] = repo_path.name
+
+    if not futures:
+        return list(), list()
+
+    (done, not_done) = wait(futures, timeout=timeout)
+
+    repos = list()
+    pending = list()
+
+    with _listing_guard:
+        for future in done:
+            repo_name = futures[future]
+            _listing_futures.pop(repo_name, None)
+
+            try:
+                repos.append(future.result())
+
+            except Exception as e:
+                print(f'Could not load details for repository {repo_name}: {e}')
+
+        for future in not_done:
+            pending.append(futures[future])
+
+    update_initialized_repositories()
+
+    return repos, sorted(pending)
+
+
+def update_initialized_repositories() -> None:
+    """
+    Updates the skillet caches and the catalog once for all repositories indexed for the first time while listing
+
+    :return: None
+    """
+    with _listing_guard:
+        repo_names = sorted(_initialized_repo_names)
+        _initialized_repo_names.clear()
+
+    if repo_names:
+        index_utils.update_skillet_cache(repo_names)
+
+
+def get_repository_listing_status(repo_name: str) -> (dict, None):
+    """
+    Returns the details of a repository that was still loading when the repository list was rendered
+
+    :param repo_name: name of the repository
+    :return: repository details dict or None if the repository is still loading
+    """
+    with _listing_guard:
+        future = _listing_futures.get(repo_name, None)
+
+        if future is not None:
+            if not future.done():
+                return None
+
+            _listing_futures.pop(repo_name, None)
+
+    if future is not None and future.exception() is None:
+        update_initialized_repositories()
+        return future.result()
+
+    # loaded by another process or a previous request
+    return db_utils.get_repository_details(repo_name) or dict(name=repo_name)
+
+
+def report_progress(progress, step: str, percent: int) -> None:
+    """
+    Reports the progress of a long running repository job if a progress callable has been supplied
+
+    :param progress: callable accepting a step description and a percentage complete or None
+    :param step: description of the current step
+    :param percent: percentage complete
+    :return: None
+    """
+    print(f'{percent}% - {step}')
+    if progress is not None:
+        progress(step, percent)
+
+
+def _new_job_result(redirect: str) -> dict:
+    """
+    Repository jobs run outside of the request / response cycle, so any messages intended for the user are
+    collected as a list of (level, message) tuples and added to the user session once the job completes
+
+    :param redirect: url to redirect to once the job is complete
+    :return: dict
+    """
+    result = dict()
+    result['redirect'] = redirect
+    result['messages'] = list()
+    return result
+
+
+def _check_dependencies(repo_name: str, job_messages: list) -> None:
+    """
+    Resolves the transitive dependencies of a repository and adds an error message for each repository that is not
+    yet imported
+
+    :param repo_name: name of the repository
+    :param job_messages: list of (level, message) tuples to append to
+    :return: None
+    """
+    missing = dependency_utils.get_missing_dependencies([repo_name])
+
+    for depends in missing:
+        job_messages.append((messages.ERROR, f'Unresolved Dependency found!! Please ensure you import the '
+                                             f'following repository: {depends["url"]} with branch: '
+                                             f'{depends["branch"]}'))
+
+    if len(missing) > 1:
+        job_messages.append((messages.INFO, f'All {len(missing)} missing dependencies may be imported at once using '
+                                            f'Import Dependencies on the repository details page'))
+
+
+def _add_debug_errors(debug_errors: list, job_messages: list) -> None:
+    """
+    Convert the output from lint_utils.lint_repository into (level, message) tuples
+
+    :param debug_errors: list of dicts containing err_list, path, and severity keys
+    :param job_messages: list of (level, message) tuples to append to
+    :return: None
+    """
+    job_messages.append((messages.ERROR, 'Found Skillets with errors! Please open an issue on '
+                                         'this repository to help resolve this issue'))
+
+    for d in debug_errors:
+        if 'err_list' in d and 'path' in d:
+            for e in d['err_list']:
+                if d.get('severity', 'error') == 'warn':
+                    level = messages.WARNING
+
+                else:
+                    level = messages.ERROR
+
+                job_messages.append((level, f'Skillet: {d["path"]}\n\nError: {e}'))
+
+
+def import_repository(repo_name: str, url: str, clone_options: dict = None, progress=None) -> dict:
+    """
+    Clones and indexes a new repository. The repository directory must already exist and be empty.
+
+    :param repo_name: name of the repository
+    :param url: git url to clone from
+    :param clone_options: optional dict of shallow, partial, and sparse clone options
+    :param progress: optional callable accepting a step description and a percentage complete
+    :return: job result dict containing the redirect url and a list of messages for the user
+    """
+    # the repository watcher may not index this repository before the import is complete
+    with get_repo_lock(repo_name):
+        return _import_repository(repo_name, url, clone_options, progress)
+
+
+def _import_repository(repo_name: str, url: str, clone_options: dict, progress) -> dict:
+    result = _new_job_result('/panhandler/repos')
+    job_messages = result['messages']
+
+    repo_dir = os.path.join(get_repositories_dir(), repo_name)
+
+    report_progress(progress, f'Cloning {url}', 10)
+
+    try:
+        # fix for $56 - do not use github api for clone_url as it always defaults to HTTPS
+        # instead just use the url supplied by the user
+        message = clone_repository(repo_dir, repo_name, url, clone_options)
+        print(message)
+
+    except RepositoryPermissionsException:
+        job_messages.append((messages.ERROR, 'SSH Permissions Error. Please add your SSH Public key to the '
+                                             'upstream repository'))
+        result['redirect'] = '/ssh_key'
+        return result
+
+    except ImportRepositoryException as ire:
+        job_messages.append((messages.ERROR, f'Could not Import Repository: {ire}'))
+
+    else:
+        # ensure updates use the same clone options
+        save_clone_options(repo_name, clone_options)
+
+        report_progress(progress, 'Gathering repository details', 40)
+
+        try:
+            repo_detail = git_utils.get_repo_details(repo_name, repo_dir, app_name)
+
+        except RepositoryPermissionsException:
+            job_messages.append((messages.ERROR, 'SSH Permissions Error. Please add the Deploy key to the upstream '
+                                                 'repository'))
+            result['redirect'] = '/ssh_key'
+            return result
+
+        # the cached repository list is keyed by the catalog version, indexing below makes it stale
+
+        report_progress(progress, 'Indexing skillets', 60)
+
+        try:
+            index_utils.initialize_repo(repo_detail)
+
+        except DuplicateSkilletException as dse:
+            job_messages.append((messages.ERROR, str(dse)))
+            index_utils.update_skillet_cache([repo_name])
+            return result
+
+        report_progress(progress, 'Checking skillets for errors', 80)
+
+        debug_errors = lint_utils.lint_repository(repo_dir)
+
+        index_utils.record_indexed_head(repo_name, index_utils.get_head_sha(repo_dir), debug_errors)
+
+        _check_dependencies(repo_name, job_messages)
+
+        if debug_errors:
+            _add_debug_errors(debug_errors, job_messages)
+        else:
+            job_messages.append((messages.INFO, 'Imported Repository Successfully'))
+
+    # fix for gl #3 - be smarter about clearing the cache
+    index_utils.update_skillet_cache([repo_name])
+
+    report_progress(progress, 'Complete', 100)
+    return result
+
+
+def update_repository(repo_name: str, branch: str = None, progress=None) -> dict:
+    """
+    Pulls the latest changes for a repository, optionally checking out a different branch, and re-indexes the
+    skillets found within if anything has changed
+
+    :param repo_name: name of the repository
+    :param branch: optional branch to checkout
+    :param progress: optional callable accepting a step description and a percentage complete
+    :return: job result dict containing the redirect url and a list of messages for the user
+    """
+    result = _new_job_result(f'/panhandler/repo_detail/{repo_name}')
+    job_messages = result['messages']
+
+    repo_dir = os.path.join(get_repositories_dir(), repo_name)
+
+    if not os.path.exists(repo_dir):
+        job_messages.append((messages.ERROR, 'Repository directory does not exist!'))
+        return result
+
+    # hold the lock until the result has been indexed, neither a concurrent update all nor the repository watcher
+    # may run git or the indexer in this repository in the meantime
+    with get_repo_lock(repo_name):
+        return _update_repository(repo_name, repo_dir, branch, result, progress)
+
+
+def _update_repository(repo_name: str, repo_dir: str, branch: str, result: dict, progress) -> dict:
+    job_messages = result['messages']
+
+    report_progress(progress, 'Pulling latest changes', 10)
+
+    previous_branch = index_utils.get_active_branch(repo_dir)
+    is_branch_switch = branch is not None and previous_branch is not None and branch != previous_branch
+
+    if is_branch_switch:
+        # keep the index of the branch we are leaving, switching back to it is then a simple swap
+        index_utils.save_branch_index(repo_name, previous_branch, index_utils.get_head_sha(repo_dir))
+
+    msg = pull_repository(repo_dir, branch)
+
+    head = index_utils.get_head_sha(repo_dir)
+
+    if 'Error' not in msg and not is_updated_message(msg) and index_utils.is_indexed(repo_name, head) \
+            and RepositoryDetails.objects.filter(name=repo_name).exists():
+        # nothing has moved since the last index, skip all re-scan work and serve the cached details and lint results
+        print(f'Repository {repo_name} is already indexed at {head}')
+        job_messages.append((messages.INFO, msg))
+
+        _check_dependencies(repo_name, job_messages)
+
+        debug_errors = index_utils.get_cached_lint_results(repo_name, head)
+
+        if debug_errors is None:
+            report_progress(progress, 'Checking skillets for errors', 70)
+            debug_errors = lint_utils.lint_repository(repo_dir)
+            index_utils.record_indexed_head(repo_name, head, debug_errors)
+
+        if debug_errors:
+            _add_debug_errors(debug_errors, job_messages)
+
+        report_progress(progress, 'Complete', 100)
+        return result
+
+    # always clear the repo detail cache to pull new branches and commits
+    cnc_utils.set_long_term_cached_value(app_name, f'{repo_name}_detail', None, 0, 'git_repo_details')
+
+    report_progress(progress, 'Gathering repository details', 30)
+
+    repo_detail = git_utils.get_repo_details(repo_name, repo_dir, app_name)
+    repo_detail_json = json.dumps(repo_detail)
+
+    (repository_object, created) = RepositoryDetails.objects.get_or_create(
+        name=repo_name,
+        defaults={'url': repo_detail.get('url'),
+                  'details_json': repo_detail_json
+                  }
+    )
+
+    needs_index = created
+    level = messages.INFO
+
+    # get the previous repo details json object from the db
+    previous_details_json = repository_object.details_json
+    previous_details = json.loads(previous_details_json)
+
+    # the commit that was last indexed, used to only re-index skillets that have changed since
+    previous_head = index_utils.get_indexed_head(repo_name) if not created else ''
+
+    # check previous commit log and verify if we have any local commits
+    # use the current commit log and compare against the last commit log stored in the db
+    found_commits = list()
+    previous_commits = list()
+    for new_commit in repo_detail.get('commits', []):
+        found_commits.append(new_commit.get('id', ''))
+
+    for commit in previous_details.get('commits', []):
+        previous_commits.append(commit.get('id', ''))
+
+    for c in found_commits:
+        if c not in previous_commits:
+            # we have a commit in the commit log that was not previously recorded in the db
+            # this means we need to re-index skillets
+            needs_index = True
+            break
+
+    if 'Error' in msg:
+        level = messages.ERROR
+        cnc_utils.evict_cache_items_of_type(app_name, 'imported_git_repos')
+
+    elif is_updated_message(msg):
+        level = messages.INFO
+
+        # remove all python3 init touch files if there is an update
+        task_utils.python3_reset_init(repo_dir)
+
+        # set needs_index flag regardless of creation status
+        needs_index = True
+
+    else:
+        print(f'update repo msg was: {msg}')
+
+    job_messages.append((level, msg))
+
+    # check if there are new branches available
+    repo_branches = git_utils.get_repo_branches_from_dir(repo_dir)
+    if repo_detail['branches'] != repo_branches:
+        job_messages.append((messages.INFO, 'New Branches are available'))
+
+    indexed_head = head
+    restored = False
+
+    report_progress(progress, 'Indexing skillets', 50)
+
+    if needs_index and is_branch_switch and 'Error' not in msg:
+        # this branch was used before and has not moved since, restore its index instead of re-indexing
+        restored = index_utils.restore_branch_index(repo_name, branch, head)
+
+    if needs_index and not restored:
+        try:
+            # only re-parse the skillet files that have changed between the old and new HEAD
+            index_utils.refresh_skillets_from_diff(repo_name, previous_head)
+
+        except DuplicateSkilletException as dse:
+            job_messages.append((messages.ERROR, str(dse)))
+            # the index is incomplete, ensure the next update does not take the fast path
+            indexed_head = ''
+
+    # check each skillet found for dependencies
+    _check_dependencies(repo_name, job_messages)
+
+    report_progress(progress, 'Checking skillets for errors', 70)
+
+    debug_errors = index_utils.get_cached_lint_results(repo_name, head) if restored else None
+
+    if debug_errors is None:
+        debug_errors = lint_utils.lint_repository(repo_dir)
+
+    if debug_errors:
+        _add_debug_errors(debug_errors, job_messages)
+
+    index_utils.record_indexed_head(repo_name, indexed_head, debug_errors)
+
+    # Remove temp files as part of fix for #187
+    remove_temp_files(Path(repo_dir))
+
+    repository_object.details_json = json.dumps(repo_detail)
+    repository_object.save()
+
+    # manage cached items as well
+    git_utils.update_repo_detail_in_cache(repo_detail, app_name)
+    # fix for gl #3 - be smarter about clearing the cache
+    index_utils.update_skillet_cache([repo_name])
+
+    report_progress(progress, 'Complete', 100)
+    return result
+
+
+def refresh_all_repositories(progress=None) -> dict:
+    """
+    Updates all imported repositories and converts the per repository summaries into messages for the user
+
+    :param progress: optional callable accepting a step description and a percentage complete
+    :return: job result dict containing the redirect url, a list of messages, and the per repository summary
+    """
+    result = _new_job_result('/panhandler/repos')
+    job_messages = result['messages']
+
+    err_condition = False
+    updates = list()
+
+    # fetch all repositories concurrently, indexing is serialized inside update_all_repositories
+    summaries = update_all_repositories(progress=progress)
+
+    for summary in summaries:
+        if summary['status'] == 'error':
+            job_messages.append((messages.ERROR, f'Could not update repository {summary["name"]}'))
+            err_condition = True
+
+        elif summary['status'] == 'updated':
+            updates.append(summary['name'])
+
+        for e in summary['errors']:
+            job_messages.append((messages.ERROR, e))
+            job_messages.append((messages.ERROR, 'This repository may not be updated correctly!'
+                                                 'Please remove the offending skillet and try again!'))
+
+    if not err_condition:
+        repos = ", ".join(updates)
+        job_messages.append((messages.SUCCESS, f'Successfully Updated repositories: {repos}'))
+
+    # fix for gl #3 - be smarter about clearing the cache
+    index_utils.update_skillet_cache(updates)
+    cnc_utils.evict_cache_items_of_type(app_name, 'imported_git_repos')
+
+    result['summary'] = summaries
+
+    report_progress(progress, 'Complete', 100)
+    return result
+
+
+def is_valid_repo_name(repo_name: str) -> bool:
+    """
+    Fix for GL #34 - do not allow repo names that end in space . or _
+
+    :param repo_name: name of the repository
+    :return: bool
+    """
+    return repo_name is not None and re.match(r'^[a-zA-Z0-9-_ \.]*[a-zA-Z0-9]$', repo_name) is not None
+
+
+def clone_new_repository(repo_name: str, url: str, branch: str = None, clone_options: dict = None) -> (str, None):
+    """
+    Clones a repository that has not been imported yet into a new repository directory and checks out the
+    requested branch. This is intended to be run on a worker thread
+
+    :param repo_name: name of the directory to clone into
+    :param url: git url to clone from
+    :param branch: optional branch to checkout
+    :param clone_options: optional dict of shallow, partial, and sparse clone options
+    :return: error message or None on success
+    """
+    try:
+        return _clone_new_repository(repo_name, url, branch, clone_options)
+
+    finally:
+        # this runs on a worker thread, do not leave the db connection open
+        connection.close()
+
+
+def _clone_new_repository(repo_name: str, url: str, branch: str, clone_options: dict) -> (str, None):
+    repo_dir = os.path.join(get_repositories_dir(), repo_name)
+
+    if os.path.exists(repo_dir) and (not os.path.isdir(repo_dir) or len(os.listdir(repo_dir)) != 0):
+        return f'Could not import {url}: A repository named {repo_name} already exists'
+
+    try:
+        os.makedirs(repo_dir, mode=0o700, exist_ok=True)
+
+    except OSError as oe:
+        return f'Could not create repository directory for {url}: {oe}'
+
+    # if this is an SSH based url, ensure the host key is known
+    if url.startswith('git@') or url.startswith('ssh'):
+        with _known_hosts_guard:
+            (is_known, message) = git_utils.ensure_known_host(url)
+
+        if is_known is False:
+            return f'Could not verify SSH Host Key for {url}! {message}'
+
+    try:
+        print(clone_repository(repo_dir, repo_name, url, clone_options))
+
+    except (RepositoryPermissionsException, ImportRepositoryException) as e:
+        # the repository directory was empty, so any index state for this name is left from an earlier attempt
+        index_utils.remove_repository_index(repo_name)
+
+        if isinstance(e, RepositoryPermissionsException):
+            return f'SSH Permissions Error importing {url}. Please add your SSH Public key to the upstream repository'
+
+        return f'Could not Import Repository {url}: {e}'
+
+    # saved before checking out the branch below, so the checkout already respects the clone options
+    save_clone_options(repo_name, clone_options)
+
+    if branch:
+        msg = pull_repository(repo_dir, branch)
+
+        if 'Error' in msg:
+            return f'Could not checkout branch {branch} of {url}: {msg}'
+
+    return None
+
+
+def import_dependencies(repo_name: str, progress=None) -> dict:
+    """
+    Imports all missing dependencies of a repository. All missing dependencies are cloned concurrently, then indexed.
+    This is repeated for the dependencies of the newly imported repositories until the full dependency graph is
+    available or no further progress can be made.
+
+    :param repo_name: name of the repository
+    :param progress: optional callable accepting a step description and a percentage complete
+    :return: job result dict containing the redirect url and a list of messages for the user
+    """
+    result = _new_job_result(f'/panhandler/repo_detail/{repo_name}')
+    job_messages = result['messages']
+
+    imported = list()
+    failed = set()
+
+    for dependency_round in range(max_dependency_rounds):
+        missing = dependency_utils.resolve_dependencies([repo_name])['missing']
+        to_import = dict()
+
+        for (key, depends) in missing.items():
+            if key in failed:
+                continue
+
+            dependency_name = dependency_utils.get_repository_name_from_url(depends['url'], depends['branch'])
+            to_import[key] = (dependency_name, depends['url'], depends['branch'])
+
+        if not to_import:
+            break
+
+        report_progress(progress, f'Cloning {len(to_import)} dependencies', min(10 + dependency_round * 20, 80))
+
+        # hold the lock of every new repository until it has been indexed
+        with ExitStack() as repo_locks:
+            for (dependency_name, url, branch) in to_import.values():
+                repo_locks.enter_context(get_repo_lock(dependency_name))
+
+            with ThreadPoolExecutor(max_workers=get_update_worker_count()) as executor:
+                futures = {executor.submit(clone_new_repository, *args): key for (key, args) in to_import.items()}
+
+                for future in as_completed(futures):
+                    key = futures[future]
+                    error = future.result()
+
+                    if error is not None:
+                        failed.add(key)
+                        job_messages.append((messages.ERROR, error))
+
+            # index serially to avoid contention on the database
+            for (key, (dependency_name, url, branch)) in sorted(to_import.items()):
+                if key in failed:
+                    continue
+
+                dependency_dir = os.path.join(get_repositories_dir(), dependency_name)
+
+                try:
+                    repo_detail = git_utils.get_repo_details(dependency_name, dependency_dir, app_name)
+                    index_utils.initialize_repo(repo_detail)
+                    index_utils.record_indexed_head(dependency_name, index_utils.get_head_sha(dependency_dir))
+                    imported.append(dependency_name)
+
+                except (RepositoryPermissionsException, DuplicateSkilletException) as e:
+                    failed.add(key)
+                    job_messages.append((messages.ERROR, f'Could not index {url}: {e}'))
+
+    if imported:
+        job_messages.append((messages.SUCCESS, f'Imported dependencies: {", ".join(imported)}'))
+
+    elif not failed:
+        job_messages.append((messages.INFO, 'All dependencies are already imported'))
+
+    # fix for gl #3 - be smarter about clearing the cache
+    index_utils.update_skillet_cache(imported)
+    cnc_utils.evict_cache_items_of_type(app_name, 'imported_git_repos')
+
+    report_progress(progress, 'Complete', 100)
+    return result
+
+
+def _clone_for_bulk_import(repository: dict, clone_options: dict) -> dict:
+    """
+    Clones a single repository of a bulk import and gathers its details. This runs on a worker thread
+
+    :param repository: dict of name, url, and branch
+    :param clone_options: dict of clone options or None
+    :return: summary dict for this repository
+    """
+    repo_name = repository['name']
+    repo_dir = os.path.join(get_repositories_dir(), repo_name)
+
+    summary = dict()
+    summary['name'] = repo_name
+    summary['url'] = repository['url']
+    summary['status'] = 'error'
+    summary['message'] = ''
+    summary['fetch_time'] = 0
+    summary['index_time'] = 0
+    summary['repo_detail'] = None
+
+    start = time.monotonic()
+
+    try:
+        error = clone_new_repository(repo_name, repository['url'], repository.get('branch', None), clone_options)
+
+        if error is not None:
+            summary['message'] = error
+            return summary
+
+        summary['repo_detail'] = git_utils.get_repo_details(repo_name, repo_dir, app_name)
+        summary['status'] = 'imported'
+        summary['message'] = f'Cloned {repository["url"]}'
+
+    except RepositoryPermissionsException:
+        summary['message'] = 'SSH Permissions Error. Please add the Deploy key to the upstream repository'
+
+    except Exception as e:
+        # never allow a single repository to break the entire import
+        summary['status'] = 'error'
+        summary['message'] = f'Could not import {repository["url"]}: {e}'
+
+    finally:
+        summary['fetch_time'] = round(time.monotonic() - start, 2)
+        connection.close()
+
+    return summary
+
+
+def bulk_import_repositories(repositories: list, clone_options: dict = None, progress=None) -> dict:
+    """
+    Imports many repositories at once. Repositories are cloned concurrently on a bounded worker pool, then all
+    imported repositories are indexed in a single database transaction.
+
+    :param repositories: list of dicts each containing a name, url, and optional branch
+    :param clone_options: optional dict of shallow, partial, and sparse clone options used for all repositories
+    :param progress: optional callable accepting a step description and a percentage complete
+    :return: job result dict containing the redirect url, a list of messages, and the per repository summary
+    """
+    result = _new_job_result('/panhandler/repos')
+    job_messages = result['messages']
+
+    summaries = dict()
+    to_clone = list()
+
+    for repository in repositories:
+        repo_name = repository.get('name', '')
+
+        if repo_name in summaries:
+            continue
+
+        if not is_valid_repo_name(repo_name):
+            summaries[repo_name] = {'name': repo_name, 'url': repository.get('url', ''), 'status': 'error',
+                                    'message': 'Invalid Repository Name', 'fetch_time': 0, 'index_time': 0}
+            continue
+
+        if get_repositories_dir().joinpath(repo_name).joinpath('.git').exists():
+            summaries[repo_name] = {'name': repo_name, 'url': repository.get('url', ''), 'status': 'skipped',
+                                    'message': 'Already imported', 'fetch_time': 0, 'index_time': 0}
+            continue
+
+        summaries[repo_name] = None
+        to_clone.append(repository)
+
+    workers = get_update_worker_count()
+    print(f'Importing {len(to_clone)} repositories with {workers} workers')
+
+    # hold the lock of every new repository until it has been indexed
+    with ExitStack() as repo_locks:
+        for repository in to_clone:
+            repo_locks.enter_context(get_repo_lock(repository['name']))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_clone_for_bulk_import, repository, clone_options) for repository in to_clone]
+
+            for future in as_completed(futures):
+                summary = future.result()
+                summaries[summary['name']] = summary
+                cloned = len([s for s in summaries.values() if s is not None])
+                report_progress(progress, f'Cloned {summary["name"]}', int(cloned / len(summaries) * 70))
+
+        imported = [s for s in summaries.values() if s['status'] == 'imported']
+
+        report_progress(progress, f'Indexing {len(imported)} repositories', 75)
+
+        # index everything in one transaction, each repository in its own savepoint so a duplicate skillet only rolls
+        # back the repository that contains it
+        with transaction.atomic():
+            for summary in imported:
+                start = time.monotonic()
+                repo_name = summary['name']
+
+                try:
+                    with transaction.atomic():
+                        index_utils.initialize_repo(summary['repo_detail'])
+
+                except DuplicateSkilletException as dse:
+                    summary['status'] = 'error'
+                    summary['message'] = str(dse)
+
+                summary['index_time'] = round(time.monotonic() - start, 2)
+
+        report_progress(progress, 'Checking skillets for errors', 90)
+
+        for summary in imported:
+            repo_dir = os.path.join(get_repositories_dir(), summary['name'])
+
+            if summary['status'] == 'imported':
+                index_utils.record_indexed_head(summary['name'], index_utils.get_head_sha(repo_dir),
+                                                lint_utils.lint_repository(repo_dir))
+
+    for summary in summaries.values():
+        summary.pop('repo_detail', None)
+
+        if summary['status'] == 'error':
+            job_messages.append((messages.ERROR, f'Could not import {summary["name"]}: {summary["message"]}'))
+
+    names = ', '.join([s['name'] for s in imported if s['status'] == 'imported'])
+    if names:
+        job_messages.append((messages.SUCCESS, f'Successfully Imported repositories: {names}'))
+
+    # fix for gl #3 - be smarter about clearing the cache
+    index_utils.update_skillet_cache([s['name'] for s in imported])
+    cnc_utils.evict_cache_items_of_type(app_name, 'imported_git_repos')
+
+    result['summary'] = sorted(summaries.values(), key=lambda s: s['name'])
+
+    report_progress(progress, 'Complete', 100)
+    return result
+
+
+def invalidate_repository(repo_name: str, changed: set, removed: set, refs_changed: bool = False,
+                          rescan: bool = False) -> None:
+    """
+    Brings the cached details and skillet index of a single repository up to date after it was modified outside of
+    panhandler, for example when a skillet was edited on disk or git was run by hand. Only the entries for this
+    repository are invalidated.
+
+    :param repo_name: name of the repository
+    :param changed: set of added or modified file paths relative to the repository root
+    :param removed: set of removed file paths relative to the repository root
+    :param refs_changed: True if anything under .git/refs or .git/HEAD was modified
+    :param rescan: True if whole directories were changed and all skillets in the repository must be re-indexed
+    :return: None
+    """
+    repo_dir = os.path.join(get_repositories_dir(), repo_name)
+    git_dir = os.path.join(repo_dir, '.git')
+
+    if not os.path.isdir(git_dir) or not RepositoryDetails.objects.filter(name=repo_name).exists():
+        # removed or not imported yet, nothing has been cached for this repository
+        return
+
+    head = index_utils.get_head_sha(repo_dir)
+    repository_index = index_utils.get_repository_index(repo_name)
+    indexed_head = repository_index.head
+    head_moved = head != indexed_head
+    local_changes = index_utils.has_local_changes(repo_dir)
+
+    if not head_moved and not refs_changed and not local_changes and not repository_index.local_changes:
+        # HEAD and the working tree still match the index, for example after an update job has indexed the commits
+        # it pulled, or after local edits have been reverted and indexed already
+        return
+
+    print(f'Invalidating cached items for repository {repo_name}')
+
+    cnc_utils.set_long_term_cached_value(app_name, f'{repo_name}_detail', None, 0, 'git_repo_details')
+    cache_repo_name = repo_name.replace(' ', '_')
+    cnc_utils.set_long_term_cached_value(app_name, f'git_utils_upstream_{cache_repo_name}', None, 0,
+                                         'git_repo_details')
+
+    if head_moved or refs_changed:
+        # new commits or branches, keep the stored and cached details for this repository up to date
+        repo_detail = git_utils.get_repo_details(repo_name, repo_dir, app_name)
+        db_utils.update_repository_details(repo_name, repo_detail)
+        git_utils.update_repo_detail_in_cache(repo_detail, app_name)
+
+    if not head_moved and not changed and not removed and not rescan:
+        if refs_changed:
+            # only branches or tags have moved, the skillet index is still valid but the cached pages are not
+            catalog_utils.bump_catalog_version()
+
+        return
+
+    try:
+        if rescan:
+            index_utils.refresh_skillets_from_repo(repo_name)
+
+        elif head_moved:
+            index_utils.refresh_skillets_from_diff(repo_name, indexed_head, head)
+
+        if changed or removed:
+            index_utils.refresh_skillet_paths(repo_name, changed, removed)
+
+        index_utils.record_indexed_head(repo_name, head, local_changes=local_changes)
+
+    except DuplicateSkilletException as dse:
+        print(dse)
+        # the index is incomplete, ensure the next update does not take the fast path
+        index_utils.record_indexed_head(repo_name, '')
+
+    if local_changes:
+        # lint results are only valid for an unmodified checkout
+        index_utils.invalidate_lint_results(repo_name)
+
+    # this rebuilds the catalog index and bumps the catalog version once for all of the above
+    index_utils.update_skillet_cache([repo_name])
@@ -0,0 +1,183 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import re
+
+from django.db import DatabaseError
+from django.db import connection
+from django.db import transaction
+from django.db.models import Q
+
+from panhandler.lib import catalog_utils
+from panhandler.models import SkilletSummary
+
+# name of the sqlite FTS5 table holding the search index, created in migration 0007
+search_table = 'panhandler_skilletsearch'
+
+# relative weights of the name, label, description, variables, and snippets columns when ranking results
+column_weights = (10.0, 8.0, 2.0, 1.0, 1.0)
+
+default_search_limit = 50
+max_search_limit = 500
+
+# maximum number of skillet names per delete, stays well below the sqlite limit of query parameters
+max_delete_names = 500
+
+_search_table_available = None
+
+
+def is_search_index_available() -> bool:
+    """
+    The search index requires sqlite with the FTS5 extension. Other databases fall back to a simple substring match
+
+    :return: bool
+    """
+    global _search_table_available
+
+    if _search_table_available is None:
+        _search_table_available = connection.vendor == 'sqlite' and search_table in connection.introspection.table_names()
+
+    return _search_table_available
+
+
+def get_search_document(skillet_name: str, skillet_dict: dict) -> tuple:
+    """
+    Returns the columns indexed for a skillet
+
+    :param skillet_name: name of the skillet as indexed
+    :param skillet_dict: loaded skillet dict
+    :return: tuple of name, label, description, variable names, snippet names, and type
+    """
+    variable_names = [str(v.get('name', '')) for v in skillet_dict.get('variables', list()) if type(v) is dict]
+    snippet_names = [str(s.get('name', '')) for s in skillet_dict.get('snippets', list()) if type(s) is dict]
+
+    return (
+        skillet_name,
+        str(skillet_dict.get('label', skillet_name)),
+        str(skillet_dict.get('description', '')),
+        ' '.join(variable_names),
+        ' '.join(snippet_names),
+        str(skillet_dict.get('type', '')),
+    )
+
+
+def rebuild_search_index(documents: list, stale_names: set = None) -> None:
+    """
+    Replaces the contents of the search index, or only the documents of the given skillets
+
+    :param documents: list of tuples as returned from get_search_document
+    :param stale_names: optional set of skillet names to replace, the entire index is replaced if not supplied
+    :return: None
+    """
+    if not is_search_index_available():
+        return
+
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            if stale_names is None:
+                cursor.execute(f'DELETE FROM {search_table}')
+
+            else:
+                stale_list = sorted(stale_names)
+
+                for i in range(0, len(stale_list), max_delete_names):
+                    batch = stale_list[i:i + max_delete_names]
+                    cursor.execute(f'DELETE FROM {search_table} WHERE name IN ({", ".join(["%s"] * len(batch))})',
+                                   batch)
+
+            cursor.executemany(f'INSERT INTO {search_table} (name, label, description, variables, snippets, type) '
+                               f'VALUES (%s, %s, %s, %s, %s, %s)', documents)
+
+    except DatabaseError as de:
+        print(f'Could not update the skillet search index: {de}')
+
+
+def build_match_query(search: str) -> str:
+    """
+    Converts free text into an FTS5 query that matches every word as a prefix. Words are quoted so FTS5 operators
+    in the search text are never interpreted
+
+    :param search: text as entered by the user
+    :return: FTS5 match expression or an empty string if there is nothing to search for
+    """
+    words = re.findall(r'\w+', search or '')
+    return ' '.join([f'"{w}"*' for w in words])
+
+
+def search_skillets(search: str, limit: int = default_search_limit) -> list:
+    """
+    Searches skillet names, labels, descriptions, variable names, and snippet names. Results are ranked with bm25,
+    matches in the name and label rank higher than matches in the description or variables. App skillets are never
+    returned, the same as in the 'All Skillets' collection
+
+    :param search: text to search for, each word is matched as a prefix
+    :param limit: maximum number of results to return
+    :return: list of dicts of name, label, description, and type
+    """
+    try:
+        limit = min(max(int(limit), 1), max_search_limit)
+
+    except (TypeError, ValueError):
+        limit = default_search_limit
+
+    match_query = build_match_query(search)
+
+    if not match_query:
+        return list()
+
+    # the search index is built together with the catalog index
+    catalog_utils.ensure_catalog_index()
+
+    if not is_search_index_available():
+        return _search_summaries(search, limit)
+
+    weights = ', '.join([str(w) for w in column_weights])
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT name, label, description, type FROM {search_table} '
+                           f'WHERE {search_table} MATCH %s AND type != %s '
+                           f'ORDER BY bm25({search_table}, {weights}) LIMIT %s',
+                           [match_query, 'app', limit])
+            rows = cursor.fetchall()
+
+    except DatabaseError as de:
+        print(f'Could not search skillets: {de}')
+        return list()
+
+    return [{'name': r[0], 'label': r[1], 'description': r[2], 'type': r[3]} for r in rows]
+
+
+def _search_summaries(search: str, limit: int) -> list:
+    # unranked fallback for databases without FTS5
+    queryset = SkilletSummary.objects.exclude(type='app')
+
+    for word in re.findall(r'\w+', search):
+        queryset = queryset.filter(Q(name__icontains=word) | Q(label__icontains=word) |
+                                   Q(description__icontains=word))
+
+    return list(queryset.order_by('label').values('name', 'label', 'description', 'type')[:limit])
@@ -0,0 +1,123 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import json
+import pickle
+import threading
+from collections import OrderedDict
+
+from cnc.models import Skillet
+from panhandler.lib import catalog_utils
+
+# number of decoded skillets kept per process
+skillet_cache_size = 256
+
+# name of the attribute used to memoize skillets on the current request
+request_memo_attribute = '_panhandler_skillets'
+
+# pickled skillets keyed by (skillet name, catalog version), most recently used last. Skillets are stored pickled so
+# every caller gets its own copy, unpickling is considerably faster than decoding the json again
+_skillet_cache = OrderedDict()
+_skillet_cache_guard = threading.Lock()
+
+
+def clear_skillet_cache() -> None:
+    """
+    Removes all skillets cached by this process. Entries for older catalog versions are never used again anyway, this
+    only releases the memory early
+
+    :return: None
+    """
+    with _skillet_cache_guard:
+        _skillet_cache.clear()
+
+
+def _get_request_memo(request) -> (dict, None):
+    if request is None:
+        return None
+
+    memo = getattr(request, request_memo_attribute, None)
+
+    if memo is None:
+        # the catalog version is read once per request
+        memo = {'version': catalog_utils.get_catalog_version()[0], 'skillets': dict()}
+        setattr(request, request_memo_attribute, memo)
+
+    return memo
+
+
+def load_skillet_by_name(skillet_name: str, request=None) -> (dict, None):
+    """
+    Loads a skillet from the skillet index. Decoded skillets are kept in a per process LRU cache keyed by the
+    catalog version, and memoized on the request so repeated lookups during one request skip the cache and the
+    database. Every call returns a new copy, callers are free to modify it
+
+    :param skillet_name: name of the skillet
+    :param request: current HttpRequest, if any
+    :return: skillet dict or None if not found
+    """
+    memo = _get_request_memo(request)
+
+    if memo is not None:
+        if skillet_name in memo['skillets']:
+            pickled_skillet = memo['skillets'][skillet_name]
+            return pickle.loads(pickled_skillet) if pickled_skillet is not None else None
+
+        version = memo['version']
+
+    else:
+        version = catalog_utils.get_catalog_version()[0]
+
+    cache_key = (skillet_name, version)
+
+    with _skillet_cache_guard:
+        pickled_skillet = _skillet_cache.get(cache_key, None)
+
+        if pickled_skillet is not None:
+            _skillet_cache.move_to_end(cache_key)
+
+    if pickled_skillet is not None:
+        skillet = pickle.loads(pickled_skillet)
+
+    else:
+        skillet_json = Skillet.objects.filter(name=skillet_name).values_list('skillet_json', flat=True).first()
+        skillet = json.loads(skillet_json) if skillet_json is not None else None
+
+        if skillet is not None:
+            pickled_skillet = pickle.dumps(skillet, pickle.HIGHEST_PROTOCOL)
+
+            with _skillet_cache_guard:
+                _skillet_cache[cache_key] = pickled_skillet
+
+                while len(_skillet_cache) > skillet_cache_size:
+                    _skillet_cache.popitem(last=False)
+
+    if memo is not None:
+        # the memo holds the pickled skillet as well, so changes made by one caller are never seen by the next
+        memo['skillets'][skillet_name] = pickled_skillet
+
+    return skillet
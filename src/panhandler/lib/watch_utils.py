@@ -0,0 +1,306 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks Panhandler
+
+panhandler is a tool to find, download, and use PAN-OS Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+from django.db import connection
+
+from pan_cnc.lib import cnc_utils
+from panhandler.lib import repo_utils
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+except ImportError:
+    # the watcher is optional, caches fall back to the default expiration times without it
+    FileSystemEventHandler = object
+    Observer = None
+
+app_name = 'panhandler'
+
+# seconds to wait for a burst of file system events to settle before invalidating a repository
+debounce_seconds = 2.0
+
+# cache life to use for repository caches when the watcher keeps them up to date
+watched_cache_life = 2592000
+
+# files and directories in the .git dir that indicate HEAD or a branch has moved
+git_ref_names = ('HEAD', 'packed-refs', 'refs')
+
+_observer = None
+_observer_guard = threading.Lock()
+
+# set once temp file manifests left over from a previous run of the watcher have been removed
+_registration_disabled = False
+
+# pending changes per repository name, guarded by _pending_guard
+_pending = dict()
+_timers = dict()
+_pending_guard = threading.Lock()
+
+
+def is_watcher_enabled() -> bool:
+    """
+    The watcher may be disabled using the 'watch_repositories' key in the application_data section of the
+    .pan-cnc.yaml file
+
+    :return: bool
+    """
+    app_config = cnc_utils.get_app_config(app_name)
+    application_data = app_config.get('application_data', dict())
+
+    if type(application_data) is not dict:
+        return True
+
+    return str(application_data.get('watch_repositories', True)).lower() not in ('false', 'no', '0')
+
+
+def is_watcher_active() -> bool:
+    """
+    Determine if the repositories directory is currently being watched
+
+    :return: bool
+    """
+    return _observer is not None and _observer.is_alive()
+
+
+def get_cache_life(default_life: int) -> int:
+    """
+    Returns the cache life to use for repository and skillet caches. These can be kept much longer while the watcher
+    invalidates them as repositories change on disk
+
+    :param default_life: cache life in seconds to use when the watcher is not active
+    :return: cache life in seconds
+    """
+    if is_watcher_active():
+        return max(default_life, watched_cache_life)
+
+    return default_life
+
+
+def start_repository_watcher() -> bool:
+    """
+    Starts watching the repositories directory if it is not already being watched. This is safe to call on every
+    request
+
+    :return: True if the watcher is active
+    """
+    global _observer
+
+    if is_watcher_active():
+        return True
+
+    if Observer is None or not is_watcher_enabled():
+        _disable_registration()
+        return False
+
+    with _observer_guard:
+        if is_watcher_active():
+            return True
+
+        repositories_dir = repo_utils.get_repositories_dir()
+
+        try:
+            repositories_dir.mkdir(parents=True, exist_ok=True)
+
+            observer = Observer()
+            observer.daemon = True
+            observer.schedule(RepositoryEventHandler(repositories_dir), str(repositories_dir), recursive=True)
+            observer.start()
+
+        except OSError as oe:
+            print(f'Could not watch repositories directory: {oe}')
+            return False
+
+        print(f'Watching {repositories_dir} for changes')
+        _observer = observer
+
+        # temp files are registered as they are created from now on
+        repo_utils.enable_temp_file_registration()
+
+    return True
+
+
+def _disable_registration() -> None:
+    global _registration_disabled
+
+    with _observer_guard:
+        if _registration_disabled:
+            return
+
+        # temp files created without the watcher are not registered, manifests from a previous run are incomplete
+        repo_utils.disable_temp_file_registration()
+        _registration_disabled = True
+
+
+def _get_repo_path(repositories_dir: Path, path: str) -> (tuple, None):
+    """
+    Maps the path of a file system event to the repository it belongs to
+
+    :param repositories_dir: directory where all repositories are cloned
+    :param path: full path from the event
+    :return: tuple of (repo_name, relative path) or None if this path does not belong to a repository
+    """
+    try:
+        parts = Path(path).relative_to(repositories_dir).parts
+
+    except ValueError:
+        return None
+
+    if len(parts) < 2:
+        # the repository directory itself was created or removed, this is handled by import and remove
+        return None
+
+    return parts[0], Path(*parts[1:]).as_posix()
+
+
+def _schedule(repo_name: str, relative_path: str, is_removed: bool, is_directory: bool) -> None:
+    if Path(relative_path).name.startswith('.cnc_tmp_'):
+        # temporary files are created and removed by skillet execution, record them for removal on the next update
+        if not is_removed and not is_directory:
+            repo_utils.register_temp_file(repo_name, relative_path)
+
+        return
+
+    with _pending_guard:
+        pending = _pending.setdefault(repo_name, {'changed': set(), 'removed': set(), 'refs_changed': False,
+                                                  'rescan': False, 'last_event': 0.0})
+
+        parts = Path(relative_path).parts
+
+        if parts[0] == '.git':
+            if len(parts) < 2 or parts[1] not in git_ref_names:
+                # object, index and log updates always come with a ref change when anything meaningful happens
+                return
+
+            pending['refs_changed'] = True
+
+        elif is_directory:
+            # whole directories were added, moved or removed, the files within may not be reported individually
+            pending['rescan'] = True
+
+        elif is_removed:
+            pending['removed'].add(relative_path)
+            pending['changed'].discard(relative_path)
+
+        else:
+            pending['changed'].add(relative_path)
+            pending['removed'].discard(relative_path)
+
+        pending['last_event'] = time.time()
+        _arm_timer(repo_name)
+
+
+def _arm_timer(repo_name: str) -> None:
+    # must be called with _pending_guard held
+    timer = _timers.get(repo_name, None)
+
+    if timer is not None:
+        timer.cancel()
+
+    timer = threading.Timer(debounce_seconds, _flush, args=(repo_name,))
+    timer.daemon = True
+    _timers[repo_name] = timer
+    timer.start()
+
+
+def _flush(repo_name: str) -> None:
+    repo_lock = repo_utils.get_repo_lock(repo_name)
+
+    if not repo_lock.acquire(blocking=False):
+        # a request or worker job is running git in this repository, wait for it to finish before looking at the result
+        with _pending_guard:
+            _arm_timer(repo_name)
+
+        return
+
+    try:
+        with _pending_guard:
+            pending = _pending.pop(repo_name, None)
+            _timers.pop(repo_name, None)
+
+        if pending is None:
+            return
+
+        if pending['last_event'] <= repo_lock.get_released_time():
+            # all of these events happened before a request or worker job finished in this repository, any refs
+            # moved were moved by that job and are already recorded. Changes to the working tree are still compared
+            # against the index
+            pending['refs_changed'] = False
+
+        repo_utils.invalidate_repository(repo_name, pending['changed'], pending['removed'], pending['refs_changed'],
+                                         pending['rescan'])
+
+    except Exception as e:
+        # never let an error kill the timer thread silently
+        print(f'Could not invalidate repository {repo_name}: {e}')
+
+    finally:
+        repo_lock.release()
+        # this runs on its own thread, do not leave the db connection open
+        connection.close()
+
+
+class RepositoryEventHandler(FileSystemEventHandler):
+    """
+    Collects file system events per repository and invalidates each repository once the events have settled
+    """
+
+    def __init__(self, repositories_dir: Path):
+        super().__init__()
+        self.repositories_dir = repositories_dir
+
+    def on_any_event(self, event):
+        if event.event_type == 'moved':
+            source = _get_repo_path(self.repositories_dir, event.src_path)
+            if source is not None:
+                _schedule(source[0], source[1], True, event.is_directory)
+
+            destination = _get_repo_path(self.repositories_dir, event.dest_path)
+            if destination is not None:
+                _schedule(destination[0], destination[1], False, event.is_directory)
+
+            return
+
+        if event.event_type not in ('created', 'modified', 'deleted'):
+            return
+
+        if event.event_type == 'modified' and Path(event.src_path).name.startswith('.cnc_tmp_'):
+            # temp files are registered once when created
+            return
+
+        if event.is_directory and event.event_type == 'modified':
+            # the file events in this directory are reported separately
+            return
+
+        repo_path = _get_repo_path(self.repositories_dir, event.src_path)
+
+        if repo_path is not None:
+            _schedule(repo_path[0], repo_path[1], event.event_type == 'deleted', event.is_directory)
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panhandler', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepositoryIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('head', models.CharField(default='', max_length=64)),
+                ('lint_head', models.CharField(default='', max_length=64)),
+                ('lint_json', models.TextField(default='[]')),
+            ],
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panhandler', '0002_repositoryindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repositoryindex',
+            name='clone_options_json',
+            field=models.TextField(default='{}'),
+        ),
+    ]
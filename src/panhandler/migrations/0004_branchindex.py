@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panhandler', '0003_repositoryindex_clone_options_json'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BranchIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repo_name', models.CharField(max_length=200)),
+                ('branch', models.CharField(max_length=200)),
+                ('head', models.CharField(default='', max_length=64)),
+                ('skillets_json', models.TextField(default='[]')),
+                ('lint_json', models.TextField(default='[]')),
+                ('last_used', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('repo_name', 'branch')},
+            },
+        ),
+    ]
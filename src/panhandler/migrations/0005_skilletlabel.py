@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panhandler', '0004_branchindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkilletLabel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skillet_name', models.CharField(db_index=True, max_length=200)),
+                ('key', models.CharField(max_length=200)),
+                ('value', models.CharField(max_length=255)),
+            ],
+            options={
+                'index_together': {('key', 'value')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panhandler', '0005_skilletlabel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkilletSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('repo_name', models.CharField(default='', max_length=200)),
+                ('label', models.CharField(db_index=True, default='', max_length=200)),
+                ('description', models.TextField(default='')),
+                ('type', models.CharField(db_index=True, default='', max_length=64)),
+                ('order', models.IntegerField(db_index=True, null=True)),
+            ],
+        ),
+    ]
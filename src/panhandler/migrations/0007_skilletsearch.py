@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+def create_search_table(apps, schema_editor):
+    # the search index is only available on sqlite builds with the FTS5 extension
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    try:
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS panhandler_skilletsearch USING fts5("
+            "name, label, description, variables, snippets, type UNINDEXED, "
+            "tokenize = 'unicode61', prefix = '2 3')"
+        )
+
+    except OperationalError as oe:
+        print(f'Skillet search index is not available: {oe}')
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute('DROP TABLE IF EXISTS panhandler_skilletsearch')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panhandler', '0006_skilletsummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
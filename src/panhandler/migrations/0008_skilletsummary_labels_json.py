@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+def clear_skillet_summaries(apps, schema_editor):
+    # summaries are rebuilt with their labels the next time they are used
+    apps.get_model('panhandler', 'SkilletSummary').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panhandler', '0007_skilletsearch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skilletsummary',
+            name='labels_json',
+            field=models.TextField(default='{}'),
+        ),
+        migrations.RunPython(clear_skillet_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+import ast
+import json
+
+from django.db import migrations, models
+
+
+def parse_categories(categories: str) -> list:
+    # categories were stored as a json string or, when saved directly from the form, as a python list repr
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            value = parse(categories)
+
+        except (ValueError, SyntaxError, TypeError):
+            continue
+
+        if isinstance(value, list):
+            return [str(v) for v in value]
+
+        if isinstance(value, str):
+            return [value]
+
+    return list()
+
+
+def convert_categories(apps, schema_editor):
+    Collection = apps.get_model('panhandler', 'Collection')
+
+    for collection in Collection.objects.all():
+        collection.categories_json = parse_categories(collection.categories)
+        collection.save(update_fields=['categories_json'])
+
+
+def revert_categories(apps, schema_editor):
+    Collection = apps.get_model('panhandler', 'Collection')
+
+    for collection in Collection.objects.all():
+        collection.categories = json.dumps(collection.categories_json)[:64]
+        collection.save(update_fields=['categories'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panhandler', '0009_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='categories_json',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(convert_categories, revert_categories),
+        migrations.RemoveField(
+            model_name='collection',
+            name='categories',
+        ),
+        migrations.RenameField(
+            model_name='collection',
+            old_name='categories_json',
+            new_name='categories',
+        ),
+        migrations.AlterField(
+            model_name='collection',
+            name='name',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
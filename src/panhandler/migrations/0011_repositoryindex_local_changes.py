@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panhandler', '0010_collection_categories_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repositoryindex',
+            name='local_changes',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class Favorite(models.Model):
@@ -6,7 +7,81 @@ class Favorite(models.Model):
 
 
 class Collection(models.Model):
-    name = models.CharField(max_length=200)
+    name = models.CharField(max_length=200, db_index=True)
     description = models.CharField(max_length=200)
-    categories = models.CharField(max_length=64, default="[]")
+    categories = models.JSONField(default=list)
     skillets = models.ManyToManyField(Favorite)
+
+
+class RepositoryIndex(models.Model):
+    """
+    Tracks the state of the skillet index for each imported repository
+    """
+    name = models.CharField(max_length=200, unique=True)
+    # commit sha of the HEAD that was last indexed
+    head = models.CharField(max_length=64, default='')
+    # True if the working tree had changes that are not committed when it was last indexed
+    local_changes = models.BooleanField(default=False)
+    # commit sha of the HEAD that the lint results were gathered from
+    lint_head = models.CharField(max_length=64, default='')
+    lint_json = models.TextField(default='[]')
+    # shallow, partial, and sparse checkout options used when this repository was cloned
+    clone_options_json = models.TextField(default='{}')
+
+
+class BranchIndex(models.Model):
+    """
+    Snapshot of the skillet index of a repository for a single branch, allows switching back to a previously used
+    branch without re-indexing
+    """
+    repo_name = models.CharField(max_length=200)
+    branch = models.CharField(max_length=200)
+    # commit sha of the branch HEAD this snapshot was taken from
+    head = models.CharField(max_length=64, default='')
+    # list of skillet_json strings exactly as stored in the skillet index
+    skillets_json = models.TextField(default='[]')
+    lint_json = models.TextField(default='[]')
+    last_used = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('repo_name', 'branch')
+
+
+class SkilletLabel(models.Model):
+    """
+    Inverted index of skillet labels, one record per skillet, label, and value. List values such as collection are
+    stored as one record per item
+    """
+    skillet_name = models.CharField(max_length=200, db_index=True)
+    key = models.CharField(max_length=200)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        index_together = ('key', 'value')
+
+
+class SkilletSummary(models.Model):
+    """
+    Summary of each indexed skillet used to page, sort, filter, and render skillet lists without loading the full
+    skillets
+    """
+    name = models.CharField(max_length=200, unique=True)
+    repo_name = models.CharField(max_length=200, default='')
+    label = models.CharField(max_length=200, default='', db_index=True)
+    description = models.TextField(default='')
+    type = models.CharField(max_length=64, default='', db_index=True)
+    # order label of the skillet, null if the skillet builder did not specify one
+    order = models.IntegerField(null=True, db_index=True)
+    labels_json = models.TextField(default='{}')
+
+
+class CatalogVersion(models.Model):
+    """
+    Single record holding the catalog version. The version is incremented every time the skillet index changes and
+    is used to build cache keys and ETags. The favorites are versioned separately, so editing them never invalidates
+    the rest of the catalog
+    """
+    version = models.BigIntegerField(default=0)
+    last_modified = models.DateTimeField(default=timezone.now)
+    favorites_version = models.BigIntegerField(default=0)
+    favorites_modified = models.DateTimeField(default=timezone.now)
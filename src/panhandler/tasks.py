@@ -2,6 +2,8 @@ import time
 
 from celery import shared_task
 
+from panhandler.lib import repo_utils
+
 
 @shared_task
 def panhandler_test(count: int) -> str:
@@ -12,3 +14,46 @@ def panhandler_test(count: int) -> str:
         i = i + 1
 
     return f'Counted up to {count}'
+
+
+def _progress_reporter(task):
+    """
+    Returns a callable that records the progress of a repository job as custom 'PROGRESS' task state
+
+    :param task: bound celery task
+    :return: callable accepting a step description and a percentage complete
+    """
+
+    def report(step: str, percent: int) -> None:
+        # eager tasks and disabled result backends have nowhere to store state
+        if task.request.id is None or task.request.is_eager:
+            return
+
+        task.update_state(state='PROGRESS', meta={'step': step, 'percent': percent})
+
+    return report
+
+
+@shared_task(bind=True)
+def import_repository(self, repo_name: str, url: str, clone_options: dict = None) -> dict:
+    return repo_utils.import_repository(repo_name, url, clone_options, progress=_progress_reporter(self))
+
+
+@shared_task(bind=True)
+def update_repository(self, repo_name: str, branch: str = None) -> dict:
+    return repo_utils.update_repository(repo_name, branch, progress=_progress_reporter(self))
+
+
+@shared_task(bind=True)
+def update_all_repositories(self) -> dict:
+    return repo_utils.refresh_all_repositories(progress=_progress_reporter(self))
+
+
+@shared_task(bind=True)
+def import_dependencies(self, repo_name: str) -> dict:
+    return repo_utils.import_dependencies(repo_name, progress=_progress_reporter(self))
+
+
+@shared_task(bind=True)
+def bulk_import_repositories(self, repositories: list, clone_options: dict = None) -> dict:
+    return repo_utils.bulk_import_repositories(repositories, clone_options, progress=_progress_reporter(self))
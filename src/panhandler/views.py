@@ -34,6 +34,7 @@ from typing import Any
 
 import lxml
 import yaml
+from celery.result import AsyncResult
 from django.conf import settings
 from django.contrib import messages
 from django.forms import Form
@@ -41,11 +42,16 @@ from django.forms import HiddenInput
 from django.forms import fields
 from django.forms import widgets
 from django.http import HttpResponse
+from django.http import JsonResponse
 from django.http import HttpResponseRedirect
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
 from django.utils.safestring import mark_safe
 from django.views.generic import RedirectView
 from django.views.generic import View
+from kombu.exceptions import OperationalError
 from panforge import Report
 from skilletlib import Panoply
 from skilletlib import Panos
@@ -64,10 +70,7 @@ from pan_cnc.lib import cnc_utils
 from pan_cnc.lib import db_utils
 from pan_cnc.lib import git_utils
 from pan_cnc.lib import snippet_utils
-from pan_cnc.lib import task_utils
 from pan_cnc.lib.exceptions import DuplicateSkilletException
-from pan_cnc.lib.exceptions import ImportRepositoryException
-from pan_cnc.lib.exceptions import RepositoryPermissionsException
 from pan_cnc.lib.exceptions import SnippetRequiredException
 from pan_cnc.lib.validators import FqdnOrIp
 from pan_cnc.views import CNCBaseAuth
@@ -75,11 +78,95 @@ from pan_cnc.views import CNCBaseFormView
 from pan_cnc.views import CNCView
 from pan_cnc.views import EditTargetView
 from pan_cnc.views import ProvisionSnippetView
+from panhandler.lib import api_utils
+from panhandler.lib import app_skillet_utils
 from panhandler.lib import app_utils
+from panhandler.lib import catalog_utils
+from panhandler.lib import dependency_utils
+from panhandler.lib import index_utils
+from panhandler.lib import object_store_utils
+from panhandler.lib import repo_utils
+from panhandler.lib import search_utils
+from panhandler.lib import skillet_cache_utils
+from panhandler.lib import watch_utils
+from . import tasks
 from .models import Collection
 from .models import Favorite
 
 
+class CatalogETagMixin:
+    """
+    Adds ETag and Last-Modified headers derived from the catalog version to pages that only change when the catalog
+    changes, and answers conditional requests for unchanged pages with 304 Not Modified. Pages that show the
+    favorites set include_favorites, so they change when the favorites change as well
+    """
+
+    include_favorites = False
+
+    def is_conditional_request_allowed(self) -> bool:
+        """
+        Pages must always be rendered when there are messages waiting to be displayed
+
+        :return: bool
+        """
+        return len(messages.get_messages(self.request)) == 0
+
+    def is_cacheable_response(self, response) -> bool:
+        """
+        Subclasses can override this to prevent caching of a rendered page that is not complete
+
+        :param response: rendered response
+        :return: bool
+        """
+        return True
+
+    def get(self, request, *args, **kwargs) -> Any:
+        # pages contain per session details such as the csrf token, never share an ETag between sessions
+        etag = catalog_utils.get_catalog_etag(request.path, request.session.session_key or '',
+                                              include_favorites=self.include_favorites)
+        last_modified = catalog_utils.get_last_modified(self.include_favorites)
+        last_modified_timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+
+        if self.is_conditional_request_allowed():
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified_timestamp)
+
+            if not_modified is not None:
+                return not_modified
+
+        response = super().get(request, *args, **kwargs)
+
+        if response.status_code == 200 and self.is_conditional_request_allowed() and \
+                self.is_cacheable_response(response):
+            response['ETag'] = etag
+            if last_modified_timestamp is not None:
+                response['Last-Modified'] = http_date(last_modified_timestamp)
+
+            # browsers must check with us before reusing the page
+            patch_cache_control(response, private=True, no_cache=True)
+
+        return response
+
+
+class ReloadAppSkilletsView(CNCBaseAuth, RedirectView):
+    """
+    Reloads the app skillets from disk, useful while developing the panhandler forms. The registry is kept per
+    process, so this only reloads the app skillets of the server process handling this request. Restart the server
+    to reload them everywhere
+    """
+
+    def get_redirect_url(self, *args, **kwargs):
+        try:
+            app_skillets = app_skillet_utils.reload_app_skillets('panhandler')
+
+        except SkilletLoaderException as sle:
+            messages.add_message(self.request, messages.ERROR, f'Could not reload app skillets: {sle}')
+            return self.request.session.get('last_page', '/')
+
+        messages.add_message(self.request, messages.SUCCESS, f'Reloaded {len(app_skillets)} app skillets in this '
+                                                             f'server process')
+        return self.request.session.get('last_page', '/')
+
+
 class WelcomeView(CNCView):
     template_name = "panhandler/welcome.html"
 
@@ -147,19 +234,11 @@ class PanhandlerAppFormView(CNCBaseFormView):
 
     def load_skillet_by_name(self, skillet_name) -> (dict, None):
         """
-        Loads application specific skillet
+        Loads application specific skillet from the app skillet registry
         :param skillet_name:
         :return:
         """
-
-        application_skillets_dir = Path(os.path.join(settings.SRC_PATH, self.app_dir, 'snippets'))
-        skillet_loader = SkilletLoader()
-        app_skillets = skillet_loader.load_all_skillets_from_dir(application_skillets_dir)
-        for skillet in app_skillets:
-            if skillet.name == skillet_name:
-                return skillet.skillet_dict
-
-        return None
+        return app_skillet_utils.get_app_skillet(self.app_dir, skillet_name)
 
     def get(self, request, *args, **kwargs) -> Any:
         """
@@ -179,7 +258,65 @@ class PanhandlerAppFormView(CNCBaseFormView):
         return super().get(request, *args, **kwargs)
 
 
-class ImportRepoView(PanhandlerAppFormView):
+class RepositoryJobMixin:
+    """
+    Runs long running repository jobs such as clone, update, and re-index as background celery tasks. The job id is
+    tracked in the user session so the progress can be queried and the results added as messages once complete
+    """
+
+    def start_repository_job(self, task, *args) -> str:
+        """
+        Starts the given task in the background and returns the url of the job progress page
+
+        :param task: celery shared task to start
+        :param args: arguments for the task
+        :return: url to redirect to
+        """
+        if cnc_utils.is_testing():
+            # run the job in process when testing so the results are immediately available
+            return self.finish_repository_job(task.apply(args=args).get())
+
+        try:
+            async_result = task.delay(*args)
+
+        except OperationalError as oe:
+            print('Could not contact the task broker, running repository job in process')
+            print(oe)
+            return self.finish_repository_job(task.apply(args=args).get())
+
+        jobs = self.request.session.get('repository_jobs', list())
+        jobs.append(async_result.id)
+        # only keep track of the most recent jobs
+        self.request.session['repository_jobs'] = jobs[-10:]
+
+        return f'/panhandler/repo_job/{async_result.id}'
+
+    def finish_repository_job(self, result: dict) -> str:
+        """
+        Adds all messages from a completed repository job to the user session
+
+        :param result: job result dict returned from the task
+        :return: url to redirect to
+        """
+        for level, message in result.get('messages', list()):
+            messages.add_message(self.request, level, message)
+
+        if 'summary' in result:
+            self.request.session['update_all_summary'] = result['summary']
+
+        return result.get('redirect', '/panhandler/repos')
+
+    def is_repository_job(self, job_id: str) -> bool:
+        """
+        Only allow access to jobs that were started from this session
+
+        :param job_id: celery task id
+        :return: bool
+        """
+        return job_id in self.request.session.get('repository_jobs', list())
+
+
+class ImportRepoView(RepositoryJobMixin, PanhandlerAppFormView):
     # define initial dynamic form from this snippet metadata
     snippet = 'import_repo'
     next_url = '/provision'
@@ -244,107 +381,86 @@ class ImportRepoView(PanhandlerAppFormView):
                 messages.add_message(self.request, messages.SUCCESS, 'Added the following SSH Host key to known_hosts: '
                                                                      f'{message}')
 
-        try:
-            # fix for $56 - do not use github api for clone_url as it always defaults to HTTPS
-            # instead just use the url supplied by the user
-            message = git_utils.clone_repository(repo_dir, repo_name, url)
-            print(message)
-        except RepositoryPermissionsException:
-            messages.add_message(self.request, messages.ERROR,
-                                 'SSH Permissions Error. Please add your SSH Public key to the upstream repository')
-
-            return HttpResponseRedirect('/ssh_key')
-
-        except ImportRepositoryException as ire:
-            messages.add_message(self.request, messages.ERROR, f'Could not Import Repository: {ire}')
-
-        else:
-            repos = cnc_utils.get_long_term_cached_value(self.app_dir, 'imported_repositories')
-
-            # FIX for #148
-            if repos is None:
-                repos = list()
-
-            try:
-                repo_detail = git_utils.get_repo_details(repo_name, repo_dir, self.app_dir)
-
-            except RepositoryPermissionsException:
-                messages.add_message(self.request, messages.ERROR,
-                                     'SSH Permissions Error. Please add the Deploy key to the upstream repository')
-
-                return HttpResponseRedirect('/ssh_key')
-
-            repos.append(repo_detail)
-            cnc_utils.set_long_term_cached_value(self.app_dir, 'imported_repositories', repos, 604800,
-                                                 'imported_git_repos')
+        # shallow, partial, and sparse clones reduce the import time and disk usage of large repositories
+        clone_options = repo_utils.get_clone_options(workflow.get('clone_mode', 'full'),
+                                                     workflow.get('clone_depth', 1),
+                                                     workflow.get('sparse_checkout', 'no'))
 
-            try:
-                db_utils.initialize_repo(repo_detail)
-
-            except DuplicateSkilletException as dse:
-                messages.add_message(self.request, messages.ERROR, str(dse))
-                db_utils.update_skillet_cache()
-                return HttpResponseRedirect('repos')
+        # clone and index in the background, a slow upstream should not tie up this worker
+        return HttpResponseRedirect(self.start_repository_job(tasks.import_repository, repo_name, url, clone_options))
 
-            debug_errors = snippet_utils.debug_snippets_in_repo(Path(repo_dir), list())
 
-            loaded_skillets = db_utils.load_skillets_from_repo(repo_name)
+class BulkImportReposView(RepositoryJobMixin, CNCBaseAuth, View):
+    """
+    Imports many repositories at once. Accepts either a form post of selected recommended links and an optional
+    manifest, or a YAML or JSON manifest as the request body
+    """
 
-            # check each snippet found for dependencies
-            for skillet in loaded_skillets:
-                for depends in skillet['depends']:
-                    url = depends.get('url', None)
-                    branch = depends.get('branch', 'master')
+    manifest_content_types = ('application/json', 'application/x-yaml', 'application/yaml', 'text/yaml')
 
-                    # now check each repo to see if we already have it, add an error if not
-                    found = False
+    def post(self, request, *args, **kwargs) -> Any:
+        is_api = request.content_type in self.manifest_content_types
+        repositories = list()
 
-                    for repo in repos:
-                        if repo['url'] == url and repo['branch'] == branch:
-                            found = True
-                            break
+        try:
+            if is_api:
+                repositories = app_utils.load_repository_manifest(request.body.decode('utf-8'))
 
-                    if not found:
-                        messages.add_message(self.request, messages.ERROR,
-                                             f'Unresolved Dependency found!! Please ensure you import the following'
-                                             f'repository: {url} with branch: {branch}')
+            else:
+                selected = request.POST.getlist('recommended')
+                for link in app_utils.get_recommended_links():
+                    if link.get('name', '') in selected:
+                        repositories.append(app_utils.get_repository_from_link(link))
 
-            if debug_errors:
-                messages.add_message(self.request, messages.ERROR,
-                                     'Found Skillets with errors! Please open an issue on '
-                                     'this repository to help resolve this issue')
+                manifest = request.POST.get('manifest', '').strip()
+                if manifest:
+                    repositories.extend(app_utils.load_repository_manifest(manifest))
 
-                for d in debug_errors:
-                    if 'err_list' in d and 'path' in d and 'severity' in d:
+        except (ValueError, UnicodeDecodeError) as ve:
+            if is_api:
+                return JsonResponse({'error': str(ve)}, status=400)
 
-                        for e in d['err_list']:
+            messages.add_message(self.request, messages.ERROR, f'Could not load repositories: {ve}')
+            return HttpResponseRedirect('/panhandler/import')
 
-                            if d['severity'] == 'warn':
-                                level = messages.WARNING
+        if not repositories:
+            if is_api:
+                return JsonResponse({'error': 'No repositories found to import'}, status=400)
 
-                            else:
-                                level = messages.ERROR
+            messages.add_message(self.request, messages.ERROR, 'No repositories selected')
+            return HttpResponseRedirect('/panhandler/import')
 
-                            messages.add_message(self.request, level, f'Skillet: {d["path"]}\n\nError: {e}')
-            else:
-                messages.add_message(self.request, messages.INFO, 'Imported Repository Successfully')
+        redirect_url = self.start_repository_job(tasks.bulk_import_repositories, repositories)
 
-        # fix for gl #3 - be smarter about clearing the cache
-        db_utils.update_skillet_cache()
-        # snippet_utils.invalidate_snippet_caches(self.app_dir)
+        if is_api:
+            return JsonResponse({'redirect': redirect_url})
 
-        # git_utils.update_repo_in_cache(repo_name, repo_dir, repo_detail)
-        return HttpResponseRedirect('repos')
+        return HttpResponseRedirect(redirect_url)
 
 
-class ListReposView(CNCView):
+class ListReposView(CatalogETagMixin, CNCView):
     template_name = 'panhandler/repos.html'
     app_dir = 'panhandler'
 
+    def is_conditional_request_allowed(self) -> bool:
+        # the summary of an update all action is only shown once
+        return 'update_all_summary' not in self.request.session and super().is_conditional_request_allowed()
+
+    def is_cacheable_response(self, response) -> bool:
+        # repositories that were still loading are filled in by the browser
+        return not response.context_data.get('pending_repos', None)
+
     def get_context_data(self, **kwargs):
 
         context = super().get_context_data(**kwargs)
 
+        # display the results of the last update all repositories action if any
+        context['update_summary'] = self.request.session.pop('update_all_summary', list())
+        context.update(catalog_utils.get_fragment_cache_context())
+
+        # keep the cached repository details up to date as repositories change on disk
+        watch_utils.start_repository_watcher()
+
         snippets_dir = Path(os.path.join(os.path.expanduser('~/.pan_cnc'), 'panhandler', 'repositories'))
 
         try:
@@ -364,42 +480,57 @@ class ListReposView(CNCView):
             context['repos'] = list()
             return context
 
-        repos = cnc_utils.get_long_term_cached_value(self.app_dir, 'imported_repositories')
+        repos = cnc_utils.get_long_term_cached_value(self.app_dir,
+                                                     catalog_utils.get_versioned_key('imported_repositories'))
 
         if repos is not None:
             print('Returning cached repos')
             context['repos'] = repos
 
         else:
-            repos = list()
-
-            for d in snippets_dir.iterdir():
-                git_dir = d.joinpath('.git')
-
-                if git_dir.exists() and git_dir.is_dir():
-                    repo_detail = db_utils.get_repository_details(d.name)
-                    if not repo_detail:
-                        repo_detail = git_utils.get_repo_details(d.name, d, self.app_dir)
-                        # nembery - 022521 - seems like duplicate logic here? Commenting out as it seems like this has
-                        # no effect
-                        # db_utils.initialize_repo(repo_detail)
-                    repos.append(repo_detail)
-                    try:
-                        db_utils.initialize_repo(repo_detail)
-                    except DuplicateSkilletException:
-                        print('Refusing to index duplicate skillet names...')
-
-                    continue
-
-            # cache the repos list for 1 week. this will be cleared when we import a new repository or otherwise
-            # change the repo list somehow
-            cnc_utils.set_long_term_cached_value(self.app_dir, 'imported_repositories', repos, 604800,
-                                                 'imported_git_repos')
+            # gather details concurrently, any repositories that are slow to load are rendered as loading and
+            # filled in by the browser once available
+            (repos, pending_repos) = repo_utils.list_repositories()
+
+            if pending_repos:
+                # do not cache a partial list
+                context['pending_repos'] = pending_repos
+
+            else:
+                # cache the repos list for 1 week. this will be cleared when we import a new repository or
+                # otherwise change the repo list somehow. The watcher keeps this up to date, so it can be kept
+                # longer while active
+                cnc_utils.set_long_term_cached_value(self.app_dir,
+                                                     catalog_utils.get_versioned_key('imported_repositories'),
+                                                     repos, watch_utils.get_cache_life(604800),
+                                                     'imported_git_repos')
             context['repos'] = repos
 
         return context
 
 
+class RepoStatusView(CNCBaseAuth, View):
+    """
+    Returns the details of a repository that was still loading when the repository list was rendered as JSON
+    """
+
+    def get(self, request, *args, **kwargs) -> Any:
+        repo_name = self.kwargs['repo_name']
+
+        repo_detail = repo_utils.get_repository_listing_status(repo_name)
+
+        if repo_detail is None:
+            return JsonResponse({'name': repo_name, 'ready': False})
+
+        return JsonResponse({
+            'name': repo_name,
+            'ready': True,
+            'branch': repo_detail.get('branch', ''),
+            'description': repo_detail.get('description', ''),
+            'last_updated': repo_detail.get('last_updated', ''),
+        })
+
+
 class RepoDetailsView(CNCView):
     template_name = 'panhandler/repo_detail.html'
     app_dir = 'panhandler'
@@ -440,18 +571,23 @@ class RepoDetailsView(CNCView):
             repo_detail = git_utils.get_repo_details(repo_name, repo_dir, self.app_dir)
             db_utils.update_repository_details(repo_name, repo_detail)
 
+        skillets_from_repo = list()
+        collections = list()
+
+        is_indexed = RepositoryDetails.objects.filter(name=repo_name).exists()
+
         # initialize will set up db object only if needed
         try:
-            skillets_from_repo = db_utils.initialize_repo(repo_detail)
+            skillets_from_repo = index_utils.initialize_repo(repo_detail)
 
         except DuplicateSkilletException:
             print('Refusing to index duplicate skillet names...')
 
-        if 'error' in repo_detail:
-            messages.add_message(self.request, messages.ERROR, repo_detail['error'])
+        if not is_indexed:
+            # the catalog and any cached fragments of this repository do not include the skillets indexed above
+            index_utils.update_skillet_cache([repo_name])
 
         # get a list of all collections found in this repo
-        collections = list()
         for skillet in skillets_from_repo:
             if 'labels' in skillet and 'collection' in skillet['labels']:
                 collection = skillet['labels']['collection']
@@ -465,6 +601,9 @@ class RepoDetailsView(CNCView):
                         if collection_member not in collections:
                             collections.append(collection_member)
 
+        if 'error' in repo_detail:
+            messages.add_message(self.request, messages.ERROR, repo_detail['error'])
+
         repo_record = RepositoryDetails.objects.get(name=repo_name)
 
         status = git_utils.get_git_status(repo_dir)
@@ -481,10 +620,14 @@ class RepoDetailsView(CNCView):
         context['repo_record'] = repo_record
         context['snippets'] = skillets_from_repo
         context['collections'] = collections
+        context['missing_dependencies'] = dependency_utils.get_missing_dependencies([repo_name])
+        # lint results are gathered on import and update, never rescan the repository here
+        context['lint_results'] = index_utils.get_stored_lint_results(repo_name)
+        context.update(catalog_utils.get_fragment_cache_context())
         return context
 
 
-class UpdateRepoView(CNCBaseAuth, RedirectView):
+class UpdateRepoView(RepositoryJobMixin, CNCBaseAuth, RedirectView):
 
     def get_redirect_url(self, *args, **kwargs):
         repo_name = kwargs['repo_name']
@@ -496,137 +639,25 @@ class UpdateRepoView(CNCBaseAuth, RedirectView):
             messages.add_message(self.request, messages.ERROR, 'Repository directory does not exist!')
             return f'/panhandler/repo_detail/{repo_name}'
 
-        # always clear the repo detail cache to pull new branches and commits
-        cnc_utils.set_long_term_cached_value(self.app_dir, f'{repo_name}_detail', None, 0, 'git_repo_details')
-
-        msg = git_utils.update_repo(repo_dir, branch)
-
-        repo_detail = git_utils.get_repo_details(repo_name, repo_dir, self.app_dir)
-        repo_detail_json = json.dumps(repo_detail)
-
-        (repository_object, needs_index) = RepositoryDetails.objects.get_or_create(
-            name=repo_name,
-            defaults={'url': repo_detail.get('url'),
-                      'details_json': repo_detail_json
-                      }
-        )
-
-        level = messages.INFO
-
-        # get the previous repo details json object from the db
-        previous_details_json = repository_object.details_json
-        previous_details = json.loads(previous_details_json)
-
-        # check previous commit log and verify if we have any local commits
-        # use the current commit log and compare against the last commit log stored in the db
-        found_commits = list()
-        previous_commits = list()
-        for new_commit in repo_detail.get('commits', []):
-            found_commits.append(new_commit.get('id', ''))
-
-        for commit in previous_details.get('commits', []):
-            previous_commits.append(commit.get('id', ''))
-
-        for c in found_commits:
-            if c not in previous_commits:
-                # we have a commit in the commit log that was not previously recorded in the db
-                # this means we need to re-index skillets
-                needs_index = True
-                break
-
-        if 'Error' in msg:
-            level = messages.ERROR
-            cnc_utils.evict_cache_items_of_type(self.app_dir, 'imported_git_repos')
-
-        elif 'updated' in msg or 'Checked out new' in msg:
-            # msg updated will catch both switching branches as well as new commits
-            level = messages.INFO
-
-            # remove all python3 init touch files if there is an update
-            task_utils.python3_reset_init(repo_dir)
-
-            # set needs_index flag regardless of creation status
-            needs_index = True
-
-        else:
-            print(f'update repo msg was: {msg}')
-
-        messages.add_message(self.request, level, msg)
-
-        # check if there are new branches available
-        repo_branches = git_utils.get_repo_branches_from_dir(repo_dir)
-        if repo_detail['branches'] != repo_branches:
-            messages.add_message(self.request, messages.INFO, 'New Branches are available')
-
-        # check each snippet found for dependencies
-        repos = cnc_utils.get_long_term_cached_value(self.app_dir, 'imported_repositories')
-
-        loaded_skillets = list()
+        return self.start_repository_job(tasks.update_repository, repo_name, branch)
 
-        if needs_index:
-            try:
-                loaded_skillets = db_utils.refresh_skillets_from_repo(repo_name)
-
-            except DuplicateSkilletException as dse:
-                messages.add_message(self.request, messages.ERROR, str(dse))
-
-        else:
-            loaded_skillets = db_utils.load_skillets_from_repo(repo_name)
 
-        for skillet in loaded_skillets:
-            for depends in skillet['depends']:
-                url = depends.get('url', None)
-                branch = depends.get('branch', 'master')
-
-                # now check each repo to see if we already have it, add an error if not
-                found = False
+class ImportDependenciesView(RepositoryJobMixin, CNCBaseAuth, RedirectView):
+    """
+    Imports all missing dependencies of a repository, including the dependencies of those dependencies
+    """
 
-                for repo in repos:
-                    if repo['url'] == url and repo['branch'] == branch:
-                        found = True
-                        break
+    def get_redirect_url(self, *args, **kwargs):
+        repo_name = kwargs['repo_name']
 
-                if not found:
-                    messages.add_message(self.request, messages.ERROR,
-                                         f'Unresolved Dependency found!! Please ensure you import the following'
-                                         f' repository: {url} with branch: {branch}')
-
-        debug_errors = snippet_utils.debug_snippets_in_repo(Path(repo_dir), list())
-
-        if debug_errors:
-            messages.add_message(self.request, messages.ERROR, 'Found Skillets with errors! Please open an issue on '
-                                                               'this repository to help resolve this issue')
-            for d in debug_errors:
-                if 'err_list' in d and 'path' in d:
-                    for e in d['err_list']:
-                        if d['severity'] == 'warn':
-                            level = messages.WARNING
-
-                        else:
-                            level = messages.ERROR
-
-                        messages.add_message(self.request, level, f'Skillet: {d["path"]}\n\nError: {e}')
-
-        # Remove temp files as part of fix for #187
-        path = Path(repo_dir)
-        touch_files = path.rglob('.cnc_tmp_*')
-        for tf in touch_files:
-            print(f'Removing temp file: {tf}')
-            tf.unlink()
-
-        repository_object.details_json = json.dumps(repo_detail)
-        repository_object.save()
-
-        # manage cached items as well
-        git_utils.update_repo_detail_in_cache(repo_detail, self.app_dir)
-        # fix for gl #3 - be smarter about clearing the cache
-        db_utils.update_skillet_cache()
-        # snippet_utils.invalidate_snippet_caches(self.app_dir)
+        if not RepositoryDetails.objects.filter(name=repo_name).exists():
+            messages.add_message(self.request, messages.ERROR, 'Repository does not exist!')
+            return '/panhandler/repos'
 
-        return f'/panhandler/repo_detail/{repo_name}'
+        return self.start_repository_job(tasks.import_dependencies, repo_name)
 
 
-class UpdateAllReposView(CNCBaseAuth, RedirectView):
+class UpdateAllReposView(RepositoryJobMixin, CNCBaseAuth, RedirectView):
 
     def get_redirect_url(self, *args, **kwargs):
         user_dir = os.path.expanduser('~')
@@ -651,55 +682,87 @@ class UpdateAllReposView(CNCBaseAuth, RedirectView):
                                  'Could not update, repositories directory does not exist')
             return '/panhandler/repos'
 
-        err_condition = False
-        updates = list()
+        return self.start_repository_job(tasks.update_all_repositories)
 
-        for d in base_path.iterdir():
-            git_dir = d.joinpath('.git')
 
-            if git_dir.exists() and git_dir.is_dir():
-                msg = git_utils.update_repo(str(d))
+class RepositoryJobView(RepositoryJobMixin, CNCView):
+    template_name = 'panhandler/repo_job.html'
+    app_dir = 'panhandler'
 
-                if 'Error' in msg:
-                    print(f'Error updating Repository: {d.name}')
-                    print(msg)
-                    messages.add_message(self.request, messages.ERROR, f'Could not update repository {d.name}')
-                    err_condition = True
+    def get(self, request, *args, **kwargs):
+        if not self.is_repository_job(self.kwargs['job_id']):
+            messages.add_message(self.request, messages.ERROR, 'Could not find that repository job')
+            return HttpResponseRedirect('/panhandler/repos')
 
-                elif 'updated' in msg or 'Checked out new' in msg:
-                    print(f'Updated Repository: {d.name}')
-                    updates.append(d.name)
-                    cnc_utils.set_long_term_cached_value(self.app_dir, f'{d.name}_detail', None, 0, 'git_repo_details')
+        return super().get(request, *args, **kwargs)
 
-                    # remove all python3 init touch files if there is an update
-                    task_utils.python3_reset_init(str(d))
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['job_id'] = self.kwargs['job_id']
+        return context
 
-                    # Remove temp files as part of fix for #187
-                    touch_files = d.rglob('.cnc_tmp_*')
-                    for tf in touch_files:
-                        print(f'Removing temp file: {tf}')
-                        tf.unlink()
 
-                    # re-index skillets in this dir
-                    try:
-                        # go ahead and refresh all the found skillet
-                        db_utils.refresh_skillets_from_repo(str(d))
+class RepositoryJobStatusView(RepositoryJobMixin, CNCBaseAuth, View):
+    """
+    Returns the current state and progress of a repository job as JSON
+    """
 
-                    except DuplicateSkilletException as dse:
-                        messages.add_message(self.request, messages.ERROR, str(dse))
-                        messages.add_message(self.request, messages.ERROR,
-                                             'This repository may not be updated correctly!'
-                                             'Please remove the offending skillet and try again!')
+    def get(self, request, *args, **kwargs) -> Any:
+        job_id = self.kwargs['job_id']
 
-        if not err_condition:
-            repos = ", ".join(updates)
-            messages.add_message(self.request, messages.SUCCESS, f'Successfully Updated repositories: {repos}')
+        if not self.is_repository_job(job_id):
+            return JsonResponse({'job_id': job_id, 'error': 'Unknown Job'}, status=404)
 
-        # fix for gl #3 - be smarter about clearing the cache
-        db_utils.update_skillet_cache()
-        # snippet_utils.invalidate_snippet_caches(self.app_dir)
-        cnc_utils.evict_cache_items_of_type(self.app_dir, 'imported_git_repos')
-        return '/panhandler/repos'
+        async_result = AsyncResult(job_id)
+
+        status = dict()
+        status['job_id'] = job_id
+        status['state'] = async_result.state
+        status['ready'] = async_result.ready()
+        status['step'] = 'Waiting for a worker'
+        status['percent'] = 0
+
+        if async_result.state == 'PROGRESS' and isinstance(async_result.info, dict):
+            status['step'] = async_result.info.get('step', '')
+            status['percent'] = async_result.info.get('percent', 0)
+
+        elif async_result.ready():
+            status['step'] = 'Complete'
+            status['percent'] = 100
+
+        return JsonResponse(status)
+
+
+class RepositoryJobCompleteView(RepositoryJobMixin, CNCBaseAuth, RedirectView):
+    app_dir = 'panhandler'
+
+    def get_redirect_url(self, *args, **kwargs):
+        job_id = kwargs['job_id']
+
+        if not self.is_repository_job(job_id):
+            messages.add_message(self.request, messages.ERROR, 'Could not find that repository job')
+            return '/panhandler/repos'
+
+        async_result = AsyncResult(job_id)
+
+        if not async_result.ready():
+            return f'/panhandler/repo_job/{job_id}'
+
+        jobs = self.request.session.get('repository_jobs', list())
+        jobs.remove(job_id)
+        self.request.session['repository_jobs'] = jobs
+
+        if async_result.failed():
+            print(f'Repository job {job_id} failed: {async_result.result}')
+            messages.add_message(self.request, messages.ERROR, f'Repository Job Failed: {async_result.result}')
+            # ensure we do not serve stale data after a partial update
+            cnc_utils.evict_cache_items_of_type(self.app_dir, 'imported_git_repos')
+            return '/panhandler/repos'
+
+        redirect_url = self.finish_repository_job(async_result.result)
+        async_result.forget()
+
+        return redirect_url
 
 
 class RemoveRepoView(CNCBaseAuth, RedirectView):
@@ -737,6 +800,11 @@ class RemoveRepoView(CNCBaseAuth, RedirectView):
         repository_object = RepositoryDetails.objects.get(name=repo_name)
         repository_object.delete()
 
+        index_utils.remove_repository_index(repo_name)
+
+        # objects shared with other clones of the same upstream are kept until the last clone is removed
+        object_store_utils.remove_unused_object_stores()
+
         # no need for this per gl #3
         # snippet_utils.invalidate_snippet_caches(self.app_dir)
 
@@ -745,7 +813,7 @@ class RemoveRepoView(CNCBaseAuth, RedirectView):
         # cnc_utils.set_long_term_cached_value(self.app_dir, 'all_snippets', all_skillets, -1)
 
         # this is now moved into it's own library function per gitlab issue #3
-        db_utils.update_skillet_cache()
+        index_utils.update_skillet_cache([repo_name])
 
         messages.add_message(self.request, messages.SUCCESS, 'Repo Successfully Removed')
         return '/panhandler/repos'
@@ -860,7 +928,7 @@ class CreateSkilletView(PanhandlerAppFormView):
             return HttpResponseRedirect(f'/panhandler/repo_detail/{repo_name}')
 
         # ensure this skillet name does not already exist
-        existing_skillet = db_utils.load_skillet_by_name(skillet_name)
+        existing_skillet = skillet_cache_utils.load_skillet_by_name(skillet_name, self.request)
 
         if existing_skillet:
             messages.add_message(self.request, messages.ERROR,
@@ -906,13 +974,14 @@ class CreateSkilletView(PanhandlerAppFormView):
 
         try:
             # go ahead and refresh all the found skillet
-            db_utils.refresh_skillets_from_repo(repo_name)
+            index_utils.refresh_skillets_from_repo(repo_name)
 
         except DuplicateSkilletException as dse:
             messages.add_message(self.request, messages.ERROR, str(dse))
             messages.add_message(self.request, messages.ERROR, 'This repository may not be updated correctly!'
                                                                'Please remove the offending skillet and try again!')
 
+        catalog_utils.rebuild_catalog_index([repo_name])
         cnc_utils.set_long_term_cached_value(self.app_dir, f'{repo_name}_detail', None, 0, 'snippet')
         return HttpResponseRedirect(f'/panhandler/edit_skillet/{repo_name}/{skillet_name}')
 
@@ -936,7 +1005,7 @@ class UpdateSkilletView(PanhandlerAppFormView):
         """
 
         skillet_name = self.kwargs.get('skillet', None)
-        skillet_to_edit = db_utils.load_skillet_by_name(skillet_name)
+        skillet_to_edit = skillet_cache_utils.load_skillet_by_name(skillet_name, self.request)
 
         if skillet_to_edit is not None and skillet_to_edit['type'] in self.unsupported_skillet_types:
             repo_name = self.kwargs.get('repo_name', None)
@@ -960,7 +1029,7 @@ class UpdateSkilletView(PanhandlerAppFormView):
         repo_name = self.kwargs.get('repo_name', None)
 
         # get skillet metadata
-        skillet_dict = db_utils.load_skillet_by_name(skillet_name)
+        skillet_dict = skillet_cache_utils.load_skillet_by_name(skillet_name, self.request)
 
         try:
             # get the contents of the meta-cnc.yaml file as a str
@@ -1117,7 +1186,7 @@ class UpdateSkilletView(PanhandlerAppFormView):
 
         # ensure this skillet name does not already exist
         skillet_name = skillet_dict.get('name')
-        existing_skillet = db_utils.load_skillet_by_name(skillet_name)
+        existing_skillet = skillet_cache_utils.load_skillet_by_name(skillet_name, self.request)
 
         if existing_skillet and existing_skillet.get('snippet_path', None) == skillet_path:
             skillet_file_path = os.path.join(skillet_path, existing_skillet.get('skillet_filename', '.meta-cnc.yaml'))
@@ -1136,11 +1205,12 @@ class UpdateSkilletView(PanhandlerAppFormView):
         db_utils.update_repository_details(repo_name, repo_detail)
 
         try:
-            db_utils.refresh_skillets_from_repo(repo_name)
+            index_utils.refresh_skillets_from_repo(repo_name)
 
         except DuplicateSkilletException as dse:
             messages.add_message(self.request, messages.ERROR, str(dse))
 
+        catalog_utils.rebuild_catalog_index([repo_name])
         cnc_utils.set_long_term_cached_value(self.app_dir, f'{repo_name}_detail', None, 0, 'snippet')
         return HttpResponseRedirect(f'/panhandler/repo_detail/{repo_name}')
 
@@ -1174,66 +1244,44 @@ class UpdateSkilletYamlView(UpdateSkilletView):
             return None
 
 
-class ListSkilletCollectionsView(CNCView):
+class ListSkilletCollectionsView(CatalogETagMixin, CNCView):
     template_name = 'panhandler/collections.html'
     app_dir = 'panhandler'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        cached_collections = cnc_utils.get_long_term_cached_value(self.app_dir, 'cached_collections')
-        cached_collections_info = cnc_utils.get_long_term_cached_value(self.app_dir, 'cached_collections_info')
-        if cached_collections is not None:
-            context['collections'] = cached_collections
-            context['collections_info'] = cached_collections_info
-            return context
-
-        # return a list of all defined collections
-        collections = db_utils.load_all_skillet_label_values('collection')
-
-        # build dict of collections related to other collections (if any)
-        # and a count of how many skillets are in the collection
-        collections_info = dict()
-
-        # manually create a collection called 'All'
-        all_skillets = 'All Skillets'
-
-        # get the full list of all snippets
-        all_snippets = db_utils.load_all_skillets()
+        watch_utils.start_repository_watcher()
 
-        collections_info[all_skillets] = dict()
-        collections_info[all_skillets]['count'] = len(all_snippets)
-        collections_info[all_skillets]['related'] = list()
+        # counts and related collections are precomputed from the label index when skillets are indexed
+        collections_index = catalog_utils.get_collections_index()
 
-        # iterate over the list of collections
-        for c in collections:
-            if c not in collections_info:
-                collections_info[c] = dict()
-                collections_info[c]['count'] = 0
-
-            skillets = db_utils.load_skillets_with_label('collection', c)
-            collections_info[c]['count'] = len(skillets)
-            related = list()
+        collections = list(collections_index['collections'])
+        collections.append('Kitchen Sink')
+        collections.append(catalog_utils.all_skillets_collection)
 
-            for skillet in skillets:
-                if 'labels' in skillet and 'collection' in skillet['labels']:
-                    if type(skillet['labels']['collection']) is list:
-                        for related_collection in skillet['labels']['collection']:
-                            if related_collection != c and related_collection not in related:
-                                related.append(related_collection)
+        context['collections'] = collections
+        context['collections_info'] = collections_index['collections_info']
+        context.update(catalog_utils.get_fragment_cache_context())
+        return context
 
-            collections_info[c]['related'] = json.dumps(related)
 
-        collections.append('Kitchen Sink')
-        collections.append(all_skillets)
-        context['collections'] = collections
-        context['collections_info'] = collections_info
+def _query_collection(request, collection: str) -> dict:
+    """
+    Runs a paged skillet query for a collection using the sort, type, q, page, and page_size query parameters
 
-        cnc_utils.set_long_term_cached_value(self.app_dir, 'cached_collections',
-                                             collections, 86400, 'snippet')
-        cnc_utils.set_long_term_cached_value(self.app_dir, 'cached_collections_info',
-                                             collections_info, 86400, 'snippet')
-        return context
+    :param request: HttpRequest
+    :param collection: name of the collection
+    :return: page as returned from catalog_utils.query_skillet_summaries
+    """
+    return catalog_utils.query_skillet_summaries(
+        collection,
+        skillet_type=request.GET.get('type', None),
+        search=request.GET.get('q', '').strip(),
+        sort=request.GET.get('sort', None),
+        page=request.GET.get('page', 1),
+        page_size=request.GET.get('page_size', catalog_utils.default_page_size),
+    )
 
 
 class ListSkilletsInCollectionView(CNCView):
@@ -1246,32 +1294,106 @@ class ListSkilletsInCollectionView(CNCView):
         collection = self.kwargs.get('collection', 'Kitchen Sink')
         print(f'Getting all snippets with collection label {collection}')
 
-        if collection == 'All Skillets':
-            all_skillets = db_utils.load_all_skillets()
-
-            # remove app type skillets from this list for #196
-            skillets = list(s for s in all_skillets if s['type'] != 'app')
-        else:
-            skillets = db_utils.load_skillets_with_label('collection', collection)
-
-        # Check if the skillet builder has specified an order for their Skillets
-        # if so, sort them that way be default, otherwise sort by name
-        order_index = 1000
-        default_sort = 'name'
-        for skillet in skillets:
-            if 'order' not in skillet['labels']:
-                skillet['labels']['order'] = order_index
-                order_index += 1
-            else:
-                default_sort = 'order'
+        # only the first page is rendered here, the template pages through the rest using CollectionSkilletsView
+        skillet_page = _query_collection(self.request, collection)
 
-        context['skillets'] = skillets
+        context['skillets'] = skillet_page['skillets']
+        context['skillet_page'] = skillet_page
         context['collection'] = collection
-        context['default_sort'] = default_sort
+        context['default_sort'] = skillet_page['sort']
+        context['skillet_query'] = self.request.GET.urlencode()
+        context.update(catalog_utils.get_fragment_cache_context())
 
         return context
 
 
+class CollectionSkilletsView(CNCBaseAuth, View):
+    """
+    Returns a single page of the skillets in a collection as JSON
+    """
+
+    def get(self, request, *args, **kwargs) -> Any:
+        collection = self.kwargs.get('collection', 'Kitchen Sink')
+        return JsonResponse(_query_collection(request, collection))
+
+
+class SearchSkilletsView(CNCView):
+    template_name = 'panhandler/search.html'
+    app_dir = 'panhandler'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        search = self.request.GET.get('q', '').strip()
+
+        context['search'] = search
+        context['results'] = search_utils.search_skillets(search)
+
+        return context
+
+
+class SearchSkilletsApiView(CNCBaseAuth, View):
+    """
+    Returns ranked search results as JSON, each word of the 'q' query parameter is matched as a prefix
+    """
+
+    def get(self, request, *args, **kwargs) -> Any:
+        search = request.GET.get('q', '').strip()
+        limit = request.GET.get('limit', search_utils.default_search_limit)
+
+        return JsonResponse({'q': search, 'results': search_utils.search_skillets(search, limit)})
+
+
+class CatalogReposApiView(CNCBaseAuth, View):
+    """
+    Streams all imported repositories as newline delimited JSON
+    """
+
+    def get(self, request, *args, **kwargs) -> Any:
+        return api_utils.stream_ndjson(request, catalog_utils.iter_repositories())
+
+
+class CatalogCollectionsApiView(CNCBaseAuth, View):
+    """
+    Streams all collections with their skillet counts and related collections as newline delimited JSON
+    """
+
+    def get(self, request, *args, **kwargs) -> Any:
+        return api_utils.stream_ndjson(request, catalog_utils.iter_collections())
+
+
+class CatalogSkilletsApiView(CNCBaseAuth, View):
+    """
+    Streams skillet summaries as newline delimited JSON. Use the 'label' and 'value' query parameters to only return
+    skillets with that label, or 'collection' as a shortcut for label=collection
+    """
+
+    def get(self, request, *args, **kwargs) -> Any:
+        label_key = request.GET.get('label', None)
+        label_value = request.GET.get('value', None)
+
+        if 'collection' in request.GET:
+            label_key = 'collection'
+            label_value = request.GET['collection']
+
+        return api_utils.stream_ndjson(request, catalog_utils.iter_skillet_summaries(label_key, label_value))
+
+
+class CatalogSkilletApiView(CNCBaseAuth, View):
+    """
+    Returns the full details of a single skillet as JSON
+    """
+
+    def get(self, request, *args, **kwargs) -> Any:
+        skillet_name = self.kwargs.get('skillet', '')
+        skillet = skillet_cache_utils.load_skillet_by_name(skillet_name, request)
+
+        if skillet is None:
+            return JsonResponse({'error': f'Skillet {skillet_name} not found'}, status=404)
+
+        return JsonResponse(skillet)
+
+
 class ViewSkilletView(ProvisionSnippetView):
 
     def get_snippet(self):
@@ -1286,7 +1408,7 @@ class ViewSkilletView(ProvisionSnippetView):
         return skillet
 
     def load_skillet_by_name(self, skillet_name) -> (dict, None):
-        db_skillet = db_utils.load_skillet_by_name(skillet_name)
+        db_skillet = skillet_cache_utils.load_skillet_by_name(skillet_name, self.request)
         if db_skillet is None:
             # check for a workflow_skillet in the session.
             return self.request.session.get('workflow_skillet', None)
@@ -1382,7 +1504,7 @@ class ViewValidationResultsView(EditTargetView):
 
         header = self.header
         if workflow_name is not None:
-            workflow_skillet_dict = db_utils.load_skillet_by_name(workflow_name)
+            workflow_skillet_dict = skillet_cache_utils.load_skillet_by_name(workflow_name, self.request)
             if workflow_skillet_dict is not None:
                 header = workflow_skillet_dict.get('label', self.header)
 
@@ -1402,7 +1524,7 @@ class ViewValidationResultsView(EditTargetView):
             if {'TARGET_IP', 'TARGET_USERNAME', 'TARGET_PASSWORD'}.issubset(self.get_workflow().keys()):
                 print('Skipping validation input as we already have this information cached')
                 snippet = self.get_value_from_workflow('snippet_name', None)
-                self.meta = db_utils.load_skillet_by_name(snippet)
+                self.meta = skillet_cache_utils.load_skillet_by_name(snippet, self.request)
 
                 target_ip = self.get_value_from_workflow('TARGET_IP', '')
                 # target_port = self.get_value_from_workflow('TARGET_PORT', 443)
@@ -1495,7 +1617,7 @@ class ViewValidationResultsView(EditTargetView):
             print('Could not find a valid meta-cnc def')
             raise SnippetRequiredException
 
-        meta = db_utils.load_skillet_by_name(snippet_name)
+        meta = skillet_cache_utils.load_skillet_by_name(snippet_name, self.request)
 
         context = dict()
         self.header = 'Validation Results'
@@ -1676,7 +1798,7 @@ class ExportValidationResultsView(CNCBaseAuth, View):
     def get(self, request, *args, **kwargs) -> Any:
 
         validation_skillet = kwargs['skillet']
-        meta = db_utils.load_skillet_by_name(validation_skillet)
+        meta = skillet_cache_utils.load_skillet_by_name(validation_skillet, self.request)
 
         filename = meta.get('name', 'Validation Output')
         full_output = dict()
@@ -1695,17 +1817,17 @@ class ExportValidationResultsView(CNCBaseAuth, View):
         return response
 
 
-class FavoritesView(CNCView):
+class FavoritesView(CatalogETagMixin, CNCView):
     template_name = "panhandler/favorites.html"
+    include_favorites = True
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        favorites = Collection.objects.all()
         collections_info = dict()
-        for f in favorites:
-            collections_info[f.name] = dict()
-            collections_info[f.name]['categories'] = json.dumps(f.categories)
-            collections_info[f.name]['description'] = f.description
+        for (name, description, categories) in Collection.objects.values_list('name', 'description', 'categories'):
+            collections_info[name] = dict()
+            collections_info[name]['categories'] = json.dumps(categories)
+            collections_info[name]['description'] = description
 
         context['collections'] = collections_info
         return context
@@ -1717,6 +1839,7 @@ class DeleteFavoriteView(CNCBaseAuth, RedirectView):
         collection_name = kwargs['favorite']
         collection = Collection.objects.get(name=collection_name)
         collection.delete()
+        catalog_utils.bump_favorites_version()
         return '/panhandler/favorites'
 
 
@@ -1735,7 +1858,10 @@ class AddFavoritesView(PanhandlerAppFormView):
 
             collection_name = workflow['collection_name']
             collection_description = workflow['collection_description']
-            categories = workflow.get('collection_categories', '[]')
+            categories = workflow.get('collection_categories', list())
+
+            if not isinstance(categories, list):
+                categories = [categories] if categories else list()
 
             c = Collection.objects.create(
                 name=collection_name,
@@ -1743,6 +1869,7 @@ class AddFavoritesView(PanhandlerAppFormView):
                 categories=categories
             )
             print(f'created new collection with id {c.id}')
+            catalog_utils.bump_favorites_version()
 
             self.pop_value_from_workflow('collection_categories')
             self.pop_value_from_workflow('snippet_name')
@@ -1753,19 +1880,17 @@ class AddFavoritesView(PanhandlerAppFormView):
         return super().form_valid(form)
 
 
-class FavoriteCollectionView(CNCView):
+class FavoriteCollectionView(CatalogETagMixin, CNCView):
     template_name = "panhandler/favorite.html"
+    include_favorites = True
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         collection = self.kwargs.get('favorite', '')
 
-        skillet_ids = Favorite.objects.filter(collection__name=collection)
+        skillet_ids = Favorite.objects.filter(collection__name=collection).values_list('skillet_id', flat=True)
 
-        skillets = list()
-        for s in skillet_ids:
-            skillet_dict = db_utils.load_skillet_by_name(s.skillet_id)
-            skillets.append(skillet_dict)
+        skillets = catalog_utils.load_skillet_summaries_by_names(list(skillet_ids))
 
         if not skillets:
             messages.add_message(self.request, messages.INFO,
@@ -1790,18 +1915,15 @@ class AddSkilletToFavoritesView(PanhandlerAppFormView):
     def get_context_data(self, **kwargs) -> dict:
 
         skillet_name = self.kwargs.get('skillet_name', '')
-        all_favorites = Collection.objects.all()
 
-        skillet = db_utils.load_skillet_by_name(skillet_name)
+        skillet = skillet_cache_utils.load_skillet_by_name(skillet_name, self.request)
 
         if skillet is None:
             raise SnippetRequiredException('Could not find that skillet!')
 
         skillet_label = skillet.get('label', '')
 
-        favorite_names = list()
-        for favorite in all_favorites:
-            favorite_names.append(favorite.name)
+        favorite_names = list(Collection.objects.values_list('name', flat=True))
 
         if not favorite_names:
             messages.add_message(self.request, messages.WARNING,
@@ -1812,14 +1934,9 @@ class AddSkilletToFavoritesView(PanhandlerAppFormView):
         self.save_value_to_workflow('all_favorites', favorite_names)
         self.save_value_to_workflow('skillet_name', skillet_name)
 
-        if Favorite.objects.filter(skillet_id=skillet_name).exists():
-            favorite = Favorite.objects.get(skillet_id=skillet_name)
-            current_favorites_qs = favorite.collection_set.all()
-            current_favorites = list()
-            for f in current_favorites_qs:
-                current_favorites.append(f.name)
-
-            self.prepopulated_form_values['favorites'] = current_favorites
+        favorite = Favorite.objects.filter(skillet_id=skillet_name).prefetch_related('collection_set').first()
+        if favorite is not None:
+            self.prepopulated_form_values['favorites'] = [f.name for f in favorite.collection_set.all()]
 
         context = super().get_context_data(**kwargs)
         context['title'] = f'Add {skillet_label} to Favorites '
@@ -1837,9 +1954,10 @@ class AddSkilletToFavoritesView(PanhandlerAppFormView):
 
             # FIXME - should no longer be deleting skillets due to no favorites ...
             if not favorites:
-                if Favorite.objects.filter(skillet_id=skillet_name).exists():
-                    skillet = Favorite.objects.get(skillet_id=skillet_name)
+                skillet = Favorite.objects.filter(skillet_id=skillet_name).first()
+                if skillet is not None:
                     skillet.collection_set.clear()
+                    catalog_utils.bump_favorites_version()
                     messages.add_message(self.request, messages.INFO, 'Removed Skillet from All Favorites')
                     self.next_url = self.request.session.get('last_page', '/')
 
@@ -1849,12 +1967,10 @@ class AddSkilletToFavoritesView(PanhandlerAppFormView):
                 skillet_id=skillet_name
             )
 
-            if not created:
-                skillet.collection_set.clear()
+            # replaces any existing memberships in a single step
+            skillet.collection_set.set(Collection.objects.filter(name__in=favorites))
 
-            for f in favorites:
-                c = Collection.objects.get(name=f)
-                skillet.collection_set.add(c)
+            catalog_utils.bump_favorites_version()
 
             self.pop_value_from_workflow('favorites')
             self.pop_value_from_workflow('skillet_name')
@@ -2072,7 +2188,7 @@ class CopySkilletView(CNCBaseAuth, RedirectView):
         skillet_name = kwargs['skillet_name']
         repo_name = kwargs['repo_name']
 
-        skillet_dict = db_utils.load_skillet_by_name(skillet_name=skillet_name)
+        skillet_dict = skillet_cache_utils.load_skillet_by_name(skillet_name, self.request)
 
         skillet_meta = snippet_utils.get_snippet_metadata(skillet_name, self.app_dir)
 
@@ -2107,7 +2223,7 @@ class DeleteSkilletView(UpdateRepoView):
 
         redir_url = f'/panhandler/repo_detail/{repo_name}'
 
-        skillet = db_utils.load_skillet_by_name(skillet_name)
+        skillet = skillet_cache_utils.load_skillet_by_name(skillet_name, self.request)
 
         skillet_path_str = skillet.get('snippet_path', None)
 
@@ -2153,13 +2269,14 @@ class DeleteSkilletView(UpdateRepoView):
 
         try:
             # go ahead and refresh all the found skillet
-            db_utils.refresh_skillets_from_repo(repo_name)
+            index_utils.refresh_skillets_from_repo(repo_name)
 
         except DuplicateSkilletException as dse:
             messages.add_message(self.request, messages.ERROR, str(dse))
             messages.add_message(self.request, messages.ERROR, 'This repository may not be updated correctly!'
                                                                'Please remove the offending skillet and try again!')
 
+        catalog_utils.rebuild_catalog_index([repo_name])
         git_utils.commit_local_changes(repo_dir, f'Deleted {skillet_name}',
                                        os.path.join(skillet_path_str, skillet_filename))
 
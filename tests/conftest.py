@@ -0,0 +1,79 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import os
+
+import pytest
+from git import Repo
+
+
+def _commit_files(repo: Repo, files: dict, message: str) -> str:
+    """
+    Writes the given files into the working tree and commits them
+
+    :param repo: git Repo object
+    :param files: dict of relative path to contents, None removes the file
+    :param message: commit message
+    :return: sha of the new commit
+    """
+    for (relative_path, content) in files.items():
+        file_path = os.path.join(repo.working_tree_dir, relative_path)
+
+        if content is None:
+            repo.index.remove([relative_path], working_tree=True)
+            continue
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        with open(file_path, 'w') as f:
+            f.write(content)
+
+        repo.index.add([relative_path])
+
+    return repo.index.commit(message).hexsha
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    repo = Repo.init(str(tmp_path.joinpath('test_repo')))
+    with repo.config_writer() as config:
+        config.set_value('user', 'name', 'panhandler')
+        config.set_value('user', 'email', 'panhandler@example.com')
+
+    return repo
+
+
+@pytest.fixture
+def commit_files():
+    return _commit_files
+
+
+@pytest.fixture
+def pan_cnc_home(tmp_path, monkeypatch):
+    # keep repositories, locks and caches out of the home directory of the user running the tests
+    monkeypatch.setenv('HOME', str(tmp_path))
+    return tmp_path
@@ -0,0 +1,48 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import gzip
+import json
+
+import pytest
+
+from panhandler.lib import api_utils
+
+
+@pytest.mark.scm
+def test_iter_gzip():
+    rows = [{'name': f'skillet_{i}', 'label': 'x' * 100} for i in range(2000)]
+
+    chunks = list(api_utils.iter_gzip(api_utils.iter_ndjson(rows)))
+
+    # small rows are buffered, so far fewer chunks are sent than there are rows
+    assert len(chunks) < len(rows)
+
+    lines = gzip.decompress(b''.join(chunks)).decode().splitlines()
+    assert [json.loads(line) for line in lines] == rows
+
+    assert gzip.decompress(b''.join(api_utils.iter_gzip(iter(list())))) == b''
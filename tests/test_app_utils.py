@@ -0,0 +1,54 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import json
+
+import pytest
+
+from panhandler.lib import app_utils
+
+
+@pytest.mark.scm
+def test_load_repository_manifest():
+    manifest = """
+links:
+  - name: Global Protect Skillets
+    link: https://github.com/PaloAltoNetworks/GPSkillets
+    branch: 90dev
+"""
+    assert app_utils.load_repository_manifest(manifest) == [
+        {'name': 'Global Protect Skillets', 'url': 'https://github.com/PaloAltoNetworks/GPSkillets', 'branch': '90dev'}
+    ]
+
+    manifest = json.dumps([{'url': 'https://github.com/PaloAltoNetworks/iron-skillet.git'}])
+    assert app_utils.load_repository_manifest(manifest) == [
+        {'name': 'iron-skillet', 'url': 'https://github.com/PaloAltoNetworks/iron-skillet.git', 'branch': None}
+    ]
+
+    for manifest in ('links: [', 'links: not a list', '- name: missing link'):
+        with pytest.raises(ValueError):
+            app_utils.load_repository_manifest(manifest)
@@ -0,0 +1,78 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import pytest
+from django.template import Context
+from django.template import Template
+
+from panhandler.lib import catalog_utils
+
+
+@pytest.mark.scm
+@pytest.mark.django_db
+def test_favorites_version():
+    catalog_etag = catalog_utils.get_catalog_etag('/panhandler/collections')
+    favorites_etag = catalog_utils.get_catalog_etag('/panhandler/favorites', include_favorites=True)
+
+    # editing the favorites only invalidates the pages that show them
+    catalog_utils.bump_favorites_version()
+
+    assert catalog_utils.get_catalog_version()[0] == 0
+    assert catalog_utils.get_catalog_etag('/panhandler/collections') == catalog_etag
+    assert catalog_utils.get_catalog_etag('/panhandler/favorites', include_favorites=True) != favorites_etag
+    assert catalog_utils.get_last_modified(include_favorites=True) is not None
+
+    favorites_etag = catalog_utils.get_catalog_etag('/panhandler/favorites', include_favorites=True)
+    catalog_utils.bump_catalog_version()
+    assert catalog_utils.get_catalog_etag('/panhandler/favorites', include_favorites=True) != favorites_etag
+
+
+@pytest.mark.scm
+@pytest.mark.django_db
+def test_fragment_cache_invalidation(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                   'LOCATION': 'test_fragment_cache_invalidation'}}
+
+    template = Template('{% load cache %}'
+                        '{% cache fragment_cache_life test_fragment catalog_version %}{{ value }}{% endcache %}')
+
+    def render(value: str) -> str:
+        context = catalog_utils.get_fragment_cache_context()
+        context['value'] = value
+        return template.render(Context(context))
+
+    assert render('first') == 'first'
+
+    # the rendered fragment is used until the catalog changes
+    assert render('second') == 'first'
+
+    catalog_utils.bump_catalog_version()
+    assert render('second') == 'second'
+
+    # the favorites are versioned separately and never invalidate catalog fragments
+    catalog_utils.bump_favorites_version()
+    assert render('third') == 'second'
@@ -0,0 +1,59 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import json
+
+import pytest
+
+from cnc.models import RepositoryDetails
+from cnc.models import Skillet
+from panhandler.lib import dependency_utils
+
+
+@pytest.mark.scm
+@pytest.mark.django_db
+def test_resolve_dependencies():
+    def create_repository(name: str, url: str, depends: list) -> None:
+        repository_object = RepositoryDetails.objects.create(name=name, url=url,
+                                                             details_json=json.dumps({'url': url, 'branch': 'master'}))
+        Skillet.objects.create(name=f'{name}_skillet', repository=repository_object,
+                               skillet_json=json.dumps({'name': f'{name}_skillet', 'depends': depends}))
+
+    create_repository('repo_a', 'https://github.com/example/a.git', [
+        {'url': 'https://github.com/example/b/', 'branch': 'master'},
+        {'url': 'https://github.com/example/c.git', 'branch': 'dev'},
+    ])
+    create_repository('repo_b', 'https://github.com/example/b', [
+        {'url': 'https://github.com/example/d'},
+    ])
+
+    dependencies = dependency_utils.resolve_dependencies(['repo_a'])
+
+    assert dependencies['resolved'] == {('https://github.com/example/b', 'master'): 'repo_b'}
+    assert set(dependencies['missing'].keys()) == {('https://github.com/example/c', 'dev'),
+                                                   ('https://github.com/example/d', 'master')}
+    assert dependencies['missing'][('https://github.com/example/d', 'master')]['required_by'] == ['repo_b']
@@ -0,0 +1,164 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import json
+import os
+
+import pytest
+
+from cnc.models import RepositoryDetails
+from cnc.models import Skillet
+from panhandler.lib import index_utils
+
+test_skillet = """
+name: test_template
+label: {label}
+description: A template used by the tests
+type: template
+labels:
+  collection:
+    - Tests
+variables: []
+snippets:
+  - name: greeting
+    element: Hello
+"""
+
+include_skillet = """
+name: test_include
+label: Test Include
+description: A skillet that includes the snippets of the test template
+type: template
+variables: []
+snippets:
+  - name: test_template
+    include: test_template
+"""
+
+
+@pytest.mark.scm
+def test_get_changed_files(commit_files, git_repo):
+    old_sha = commit_files(git_repo, {'a.txt': 'a', 'b.txt': 'b'}, 'initial')
+    new_sha = commit_files(git_repo, {'a.txt': 'changed', 'b.txt': None, 'c.txt': 'c'}, 'update')
+
+    (changed, removed) = index_utils.get_changed_files(git_repo.working_tree_dir, old_sha, new_sha)
+
+    assert changed == {'a.txt', 'c.txt'}
+    assert removed == {'b.txt'}
+
+    assert index_utils.get_changed_files(git_repo.working_tree_dir, old_sha, old_sha) == (set(), set())
+    assert index_utils.get_changed_files(git_repo.working_tree_dir, '0' * 40, new_sha) is None
+
+
+@pytest.mark.scm
+@pytest.mark.django_db
+def test_refresh_skillet_paths(commit_files, git_repo, pan_cnc_home, monkeypatch):
+    monkeypatch.setattr(index_utils, 'get_repo_dir', lambda repo_name: git_repo.working_tree_dir)
+
+    commit_files(git_repo, {'test_skillet/.meta-cnc.yaml': test_skillet.format(label='Test Template'),
+                            'test_skillet/README.md': 'readme'}, 'add skillet')
+
+    RepositoryDetails.objects.create(name='test_repo', url='', details_json='{}')
+
+    index_utils.refresh_skillet_paths('test_repo', {'test_skillet/.meta-cnc.yaml'}, set())
+    skillet = json.loads(Skillet.objects.get(name='test_template').skillet_json)
+    assert skillet['label'] == 'Test Template'
+
+    # a change to any other file in the skillet directory re-parses the skillet
+    with open(os.path.join(git_repo.working_tree_dir, 'test_skillet', '.meta-cnc.yaml'), 'w') as f:
+        f.write(test_skillet.format(label='Updated Template'))
+
+    index_utils.refresh_skillet_paths('test_repo', {'test_skillet/README.md'}, set())
+    skillet = json.loads(Skillet.objects.get(name='test_template').skillet_json)
+    assert skillet['label'] == 'Updated Template'
+
+    # a skillet file that can no longer be parsed is dropped from the index
+    with open(os.path.join(git_repo.working_tree_dir, 'test_skillet', '.meta-cnc.yaml'), 'w') as f:
+        f.write('name: [test_template')
+
+    index_utils.refresh_skillet_paths('test_repo', {'test_skillet/.meta-cnc.yaml'}, set())
+    assert not Skillet.objects.filter(name='test_template').exists()
+
+    # files in ignored directories are never indexed incrementally
+    commit_files(git_repo, {'venv/test_skillet/.meta-cnc.yaml': test_skillet.format(label='Test Template')},
+                 'add ignored skillet')
+
+    index_utils.refresh_skillet_paths('test_repo', {'venv/test_skillet/.meta-cnc.yaml'}, set())
+    assert not Skillet.objects.filter(name='test_template').exists()
+
+    index_utils.refresh_skillet_paths('test_repo', set(), {'test_skillet/.meta-cnc.yaml'})
+    assert not Skillet.objects.filter(name='test_template').exists()
+
+
+@pytest.mark.scm
+@pytest.mark.django_db
+def test_refresh_skillets_with_includes(commit_files, git_repo, pan_cnc_home, monkeypatch):
+    monkeypatch.setattr(index_utils, 'get_repo_dir', lambda repo_name: git_repo.working_tree_dir)
+
+    commit_files(git_repo, {'base/.meta-cnc.yaml': test_skillet.format(label='Test Template'),
+                            'include/.meta-cnc.yaml': include_skillet}, 'add skillets')
+
+    RepositoryDetails.objects.create(name='test_repo', url='', details_json='{}')
+
+    index_utils.refresh_skillets_from_repo('test_repo')
+    skillet = json.loads(Skillet.objects.get(name='test_include').skillet_json)
+    assert [snippet['name'] for snippet in skillet['snippets']] == ['test_template.greeting']
+
+    # changing the included skillet compiles the including skillet again
+    commit_files(git_repo, {'base/.meta-cnc.yaml': test_skillet.format(label='Test Template').replace(
+        'name: greeting', 'name: welcome')}, 'rename snippet')
+
+    index_utils.refresh_skillet_paths('test_repo', {'base/.meta-cnc.yaml'}, set())
+    skillet = json.loads(Skillet.objects.get(name='test_include').skillet_json)
+    assert [snippet['name'] for snippet in skillet['snippets']] == ['test_template.welcome']
+
+
+@pytest.mark.scm
+def test_find_skillet_files_skips_submodules(commit_files, git_repo):
+    commit_files(git_repo, {'test_skillet/.meta-cnc.yaml': test_skillet.format(label='Test Template'),
+                            'venv/lib/.meta-cnc.yaml': 'ignored',
+                            '.gitmodules': '[submodule "sub"]\n\tpath = sub\n\turl = https://example.com/sub.git\n'},
+                 'add skillet')
+
+    repo_dir = git_repo.working_tree_dir
+    for nested_dir in ('sub', 'nested'):
+        os.makedirs(os.path.join(repo_dir, nested_dir))
+        with open(os.path.join(repo_dir, nested_dir, '.git'), 'w') as f:
+            f.write('gitdir: ../.git/modules/sub\n')
+
+        with open(os.path.join(repo_dir, nested_dir, '.meta-cnc.yaml'), 'w') as f:
+            f.write('ignored')
+
+    found = [os.path.relpath(str(file_path), repo_dir) for file_path in index_utils.find_skillet_files(repo_dir)]
+    assert found == [os.path.join('test_skillet', '.meta-cnc.yaml')]
+
+    excluded_dirs = index_utils.get_excluded_dirs(repo_dir, {'nested/.meta-cnc.yaml'})
+    assert excluded_dirs == {'sub', 'nested'}
+    assert not index_utils.is_skillet_file('sub/.meta-cnc.yaml', excluded_dirs)
+    assert not index_utils.is_skillet_file('nested/.meta-cnc.yaml', excluded_dirs)
+    assert not index_utils.is_skillet_file('venv/lib/.meta-cnc.yaml')
+    assert index_utils.is_skillet_file('test_skillet/.meta-cnc.yaml', excluded_dirs)
@@ -0,0 +1,74 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import shutil
+
+import pytest
+from git import Repo
+
+from panhandler.lib import object_store_utils
+from panhandler.lib import repo_utils
+
+
+def _count_objects(repo_path) -> dict:
+    output = Repo(str(repo_path)).git.count_objects('-v')
+    return dict([line.split(': ', 1) for line in output.splitlines()])
+
+
+@pytest.mark.scm
+def test_get_reference_store(commit_files, git_repo, pan_cnc_home):
+    commit_files(git_repo, {'README.md': 'readme'}, 'initial')
+    url = f'file://{git_repo.working_tree_dir}'
+
+    # nothing to borrow from the first time a url is imported
+    assert object_store_utils.get_reference_store(url) is None
+
+    first = repo_utils.get_repositories_dir().joinpath('first')
+    Repo.clone_from(url, str(first))
+    assert _count_objects(first)['packs'] == '1'
+
+    store = object_store_utils.get_reference_store(url)
+    assert store == object_store_utils.get_object_store_dir(url)
+
+    # the existing clone keeps no copies of the objects found in the store
+    assert object_store_utils.is_borrowing_from(first, store)
+    assert _count_objects(first)['count'] == '0'
+    assert _count_objects(first)['packs'] == '0'
+    Repo(str(first)).git.fsck('--full')
+
+    second = repo_utils.get_repositories_dir().joinpath('second')
+    Repo.clone_from(url, str(second), reference=str(store))
+    assert object_store_utils.is_borrowing_from(second, store)
+
+    object_store_utils.remove_unused_object_stores()
+    assert store.is_dir()
+
+    shutil.rmtree(str(first))
+    shutil.rmtree(str(second))
+
+    object_store_utils.remove_unused_object_stores()
+    assert not store.exists()
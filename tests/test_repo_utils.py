@@ -0,0 +1,157 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import threading
+
+import pytest
+from git import Repo
+
+from panhandler.lib import repo_utils
+from panhandler.models import RepositoryIndex
+
+
+@pytest.mark.scm
+def test_repository_lock(pan_cnc_home):
+    repo_lock = repo_utils.get_repo_lock('test_repo')
+    assert repo_lock.get_released_time() == 0.0
+
+    with repo_lock:
+        # the lock is held per open lock file, so it excludes other threads and processes alike
+        assert not repo_utils.get_repo_lock('test_repo').acquire(blocking=False)
+        assert repo_utils.get_repo_lock('other_repo').acquire(blocking=False)
+
+    released_time = repo_lock.get_released_time()
+    assert released_time > 0.0
+
+    other_lock = repo_utils.get_repo_lock('test_repo')
+    assert other_lock.acquire(blocking=False)
+
+    # a blocking acquire waits until the lock is released
+    acquired = threading.Event()
+
+    def acquire_lock():
+        with repo_utils.get_repo_lock('test_repo'):
+            acquired.set()
+
+    thread = threading.Thread(target=acquire_lock)
+    thread.start()
+    assert not acquired.wait(0.2)
+
+    other_lock.release()
+    thread.join(5)
+    assert acquired.is_set()
+    assert repo_lock.get_released_time() >= released_time
+
+
+@pytest.mark.scm
+def test_update_all_repositories_holds_locks(pan_cnc_home, monkeypatch):
+    for repo_name in ('repo_a', 'repo_b'):
+        repo_utils.get_repositories_dir().joinpath(repo_name, '.git').mkdir(parents=True)
+
+    held = dict()
+
+    def is_locked(repo_name: str) -> bool:
+        repo_lock = repo_utils.get_repo_lock(repo_name)
+
+        if repo_lock.acquire(blocking=False):
+            repo_lock.release()
+            return False
+
+        return True
+
+    def fetch_repository(repo_path):
+        held[f'fetch {repo_path.name}'] = is_locked(repo_path.name)
+        return {'name': repo_path.name, 'status': 'updated', 'message': 'Updated', 'errors': list()}
+
+    def index_updated_repository(repo_path, summary):
+        held[f'index {repo_path.name}'] = is_locked(repo_path.name)
+
+    monkeypatch.setattr(repo_utils, 'fetch_repository', fetch_repository)
+    monkeypatch.setattr(repo_utils, 'index_updated_repository', index_updated_repository)
+
+    summaries = repo_utils.update_all_repositories(workers=2)
+
+    assert [s['name'] for s in summaries] == ['repo_a', 'repo_b']
+    assert held == {'fetch repo_a': True, 'fetch repo_b': True, 'index repo_a': True, 'index repo_b': True}
+
+    # the locks are released once the update is complete
+    assert not is_locked('repo_a')
+    assert not is_locked('repo_b')
+
+
+@pytest.mark.scm
+def test_get_clone_options():
+    assert repo_utils.get_clone_options() == {'mode': 'full', 'depth': 1, 'sparse': False}
+    assert repo_utils.get_clone_options('shallow', '5', 'yes') == {'mode': 'shallow', 'depth': 5, 'sparse': True}
+
+    # anything unexpected from the form falls back to a regular clone
+    assert repo_utils.get_clone_options('bogus', 'abc', 'maybe') == {'mode': 'full', 'depth': 1, 'sparse': False}
+    assert repo_utils.get_clone_options('partial', 0)['depth'] == 1
+
+    assert repo_utils.is_full_clone(repo_utils.get_clone_options())
+    assert not repo_utils.is_full_clone(repo_utils.get_clone_options('partial'))
+
+
+@pytest.mark.scm
+def test_enable_temp_file_registration(pan_cnc_home):
+    repo_path = repo_utils.get_repositories_dir().joinpath('test_repo')
+    Repo.init(str(repo_path))
+
+    # a manifest left behind by an earlier process does not list temp files created since
+    manifest = repo_utils.get_temp_file_manifest(repo_path)
+    manifest.write_text('test_skillet/.cnc_tmp_old\n')
+
+    temp_file = repo_path.joinpath('test_skillet', '.cnc_tmp_new')
+    temp_file.parent.mkdir()
+    temp_file.write_text('temp')
+
+    repo_utils.enable_temp_file_registration()
+    repo_utils.enable_temp_file_registration()
+
+    assert manifest.read_text().splitlines() == ['test_skillet/.cnc_tmp_old', 'test_skillet/.cnc_tmp_new']
+
+    repo_utils.remove_temp_files(repo_path)
+    assert not temp_file.exists()
+    assert manifest.read_text() == ''
+
+
+@pytest.mark.scm
+@pytest.mark.django_db
+def test_clone_new_repository_options(commit_files, git_repo, pan_cnc_home):
+    commit_files(git_repo, {'README.md': 'readme'}, 'initial')
+
+    clone_options = repo_utils.get_clone_options('shallow', 1)
+
+    # a failed clone leaves no index state behind, including state from an earlier attempt
+    repo_utils.save_clone_options('test_clone', clone_options)
+    error = repo_utils._clone_new_repository('test_clone', f'file://{pan_cnc_home}/missing', None, clone_options)
+    assert error is not None
+    assert not RepositoryIndex.objects.filter(name='test_clone').exists()
+
+    error = repo_utils._clone_new_repository('test_clone', f'file://{git_repo.working_tree_dir}', None, clone_options)
+    assert error is None
+    assert repo_utils.load_clone_options('test_clone') == clone_options
@@ -0,0 +1,57 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import json
+
+import pytest
+
+from cnc.models import RepositoryDetails
+from cnc.models import Skillet
+from panhandler.lib import search_utils
+
+
+@pytest.mark.scm
+def test_build_match_query():
+    assert search_utils.build_match_query('panos base') == '"panos"* "base"*'
+
+    # fts5 syntax such as quotes, operators and column filters is never passed through
+    assert search_utils.build_match_query('"gp" name:portal -ssl') == '"gp"* "name"* "portal"* "ssl"*'
+    assert search_utils.build_match_query('  ') == ''
+
+
+@pytest.mark.scm
+@pytest.mark.django_db
+def test_search_skillets(pan_cnc_home):
+    repository_object = RepositoryDetails.objects.create(name='test_repo', url='', details_json='{}')
+
+    for (name, skillet_type) in (('greeting_template', 'template'), ('greeting_app', 'app')):
+        skillet_dict = {'name': name, 'label': f'Greeting {skillet_type}', 'type': skillet_type}
+        Skillet.objects.create(name=name, skillet_json=json.dumps(skillet_dict), repository=repository_object)
+
+    # the catalog index has never been built, searching builds it and never returns app skillets
+    results = search_utils.search_skillets('greet')
+    assert [r['name'] for r in results] == ['greeting_template']
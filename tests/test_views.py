@@ -0,0 +1,103 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import pytest
+from celery import shared_task
+from django.contrib.messages import get_messages
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.test import RequestFactory
+from kombu.exceptions import OperationalError
+
+from pan_cnc.lib import cnc_utils
+from panhandler import views
+from panhandler.lib import catalog_utils
+from panhandler.lib import watch_utils
+
+
+@shared_task
+def repository_test_job(repo_name: str) -> dict:
+    return {'redirect': f'/panhandler/repo_detail/{repo_name}', 'messages': [(25, f'Updated {repo_name}')],
+            'summary': [{'name': repo_name, 'status': 'updated'}]}
+
+
+def _get_job_view() -> views.RepositoryJobMixin:
+    request = RequestFactory().get('/panhandler/repos')
+    request.session = dict()
+    request._messages = FallbackStorage(request)
+
+    view = views.RepositoryJobMixin()
+    view.request = request
+    return view
+
+
+@pytest.mark.scm
+def test_start_repository_job_in_process(monkeypatch):
+    view = _get_job_view()
+
+    assert view.start_repository_job(repository_test_job, 'test_repo') == '/panhandler/repo_detail/test_repo'
+    assert [str(m) for m in get_messages(view.request)] == ['Updated test_repo']
+    assert view.request.session['update_all_summary'] == [{'name': 'test_repo', 'status': 'updated'}]
+
+    # without a task broker the job is run in process as well
+    def delay(*args):
+        raise OperationalError('broker not available')
+
+    view = _get_job_view()
+    monkeypatch.setattr(cnc_utils, 'is_testing', lambda: False)
+    monkeypatch.setattr(repository_test_job, 'delay', delay)
+
+    assert view.start_repository_job(repository_test_job, 'test_repo') == '/panhandler/repo_detail/test_repo'
+    assert [str(m) for m in get_messages(view.request)] == ['Updated test_repo']
+    assert 'repository_jobs' not in view.request.session
+
+
+@pytest.mark.scm
+@pytest.mark.django_db
+def test_catalog_etag(client, django_user_model, pan_cnc_home, monkeypatch):
+    monkeypatch.setattr(watch_utils, 'start_repository_watcher', lambda: False)
+    django_user_model.objects.create_user(username='paloalto', password='panhandlertest')
+    client.login(username='paloalto', password='panhandlertest')
+
+    response = client.get('/panhandler/collections')
+    assert response.status_code == 200
+    etag = response['ETag']
+
+    # unchanged pages are answered without rendering them again
+    assert client.get('/panhandler/collections', HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    favorites_etag = client.get('/panhandler/favorites')['ETag']
+    assert client.get('/panhandler/favorites', HTTP_IF_NONE_MATCH=favorites_etag).status_code == 304
+
+    # editing the favorites only changes the pages that show them
+    catalog_utils.bump_favorites_version()
+    assert client.get('/panhandler/collections', HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get('/panhandler/favorites', HTTP_IF_NONE_MATCH=favorites_etag).status_code == 200
+
+    catalog_utils.bump_catalog_version()
+    response = client.get('/panhandler/collections', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
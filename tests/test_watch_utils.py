@@ -0,0 +1,110 @@
+# Copyright (c) 2018, Palo Alto Networks
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+# Author: Nathan Embery nembery@paloaltonetworks.com
+
+"""
+Palo Alto Networks panhandler
+
+panhandler is a tool to find, download, and use Skillets
+
+Please see http://panhandler.readthedocs.io for more information
+
+This software is provided without support, warranty, or guarantee.
+Use at your own risk.
+"""
+
+import time
+
+import pytest
+
+from panhandler.lib import repo_utils
+from panhandler.lib import watch_utils
+
+
+@pytest.fixture
+def invalidated(pan_cnc_home, monkeypatch):
+    # start every test without pending events and with a short debounce
+    monkeypatch.setattr(watch_utils, '_pending', dict())
+    monkeypatch.setattr(watch_utils, '_timers', dict())
+    monkeypatch.setattr(watch_utils, 'debounce_seconds', 0.1)
+
+    calls = list()
+
+    def invalidate_repository(repo_name, changed, removed, refs_changed, rescan):
+        calls.append({'repo_name': repo_name, 'changed': changed, 'removed': removed, 'refs_changed': refs_changed,
+                      'rescan': rescan})
+
+    monkeypatch.setattr(repo_utils, 'invalidate_repository', invalidate_repository)
+    return calls
+
+
+def _wait_for(calls: list, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while len(calls) < count and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+@pytest.mark.scm
+def test_schedule_debounces_events(invalidated):
+    watch_utils._schedule('test_repo', 'a.txt', False, False)
+    watch_utils._schedule('test_repo', 'b.txt', False, False)
+    watch_utils._schedule('test_repo', 'a.txt', True, False)
+    # object writes never invalidate a repository on their own
+    watch_utils._schedule('test_repo', '.git/objects/ab/cdef', False, False)
+    watch_utils._schedule('test_repo', '.git/refs/heads/master', False, False)
+
+    _wait_for(invalidated, 1)
+    time.sleep(0.3)
+
+    # a burst of events results in a single invalidation
+    assert invalidated == [{'repo_name': 'test_repo', 'changed': {'b.txt'}, 'removed': {'a.txt'},
+                            'refs_changed': True, 'rescan': False}]
+
+    watch_utils._schedule('test_repo', '.git/objects/ab/cdef', False, False)
+    time.sleep(0.3)
+    assert len(invalidated) == 1
+
+
+@pytest.mark.scm
+def test_flush_waits_for_repository_lock(invalidated):
+    repo_lock = repo_utils.get_repo_lock('test_repo')
+    repo_lock.acquire()
+
+    watch_utils._schedule('test_repo', '.git/refs/heads/master', False, False)
+    watch_utils._schedule('test_repo', 'skillet/.meta-cnc.yaml', False, False)
+
+    # nothing is invalidated while a job is running git in this repository
+    time.sleep(0.3)
+    assert invalidated == list()
+
+    repo_lock.release()
+    _wait_for(invalidated, 1)
+
+    # the refs were moved by the job that held the lock, only the working tree changes remain
+    assert invalidated == [{'repo_name': 'test_repo', 'changed': {'skillet/.meta-cnc.yaml'}, 'removed': set(),
+                            'refs_changed': False, 'rescan': False}]
+
+
+@pytest.mark.scm
+def test_schedule_registers_temp_files(invalidated, monkeypatch):
+    registered = list()
+    monkeypatch.setattr(repo_utils, 'register_temp_file', lambda *args: registered.append(args))
+
+    watch_utils._schedule('test_repo', 'skillet/.cnc_tmp_output', False, False)
+    watch_utils._schedule('test_repo', 'skillet/.cnc_tmp_output', True, False)
+
+    time.sleep(0.3)
+    assert registered == [('test_repo', 'skillet/.cnc_tmp_output')]
+    assert invalidated == list()